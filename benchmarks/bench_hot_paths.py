@@ -0,0 +1,280 @@
+"""Замеры горячих участков игры с контролем регрессий.
+
+Каждый замер - лучшее из нескольких повторений среднее время одного
+вызова в микросекундах. Результаты можно сохранить как базовые и затем
+сравнивать с ними: замер, ставший медленнее базового больше чем на
+`--threshold` процентов, считается регрессией, и скрипт завершается
+с кодом 1.
+
+Запуск::
+
+    python benchmarks/bench_hot_paths.py --save
+    python benchmarks/bench_hot_paths.py --check --threshold 20
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+# Окно pygame не показывается.
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import snake_core  # noqa: E402
+
+BASELINE_PATH = BASE_DIR / 'benchmarks' / 'baseline.json'
+
+# Допустимое замедление относительно базовых результатов, в процентах:
+DEFAULT_THRESHOLD = 20.0
+
+# Количество повторений каждого замера:
+REPEAT = 5
+
+BENCHMARKS = {}
+
+
+def benchmark(name, number, inner_loop=False):
+    """
+    Регистрирует функцию, готовящую замер: она возвращает тело замера.
+
+    :param number: Количество вызовов тела за одно повторение
+    :param inner_loop: Тело само выполняет `number` итераций за вызов
+    """
+    def decorator(setup):
+        BENCHMARKS[name] = (setup, number, inner_loop)
+        return setup
+    return decorator
+
+
+def _long_snake(length):
+    """Змейка заданной длины, уложенная змейкой по строкам поля."""
+    snake = snake_core.Snake()
+    snake.positions.clear()
+    for index in range(length):
+        row, column = divmod(index, snake_core.BOARD_WIDTH)
+        if row % 2:
+            column = snake_core.BOARD_WIDTH - 1 - column
+        snake.positions.append(
+            snake_core.cell_number(column, row % snake_core.BOARD_HEIGHT)
+        )
+    snake.length = length
+    return snake
+
+
+for _length in (1, 100, 10_000):
+    @benchmark(f'snake_move[{_length}]', 20_000)
+    def _snake_move(length=_length):
+        snake = _long_snake(length)
+        return snake.move
+
+
+@benchmark('snake_update_direction', 100_000)
+def _snake_update_direction():
+    snake = snake_core.Snake()
+    turns = itertools.cycle(snake_core.DIRECTIONS)
+
+    def run():
+        snake.update_direction(next(turns))
+    return run
+
+
+for _length in (1, 100, 10_000):
+    @benchmark(f'check_game_over[{_length}]', 100_000)
+    def _check_game_over(length=_length):
+        snake = _long_snake(length)
+        stone = snake_core.Stone()
+        stone.position = -1
+
+        def run():
+            snake_core.check_game_over(snake, stone)
+        return run
+
+
+for _fill in (0, 50, 90, 99):
+    @benchmark(f'randomize_position[{_fill}%]', 20_000)
+    def _randomize_position(fill=_fill):
+        cells = snake_core.CellIndex()
+        total = len(cells)
+        for position in range(total * fill // 100):
+            cells.occupy(position)
+        apple = snake_core.Apple(cells)
+
+        def run():
+            apple.randomize_position(cells)
+        return run
+
+
+for _entities in (3, 300):
+    @benchmark(f'game_step[{_entities} entities]', 20_000)
+    def _game_step(entities=_entities):
+        # Без камней и несъедобных яблок партии длинные, так что замер
+        # почти не включает перезапуск.
+        state = snake_core.GameState(
+            seed=0, apples=entities, stones=0, another_apples=0
+        )
+        turns = itertools.cycle(
+            (snake_core.UP, None, snake_core.LEFT, None, None)
+        )
+
+        def run():
+            if state.step(next(turns)).done:
+                state.reset()
+        return run
+
+
+@benchmark('env_step', 20_000)
+def _env_step():
+    import snake_env
+
+    env = snake_env.SnakeEnv(seed=0, stones=0, another_apples=0)
+    actions = itertools.cycle((0, -1, 2, -1, -1))
+
+    def run():
+        if env.step(next(actions)).done:
+            env.reset()
+    return run
+
+
+@benchmark('env_observation_rebuild[100]', 20_000)
+def _env_observation_rebuild():
+    import snake_env
+
+    # Полная перестройка наблюдения - то, от чего избавляет `step`.
+    env = snake_env.SnakeEnv(seed=0)
+    env.state.snake = _long_snake(100)
+    return env._rebuild
+
+
+for _length in (1, 100, 10_000):
+    @benchmark(f'snake_draw[{_length}]', 20 if _length > 100 else 2_000)
+    def _snake_draw(length=_length):
+        import pygame as pg
+
+        surface = pg.Surface(
+            (snake_core.SCREEN_WIDTH, snake_core.SCREEN_HEIGHT)
+        )
+        snake = _long_snake(length)
+
+        def run():
+            snake.draw(surface)
+        return run
+
+
+@benchmark('main_frame', 500, inner_loop=True)
+def _main_frame():
+    import the_snake
+
+    class _FrameClock:
+        """Часы, которые отдают один тик игры за кадр без ожидания."""
+
+        def __init__(self):
+            self.frames = 0
+
+        def tick(self, framerate=0):
+            self.frames -= 1
+            if self.frames < 0:
+                raise StopIteration
+            return 1000 / snake_core.INIT_SPEED
+
+    clock = _FrameClock()
+    the_snake.clock = clock
+
+    def run():
+        clock.frames = 500
+        try:
+            the_snake.main()
+        except StopIteration:
+            pass
+    return run
+
+
+def _measure(name):
+    """Замеряет среднее время одного вызова, мкс."""
+    setup, number, inner_loop = BENCHMARKS[name]
+    body = setup()
+    times = timeit.repeat(
+        body, number=1 if inner_loop else number, repeat=REPEAT
+    )
+    return min(times) / number * 1e6
+
+
+def run_benchmarks(names=None):
+    """Выполняет замеры и возвращает словарь имя - время, мкс."""
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        # Партии, закончившиеся во время замера `main`, не попадут
+        # в таблицу рекордов рабочего каталога.
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            for name in names or BENCHMARKS:
+                results[name] = _measure(name)
+                print(f'{name:32} {results[name]:12.3f} мкс')
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def find_regressions(results, baseline, threshold):
+    """
+    Сравнивает результаты с базовыми.
+
+    :return: Имя замера, базовое и текущее время для замедлившихся
+    :rtype: list[tuple[str, float, float]]
+    """
+    regressions = []
+    for name, elapsed in results.items():
+        reference = baseline.get(name)
+        if reference and elapsed > reference * (1 + threshold / 100):
+            regressions.append((name, reference, elapsed))
+    return regressions
+
+
+def main():
+    """Запуск замеров из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('names', nargs='*', help='замеры, по умолчанию все')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--save', action='store_true',
+                        help='сохранить результаты как базовые')
+    parser.add_argument('--check', action='store_true',
+                        help='сравнить результаты с базовыми')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='допустимое замедление, процентов')
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f'неизвестные замеры: {", ".join(sorted(unknown))}')
+
+    results = run_benchmarks(args.names)
+
+    if args.check:
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        regressions = find_regressions(results, baseline, args.threshold)
+        for name, reference, elapsed in regressions:
+            print(f'РЕГРЕССИЯ {name}: {reference:.3f} -> {elapsed:.3f} мкс '
+                  f'(+{(elapsed / reference - 1) * 100:.0f}%)')
+        if regressions:
+            return 1
+
+    if args.save:
+        baseline = {}
+        if args.baseline.exists():
+            baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        baseline.update(results)
+        args.baseline.write_text(
+            json.dumps(baseline, indent=2, sort_keys=True), encoding='utf-8'
+        )
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
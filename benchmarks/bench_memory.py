@@ -0,0 +1,87 @@
+"""Отчёт о памяти, которую занимает одна партия.
+
+Скрипт создаёт много партий в одном процессе, играет в каждой несколько
+тиков и делит прирост памяти, отслеженный `tracemalloc`, на число
+партий. Кроме итога, показываются строки кода, выделившие больше всего
+памяти, - по ним видно, какие структуры партии занимают место.
+
+Запуск::
+
+    python benchmarks/bench_memory.py --games 10000 --ticks 200
+"""
+
+import argparse
+import itertools
+import sys
+import tracemalloc
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+import snake_core  # noqa: E402
+
+# Сколько строк с наибольшими выделениями показывать:
+TOP_LINES = 10
+
+
+def play_games(games, ticks):
+    """
+    Создаёт партии и играет в каждой заданное число тиков.
+
+    :rtype: list[snake_core.GameState]
+    """
+    turns = itertools.cycle(
+        (snake_core.UP, None, snake_core.LEFT, None, None, snake_core.DOWN)
+    )
+    states = []
+    for seed in range(games):
+        state = snake_core.GameState(seed=seed)
+        for _ in range(ticks):
+            if state.step(next(turns)).done:
+                state.reset()
+        states.append(state)
+    return states
+
+
+def measure(games, ticks):
+    """
+    Замеряет память партий.
+
+    :return: Байт на партию и статистика по строкам кода
+    :rtype: tuple[float, list[tracemalloc.StatisticDiff]]
+    """
+    # Общие таблицы строятся до замера: они не зависят от числа партий.
+    play_games(1, 1)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    states = play_games(games, ticks)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    statistics = after.compare_to(before, 'lineno')
+    total = sum(statistic.size_diff for statistic in statistics)
+    del states
+    return total / games, statistics
+
+
+def main():
+    """Запуск отчёта из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=2000)
+    parser.add_argument('--ticks', type=int, default=200)
+    args = parser.parse_args()
+
+    per_game, statistics = measure(args.games, args.ticks)
+    print(f'Поле {snake_core.BOARD_WIDTH}x{snake_core.BOARD_HEIGHT}, '
+          f'{args.games} партий по {args.ticks} тиков')
+    print(f'Память на партию: {per_game:.0f} байт')
+    for statistic in statistics[:TOP_LINES]:
+        frame = statistic.traceback[0]
+        print(f'{statistic.size_diff / args.games:10.0f} байт  '
+              f'{Path(frame.filename).name}:{frame.lineno}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,405 @@
+"""Автопилот змейки для нагрузочных прогонов и демонстрационного режима.
+
+Автопилот ведёт змейку к ближайшему яблоку по кратчайшему пути, обходя
+камни и несъедобные яблоки. Расстояния до яблок считаются поиском в
+ширину от яблок и не зависят от положения головы, поэтому поиск растянут
+на несколько тиков: за тик просматривается не больше `SEARCH_BUDGET`
+клеток, а пока поиск не дошёл до головы, змейка идёт по запасному пути.
+Найденный путь хранится, пока объекты поля на месте: змейка, идущая по
+проверенному пути, не может его перекрыть, поэтому в обычный тик
+планирование сводится к взятию следующей клетки пути. Если путь к яблоку
+перекрыт телом, ищется обход с учётом того, когда освободится каждый
+сегмент, а если пути нет совсем - змейка идёт по гамильтонову циклу поля,
+который строится один раз и хранится на диске.
+"""
+
+import heapq
+import os
+from array import array
+from collections import deque
+from pathlib import Path
+
+from snake_core import (
+    BOARD_HEIGHT,
+    BOARD_WIDTH,
+    DIRECTION_INDEX,
+    DIRECTIONS,
+    neighbor_table,
+)
+
+# Каталог для кэша гамильтоновых циклов:
+CACHE_DIR = Path(
+    os.environ.get('SNAKE_CACHE_DIR', Path.home() / '.cache' / 'the_snake')
+)
+
+# Через сколько тиков в обходе по циклу снова искать путь к яблоку:
+REPLAN_INTERVAL = 8
+
+# Сколько клеток поиск пути просматривает за один тик. Время тика
+# автопилота ограничено этим числом, а не размером поля:
+SEARCH_BUDGET = 512
+
+
+def hamiltonian_cycle(width, height):
+    """
+    Строит гамильтонов цикл поля: для каждой клетки - следующую клетку.
+
+    Цикл проходит строки змейкой и возвращается по первому столбцу,
+    поэтому существует, только если одна из сторон поля чётная.
+
+    :return: Номер следующей клетки для каждой клетки или None
+    :rtype: NoneType | array.array
+    """
+    if height % 2 and width % 2:
+        return None
+    transpose = height % 2 == 1
+    if transpose:
+        width, height = height, width
+
+    order = [(0, 0)]
+    for y in range(height):
+        columns = range(1, width) if y % 2 == 0 else range(width - 1, 0, -1)
+        order.extend((x, y) for x in columns)
+    order.extend((0, y) for y in range(height - 1, 0, -1))
+
+    if transpose:
+        order = [(y, x) for x, y in order]
+        width, height = height, width
+    cycle = array('I', bytes(4 * width * height))
+    cells = [y * width + x for x, y in order]
+    for index, cell in enumerate(cells):
+        cycle[cell] = cells[(index + 1) % len(cells)]
+    return cycle
+
+
+def _is_cycle_permutation(cycle, cells):
+    """Проверяет, что массив - перестановка всех клеток поля."""
+    return (
+        len(cycle) == cells and max(cycle, default=0) < cells
+        and len(set(cycle)) == cells
+    )
+
+
+def load_hamiltonian_cycle(width, height, cache_dir=CACHE_DIR):
+    """
+    Возвращает гамильтонов цикл поля из кэша на диске или строит его.
+
+    Оборванный, устаревший или чужой файл кэша не используется: цикл
+    строится заново и файл перезаписывается.
+    """
+    path = Path(cache_dir) / f'hamiltonian_{width}x{height}.bin'
+    cycle = array('I')
+    try:
+        cycle.frombytes(path.read_bytes())
+    except (OSError, ValueError):
+        pass
+    else:
+        if _is_cycle_permutation(cycle, width * height):
+            return cycle
+
+    cycle = hamiltonian_cycle(width, height)
+    if cycle is not None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'wb') as file:
+                cycle.tofile(file)
+        except OSError:
+            # Кэш - лишь ускорение, без него цикл строится заново.
+            pass
+    return cycle
+
+
+def _neighbors_function(width, height):
+    """Функция соседей клетки в порядке `DIRECTIONS` без таблицы."""
+    last_row = (height - 1) * width
+    right = width - 1
+
+    def neighbors(cell):
+        x = cell % width
+        return (
+            cell - width if cell >= width else cell + last_row,
+            cell + width if cell < last_row else cell - last_row,
+            cell - 1 if x else cell + right,
+            cell + 1 if x != right else cell - right,
+        )
+    return neighbors
+
+
+class Autopilot:
+    """
+    Автопилот, выбирающий направление змейки.
+
+    Выбор передаётся змейке так же, как при нажатии клавиш - через
+    `next_direction` (метод `steer`), либо возвращается при вызове
+    объекта, так что автопилот можно использовать как политику фермы.
+
+    :param width: Ширина поля в клетках
+    :type width: int
+    :param height: Высота поля в клетках
+    :type height: int
+    :param cache_dir: Каталог кэша гамильтоновых циклов
+    :type cache_dir: pathlib.Path | str
+    """
+
+    def __init__(self, width=BOARD_WIDTH, height=BOARD_HEIGHT,
+                 cache_dir=CACHE_DIR):
+        """Метод инициализации автопилота."""
+        self.width = width
+        self.height = height
+        self.cache_dir = cache_dir
+        self._neighbor_table = table = neighbor_table(width, height)
+        if isinstance(table, tuple):
+            self._search_neighbors = table.__getitem__
+        else:
+            # Таблица большого поля заполняется по мере обращения, а поиск
+            # обходит сотни тысяч клеток: соседи вычисляются без неё.
+            self._search_neighbors = _neighbors_function(width, height)
+        self._cycle = None
+        self._path = deque()
+        # Поиск от яблок: номер поиска, дошедшего до клетки, клетка, из
+        # которой он пришёл (соседняя, на шаг ближе к яблоку), и расстояние
+        # до яблока. Новый поиск получает новый номер, и массивы не нужно
+        # очищать.
+        self._stamps = None
+        self._parents = None
+        self._distances = None
+        self._generation = 0
+        self._frontier = deque()
+        self._entities = None
+        self._version = None
+        self._hazards = set()
+        self._replan_in = 0
+
+    def prepare(self):
+        """
+        Загружает гамильтонов цикл и выделяет массивы поиска заранее.
+
+        Иначе это делается в первый тик, когда они понадобятся, и на
+        большом поле этот тик затягивается.
+        """
+        if self._cycle is None:
+            self._cycle = load_hamiltonian_cycle(
+                self.width, self.height, self.cache_dir
+            ) or ()
+        if self._stamps is None:
+            size = 4 * self.width * self.height
+            self._stamps = array('I', bytes(size))
+            self._parents = array('I', bytes(size))
+            self._distances = array('I', bytes(size))
+
+    def steer(self, state):
+        """Задаёт змейке следующее направление движения."""
+        state.snake.next_direction = self(state)
+
+    def __call__(self, state):
+        """
+        Выбирает направление движения для текущего состояния.
+
+        :rtype: NoneType | tuple
+        """
+        snake = state.snake
+        head = snake.get_head_position()
+
+        # Объекты поля сдвинулись или началась новая партия.
+        entities = state.entities
+        if entities is not self._entities or (
+            entities.version != self._version
+        ):
+            self._entities = entities
+            self._version = entities.version
+            self._hazards = {
+                entity.position
+                for entity in (*state.stones, *state.another_apples)
+            }
+            self._restart_search(state)
+        if self._path and self._path[0] in self._neighbors(head):
+            return self._direction(head, self._path.popleft())
+
+        # Путь пройден, рассинхронизирован или ещё не найден.
+        self._path.clear()
+        if self._replan_in <= 0 and self._search(head):
+            self._path = self._plan(state, head)
+            if self._path:
+                return self._direction(head, self._path.popleft())
+            self._replan_in = REPLAN_INTERVAL
+        self._replan_in -= 1
+        return self._fallback(state, head)
+
+    def _neighbors(self, cell):
+        """Соседние клетки в порядке `DIRECTIONS` с учётом краёв."""
+        return self._neighbor_table[cell]
+
+    def _direction(self, cell, target):
+        """Направление хода из клетки в соседнюю."""
+        return DIRECTIONS[self._neighbors(cell).index(target)]
+
+    def _behind(self, snake, head):
+        """Клетка позади головы: разворот на месте игра не выполняет."""
+        dx, dy = snake.direction
+        return self._neighbors(head)[DIRECTION_INDEX[-dx, -dy]]
+
+    def _restart_search(self, state):
+        """Начинает поиск от яблок заново."""
+        self.prepare()
+        self._generation += 1
+        apples = [apple.position for apple in state.apples]
+        for apple in apples:
+            self._stamps[apple] = self._generation
+            self._parents[apple] = apple
+            self._distances[apple] = 0
+        self._frontier = deque(apples)
+        self._path.clear()
+        self._replan_in = 0
+
+    def _search(self, head):
+        """
+        Продолжает поиск в ширину от всех яблок, пока он не дойдёт до головы.
+
+        За вызов просматривается не больше `SEARCH_BUDGET` клеток.
+        Найденные пути не учитывают тело змейки, поэтому верны, пока
+        объекты поля на месте, как бы ни двигалась голова.
+
+        :return: Дошёл ли поиск до клетки головы
+        :rtype: bool
+        """
+        stamps = self._stamps
+        parents = self._parents
+        distances = self._distances
+        generation = self._generation
+        frontier = self._frontier
+        neighbors = self._search_neighbors
+        hazards = self._hazards
+        budget = SEARCH_BUDGET
+        while frontier and budget and stamps[head] != generation:
+            budget -= 1
+            cell = frontier.popleft()
+            distance = distances[cell] + 1
+            for neighbor in neighbors(cell):
+                if stamps[neighbor] != generation and neighbor not in hazards:
+                    stamps[neighbor] = generation
+                    parents[neighbor] = cell
+                    distances[neighbor] = distance
+                    frontier.append(neighbor)
+        return stamps[head] == generation
+
+    def _free_times(self, snake, limit):
+        """
+        Через сколько ходов освободятся клетки последних сегментов тела.
+
+        Учитываются только `limit` сегментов у хвоста: остальные клетки
+        тела освободятся позже, чем через `limit` ходов.
+        """
+        positions = snake.positions
+        size = len(positions)
+        growth = max(snake.length - size, 0)
+        return {
+            positions[-index]: index + growth
+            for index in range(min(limit, size), 0, -1)
+        }
+
+    def _plan(self, state, head):
+        """Ищет путь к яблоку: сначала без учёта тела, затем с ним."""
+        apples = {apple.position for apple in state.apples}
+        snake = state.snake
+        behind = self._behind(snake, head)
+
+        path = self._shortest_path(head)
+        # Клетка тела не из хвостовой части освободится слишком поздно.
+        free_times = self._free_times(snake, len(path))
+        if path and path[0] != behind and all(
+            free_times[cell] <= step if cell in free_times
+            else not snake.occupies(cell)
+            for step, cell in enumerate(path, 1)
+        ):
+            return deque(path)
+        return deque(self._timed_path(
+            snake, head, apples, self._hazards | {behind}
+        ))
+
+    def _shortest_path(self, head):
+        """Кратчайший путь от головы к яблоку по клеткам поиска."""
+        parents = self._parents
+        path = []
+        cell = head
+        while parents[cell] != cell:
+            cell = parents[cell]
+            path.append(cell)
+        return path
+
+    def _timed_path(self, snake, head, apples, blocked):
+        """
+        Путь к яблоку по клеткам, освобождающимся к приходу головы.
+
+        Клетки из `blocked` недоступны: это препятствия и клетка позади
+        головы, куда нельзя повернуть первым ходом. Поиск идёт сначала по
+        клеткам, ближайшим к яблоку по расстояниям поиска от яблок, и
+        просматривает не больше `SEARCH_BUDGET` клеток.
+        """
+        neighbors = self._search_neighbors
+        free_times = self._free_times(snake, SEARCH_BUDGET + 1)
+        occupies = snake.occupies
+        estimate = self._estimate
+        parents = {head: None}
+        queue = [(estimate(head), 0, head)]
+        budget = SEARCH_BUDGET
+        while queue and budget:
+            budget -= 1
+            _, step, cell = heapq.heappop(queue)
+            if cell in apples:
+                path = []
+                while cell != head:
+                    path.append(cell)
+                    cell = parents[cell]
+                return reversed(path)
+            for neighbor in neighbors(cell):
+                if neighbor in parents or neighbor in blocked:
+                    continue
+                free_time = free_times.get(neighbor)
+                if free_time is None and occupies(neighbor):
+                    continue
+                if free_time is None or free_time <= step + 1:
+                    parents[neighbor] = cell
+                    heapq.heappush(queue, (
+                        step + 1 + estimate(neighbor), step + 1, neighbor
+                    ))
+        return ()
+
+    def _estimate(self, cell):
+        """Расстояние от клетки до яблока без учёта тела змейки."""
+        if self._stamps[cell] == self._generation:
+            return self._distances[cell]
+        # Поиск от яблок останавливается у головы, так что до клеток,
+        # куда он не дошёл, не ближе, чем до самых дальних из пройденных.
+        return self._distances[self._frontier[-1]] if self._frontier else 0
+
+    def _fallback(self, state, head):
+        """Ход по гамильтонову циклу или в самую просторную клетку."""
+        self.prepare()
+        snake = state.snake
+        hazards = self._hazards
+        behind = self._behind(snake, head)
+        # Хвост освобождает клетку на этом же ходу, если змейка не растёт.
+        tail = None
+        if len(snake.positions) >= snake.length:
+            tail = snake.positions[-1]
+
+        def is_safe(cell):
+            return cell not in hazards and (
+                cell == tail or not snake.occupies(cell)
+            )
+
+        if self._cycle and self._cycle[head] != behind and is_safe(
+            self._cycle[head]
+        ):
+            return self._direction(head, self._cycle[head])
+        safe = [
+            cell for cell in self._neighbors(head)
+            if cell != behind and is_safe(cell)
+        ]
+        if not safe:
+            return None
+        best = max(
+            safe,
+            key=lambda cell: sum(map(is_safe, self._neighbors(cell)))
+        )
+        return self._direction(head, best)
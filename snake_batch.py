@@ -0,0 +1,260 @@
+"""Пакетный движок Змейки: тысячи независимых партий в массивах NumPy.
+
+Правила совпадают с `snake_core.GameState`, но состояние всех партий
+хранится в массивах, а один вызов `BatchGame.step` продвигает все партии
+сразу. Координаты хранятся номерами клеток `y * width + x`, тело змейки -
+кольцевым буфером номеров клеток, занятость клеток - счётчиками.
+Свободные клетки каждой партии, как и в `snake_core.CellIndex`, хранятся
+массивом с обратным индексом, поэтому выбор клетки для нового объекта не
+зависит от размера поля. Завершившиеся партии автоматически начинаются
+заново.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from snake_core import (
+    ANOTHER_APPLE_REWARD,
+    APPLE_REWARD,
+    BOARD_HEIGHT,
+    BOARD_WIDTH,
+    DIRECTIONS,
+    GAME_OVER_REWARD,
+    INIT_SPEED,
+    MAX_SPEED,
+)
+
+# Номер действия "не менять направление".
+NO_ACTION = -1
+
+_DX = np.array([dx for dx, _ in DIRECTIONS], dtype=np.int64)
+_DY = np.array([dy for _, dy in DIRECTIONS], dtype=np.int64)
+_OPPOSITE = np.array(
+    [DIRECTIONS.index((-dx, -dy)) for dx, dy in DIRECTIONS], dtype=np.int64
+)
+
+BatchStepResult = namedtuple(
+    'BatchStepResult', ('reward', 'done', 'score', 'length')
+)
+
+
+class BatchGame:
+    """
+    Набор независимых партий, продвигаемых одним векторным шагом.
+
+    :param num_games: Количество партий
+    :type num_games: int
+    :param width: Ширина поля в клетках
+    :type width: int
+    :param height: Высота поля в клетках
+    :type height: int
+    :param seed: Зерно генератора случайных чисел
+    :type seed: NoneType | int
+    """
+
+    def __init__(self, num_games, width=BOARD_WIDTH, height=BOARD_HEIGHT,
+                 seed=None):
+        """Метод инициализации набора партий."""
+        self.num_games = num_games
+        self.width = width
+        self.height = height
+        self.num_cells = width * height
+        self.rng = np.random.default_rng(seed)
+
+        self._rows = np.arange(num_games)
+        shape = (num_games, self.num_cells)
+        # Кольцевой буфер тела: голова в body[i, head_index[i]],
+        # хвост на body_size[i] - 1 позиций раньше.
+        self.body = np.zeros(shape, dtype=np.int32)
+        self.occupancy = np.zeros(shape, dtype=np.uint8)
+        # Клетки без змейки и объектов: первые free_count[i] элементов
+        # free[i], а free_index[i, cell] - место клетки в free[i].
+        self.free = np.zeros(shape, dtype=np.int32)
+        self.free_index = np.zeros(shape, dtype=np.int32)
+        self.free_count = np.zeros(num_games, dtype=np.int64)
+        # Плоские представления тех же массивов: индекс `i * num_cells +
+        # cell` обходится заметно дешевле пары массивов индексов.
+        self._free_flat = self.free.reshape(-1)
+        self._free_index_flat = self.free_index.reshape(-1)
+        self._offsets = self._rows * self.num_cells
+        self.head_index = np.zeros(num_games, dtype=np.int64)
+        self.body_size = np.zeros(num_games, dtype=np.int64)
+        self.length = np.zeros(num_games, dtype=np.int64)
+        self.direction = np.zeros(num_games, dtype=np.int64)
+        self.apple = np.zeros(num_games, dtype=np.int64)
+        self.stone = np.zeros(num_games, dtype=np.int64)
+        self.another_apple = np.zeros(num_games, dtype=np.int64)
+        self.score = np.zeros(num_games, dtype=np.int64)
+        self.speed = np.zeros(num_games, dtype=np.int64)
+        self.reset()
+
+    @property
+    def head(self):
+        """Номера клеток голов змеек всех партий."""
+        return self.body[self._rows, self.head_index]
+
+    def reset(self):
+        """Начинает все партии заново, голова змейки в центре поля."""
+        center = (self.height // 2) * self.width + self.width // 2
+        heads = np.full(self.num_games, center, dtype=np.int64)
+        self._reset_games(self._rows, heads)
+
+    def step(self, actions=None):
+        """
+        Выполняет один игровой тик во всех партиях.
+
+        :param actions: Номера направлений из `DIRECTIONS` или `NO_ACTION`
+        :type actions: NoneType | numpy.ndarray
+        :return: Награды, признаки конца партии, счёт и длина змеек
+        до автоматического перезапуска завершившихся партий
+        :rtype: BatchStepResult
+        """
+        rows = self._rows
+        occupancy = self.occupancy
+
+        if actions is not None:
+            actions = np.asarray(actions, dtype=np.int64)
+            valid = (actions >= 0) & (actions != _OPPOSITE[self.direction])
+            self.direction = np.where(valid, actions, self.direction)
+
+        head = self.body[rows, self.head_index]
+        new_x = (head % self.width + _DX[self.direction]) % self.width
+        new_y = (head // self.width + _DY[self.direction]) % self.height
+        new_head = new_y * self.width + new_x
+
+        # Хвост уходит раньше, чем голова занимает клетку,
+        # поэтому ход в только что освобождённую клетку безопасен.
+        self._pop_tail(self.body_size >= self.length)
+        collided = occupancy[rows, new_head] > 0
+        ate = new_head == self.apple
+        bitten = (new_head == self.another_apple) & ~ate
+        crashed = new_head == self.stone
+
+        # Из индекса убирается только свободная клетка: клетка объекта
+        # или тела в нём уже занята.
+        entered = np.flatnonzero(~(collided | ate | bitten | crashed))
+        self._occupy(entered, new_head[entered])
+        self.head_index = (self.head_index + 1) % self.num_cells
+        self.body[rows, self.head_index] = new_head
+        occupancy[rows, new_head] += 1
+        self.body_size += 1
+
+        rewards = np.zeros(self.num_games, dtype=np.float32)
+
+        # Обработка столкновений с яблоком
+        self.length += ate
+        self.score += 2 * ate
+        self.speed += 2 * (ate & (self.speed <= MAX_SPEED))
+        rewards[ate] = APPLE_REWARD
+
+        # Обработка столкновений с несъедобным яблоком
+        starved = bitten & (self.body_size == 1)
+        shrunk = bitten & ~starved
+        self._pop_tail(shrunk)
+        self.length -= shrunk
+        rewards[shrunk] = ANOTHER_APPLE_REWARD
+
+        done = collided | crashed | starved
+        rewards[done] = GAME_OVER_REWARD
+
+        # Прежняя клетка съеденного объекта остаётся занятой головой.
+        eaten = np.flatnonzero(ate)
+        if eaten.size:
+            cells, full = self._spawn(eaten)
+            self.apple[eaten] = cells
+            done[eaten[full]] = True
+        spoiled = np.flatnonzero(shrunk)
+        if spoiled.size:
+            cells, full = self._spawn(spoiled)
+            self.another_apple[spoiled] = cells
+            done[spoiled[full]] = True
+
+        result = BatchStepResult(
+            rewards, done, self.score.copy(), self.length.copy()
+        )
+
+        finished = np.flatnonzero(done)
+        if finished.size:
+            self._reset_games(finished, new_head[finished])
+        return result
+
+    def _pop_tail(self, mask):
+        """Убирает хвостовой сегмент у змеек отмеченных партий."""
+        games = np.flatnonzero(mask)
+        if not games.size:
+            return
+        tail_index = (
+            self.head_index[games] - self.body_size[games] + 1
+        ) % self.num_cells
+        tails = self.body[games, tail_index]
+        occupancy = self.occupancy.reshape(-1)
+        cells = self._offsets[games] + tails
+        counts = occupancy[cells] - 1
+        occupancy[cells] = counts
+        self.body_size[games] -= 1
+        # Объекты не появляются на теле, поэтому клетка, покинутая
+        # последним сегментом, свободна.
+        released = counts == 0
+        self._release(games[released], tails[released])
+
+    def _occupy(self, games, cells):
+        """
+        Убирает свободные клетки из индекса, по одной на партию.
+
+        Клетка меняется местами с последней свободной клеткой партии.
+        """
+        offsets = self._offsets[games]
+        places = self._free_index_flat[offsets + cells]
+        counts = self.free_count[games] - 1
+        self.free_count[games] = counts
+        last = self._free_flat[offsets + counts]
+        self._free_flat[offsets + places] = last
+        self._free_index_flat[offsets + last] = places
+
+    def _release(self, games, cells):
+        """Добавляет занятые клетки в индекс, по одной на партию."""
+        offsets = self._offsets[games]
+        places = self.free_count[games]
+        self._free_flat[offsets + places] = cells
+        self._free_index_flat[offsets + cells] = places
+        self.free_count[games] = places + 1
+
+    def _spawn(self, games):
+        """
+        Занимает по одной случайной свободной клетке в каждой партии.
+
+        :param games: Номера партий
+        :type games: numpy.ndarray
+        :return: Номера клеток и признак полностью занятого поля. На
+        полностью занятом поле клетка не выбирается, а партия завершается
+        :rtype: tuple[numpy.ndarray, numpy.ndarray]
+        """
+        counts = self.free_count[games]
+        full = counts == 0
+        places = self.rng.integers(np.maximum(counts, 1))
+        cells = self._free_flat[self._offsets[games] + places]
+        placed = games[~full]
+        self._occupy(placed, cells[~full])
+        return cells, full
+
+    def _reset_games(self, games, heads):
+        """Начинает отмеченные партии заново, оставляя голову на месте."""
+        self.occupancy[games] = 0
+        self.free[games] = self.free_index[games] = np.arange(self.num_cells)
+        self.free_count[games] = self.num_cells
+        self.head_index[games] = 0
+        self.body[games, 0] = heads
+        self.occupancy[games, heads] = 1
+        self._occupy(games, heads)
+        self.body_size[games] = 1
+        self.length[games] = 1
+        self.direction[games] = self.rng.integers(
+            len(DIRECTIONS), size=games.size
+        )
+        self.score[games] = 0
+        self.speed[games] = INIT_SPEED
+
+        self.apple[games], _ = self._spawn(games)
+        self.stone[games], _ = self._spawn(games)
+        self.another_apple[games], _ = self._spawn(games)
@@ -0,0 +1,1554 @@
+"""Игровая логика Змейки без привязки к окну и частоте кадров.
+
+Модуль не импортирует pygame: все правила игры (движение, столкновения,
+появление объектов, счёт и скорость) собраны в классе `GameState`, а
+отрисовка выполняется отдельно, поверх его состояния.
+"""
+
+from array import array
+from collections import deque, namedtuple
+import copy
+import os
+import random
+import struct
+import sys
+
+# Константы для размеров поля и сетки:
+SCREEN_WIDTH, SCREEN_HEIGHT = 640, 480
+GRID_SIZE = 20
+GRID_WIDTH = SCREEN_WIDTH // GRID_SIZE
+GRID_HEIGHT = SCREEN_HEIGHT // GRID_SIZE
+
+# Размер логического поля в клетках. По умолчанию поле совпадает с окном,
+# переменная окружения SNAKE_BOARD_SIZE (например, 1000x1000) задаёт поле
+# больше окна - тогда окно показывает его часть вокруг головы змейки.
+BOARD_WIDTH, BOARD_HEIGHT = map(int, os.environ.get(
+    'SNAKE_BOARD_SIZE', f'{GRID_WIDTH}x{GRID_HEIGHT}'
+).lower().split('x'))
+BOARD_PIXEL_WIDTH = BOARD_WIDTH * GRID_SIZE
+BOARD_PIXEL_HEIGHT = BOARD_HEIGHT * GRID_SIZE
+
+# Начиная с какого числа клеток поля свободные клетки не хранятся списком:
+SPARSE_BOARD_CELLS = 1 << 16
+
+# Номер клетки в индексе свободных клеток, если клетка занята. Поле
+# с индексом меньше SPARSE_BOARD_CELLS, поэтому номер не совпадёт
+# с номером клетки:
+_NOT_FREE = 0xFFFF
+
+# Тип элементов массивов с номерами клеток поля:
+CELL_TYPECODE = 'H' if BOARD_WIDTH * BOARD_HEIGHT <= 1 << 16 else 'I'
+
+# Начальный размер буфера тела змейки, в сегментах:
+SNAKE_BODY_CAPACITY = 16
+
+# Таблицы соседей клеток по размерам поля, строятся функцией
+# `neighbor_table`:
+_neighbor_tables = {}
+
+# Сколько случайных клеток пробуется на большом поле до перебора подряд:
+SPARSE_ATTEMPTS = 64
+
+# Направления движения:
+UP = (0, -1)
+DOWN = (0, 1)
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+
+# Все направления в порядке их номеров:
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+
+# Номер направления по направлению:
+DIRECTION_INDEX = {direction: index for index, direction in enumerate(
+    DIRECTIONS
+)}
+
+# Сколько поворотов, нажатых между тиками, змейка помнит. Повороты сверх
+# этого отбрасываются, чтобы зажатые клавиши не управляли змейкой
+# с опозданием:
+MAX_QUEUED_TURNS = 3
+
+# Цвет фона - черный:
+BOARD_BACKGROUND_COLOR = (0, 0, 0)
+
+# Цвет границы ячейки
+BORDER_COLOR = (93, 216, 228)
+
+# Цвет яблока
+APPLE_COLOR = (255, 0, 0)
+
+# Цвет несъедобного яблока
+ANOTHER_APPLE_COLOR = (127, 123, 32)
+
+# Цвет камня
+STONE_COLOR = (224, 224, 224)
+
+# Цвет змейки
+SNAKE_COLOR = (0, 255, 0)
+
+# Начальная корость движения змейки:
+INIT_SPEED = 5
+
+# Максимальная скорость движения змейки:
+MAX_SPEED = 25
+
+# Сколько игровых тиков можно догнать за один кадр, если отрисовка
+# не успевает за скоростью игры:
+MAX_CATCH_UP_TICKS = 5
+
+# Награды за события одного шага игры:
+APPLE_REWARD = 1.0
+ANOTHER_APPLE_REWARD = -1.0
+GAME_OVER_REWARD = -1.0
+
+# События, которыми может завершиться шаг игры:
+EVENT_APPLE = 'apple'
+EVENT_ANOTHER_APPLE = 'another_apple'
+EVENT_GAME_OVER = 'game_over'
+EVENT_BOARD_FULL = 'board_full'
+
+StepResult = namedtuple('StepResult', ('reward', 'done', 'event'))
+
+# Зерно партии хранится в снимках и записях как 32-битное целое, поэтому
+# `GameState.reset` приводит любое целое зерно к этому диапазону:
+SEED_MASK = 0xFFFFFFFF
+
+# Снимок состояния партии: сигнатура и версия формата.
+STATE_MAGIC = b'SNKS'
+STATE_VERSION = 1
+
+# Сигнатура, версия, размеры поля, зерно, счёт, скорость, число тиков,
+# направление и следующее направление змейки, её длина, число сегментов
+# тела и поворотов в очереди, число яблок, камней и несъедобных яблок,
+# число свободных клеток в индексе.
+_STATE_HEADER = struct.Struct('<4sBHHIiHIBBIIBHHHI')
+
+# Отсутствующее направление в снимке:
+_NO_DIRECTION = 0xFF
+
+# Нормальное распределение в генераторе: наличие и запасённое значение.
+_STATE_GAUSS = struct.Struct('<?d')
+
+# Число слов состояния генератора random.Random:
+_RNG_STATE_WORDS = 625
+
+
+def draw_cell(surface, position, color):
+    """Рисует одну клетку поля с рамкой на переданной поверхности."""
+    # pygame нужен только для отрисовки, поэтому импортируется по требованию.
+    import pygame as pg
+
+    rect = pg.Rect(cell_pixels(position), (GRID_SIZE, GRID_SIZE))
+    pg.draw.rect(surface, color, rect)
+    pg.draw.rect(surface, BORDER_COLOR, rect, 1)
+    return rect
+
+
+def erase_cell(surface, position):
+    """Закрашивает клетку поля цветом фона."""
+    import pygame as pg
+
+    rect = pg.Rect(cell_pixels(position), (GRID_SIZE, GRID_SIZE))
+    pg.draw.rect(surface, BOARD_BACKGROUND_COLOR, rect)
+    return rect
+
+
+class BoardFullError(Exception):
+    """На игровом поле не осталось свободных клеток."""
+
+
+class StateError(ValueError):
+    """Данные не являются снимком партии поддерживаемой версии."""
+
+
+class CellIndex:
+    """
+    Индекс свободных клеток поля для выбора позиции за O(1).
+
+    Номера свободных клеток хранятся в массиве, а второй массив хранит
+    для каждой клетки её место в первом: занятая клетка удаляется обменом
+    с последней. Проверка `position in cell_index` истинна для занятых
+    клеток, поэтому индекс можно передавать вместо множества занятых
+    позиций.
+
+    :param occupied_positions: Клетки, занятые при создании индекса
+    :type occupied_positions: collections.abc.Container
+    """
+
+    __slots__ = ('_free', '_index')
+
+    def __init__(self, occupied_positions=()):
+        """Метод инициализации индекса."""
+        self._free = array('H', (
+            cell for cell in range(BOARD_WIDTH * BOARD_HEIGHT)
+            if cell not in occupied_positions
+        ))
+        self._index = self._build_index(self._free)
+
+    def __len__(self):
+        """Количество свободных клеток."""
+        return len(self._free)
+
+    def __contains__(self, position):
+        """Проверяет, занята ли клетка."""
+        return self._index[position] == _NOT_FREE
+
+    def occupy(self, position):
+        """Отмечает клетку занятой."""
+        index = self._index[position]
+        if index == _NOT_FREE:
+            return
+        self._index[position] = _NOT_FREE
+        last_cell = self._free.pop()
+        if index < len(self._free):
+            self._free[index] = last_cell
+            self._index[last_cell] = index
+
+    def release(self, position):
+        """Отмечает клетку свободной."""
+        if self._index[position] == _NOT_FREE:
+            self._index[position] = len(self._free)
+            self._free.append(position)
+
+    def random_free(self, rng=random):
+        """
+        Возвращает случайную свободную клетку.
+
+        :param rng: Источник случайных чисел
+        :type rng: random.Random
+        :raises BoardFullError: Если свободных клеток не осталось
+        """
+        if not self._free:
+            raise BoardFullError('На игровом поле нет свободных клеток.')
+        return self._free[rng.randrange(len(self._free))]
+
+    def copy(self):
+        """Независимая копия индекса с тем же порядком свободных клеток."""
+        other = self.__class__.__new__(self.__class__)
+        other._free = self._free[:]
+        other._index = self._index[:]
+        return other
+
+    def to_array(self):
+        """
+        Номера свободных клеток в порядке индекса.
+
+        Порядок определяет, какую клетку выберет `random_free`, поэтому
+        сохраняется в снимке партии.
+
+        :rtype: array.array
+        """
+        return self._free[:]
+
+    @classmethod
+    def from_array(cls, cells):
+        """Восстанавливает индекс по номерам свободных клеток."""
+        index = cls.__new__(cls)
+        index._free = array('H', cells)
+        index._index = cls._build_index(index._free)
+        return index
+
+    @staticmethod
+    def _build_index(free):
+        """Место каждой свободной клетки в массиве свободных клеток."""
+        index = array('H', (_NOT_FREE,)) * (BOARD_WIDTH * BOARD_HEIGHT)
+        for number, cell in enumerate(free):
+            index[cell] = number
+        return index
+
+
+class SparseCellIndex(CellIndex):
+    """
+    Индекс клеток большого поля, память которого зависит только от
+    числа занятых клеток.
+
+    Хранятся только занятые клетки, а свободная выбирается случайными
+    попытками: пока занята малая часть поля, почти всегда хватает первой.
+    Если все `SPARSE_ATTEMPTS` попыток неудачны, клетки перебираются
+    подряд от случайной.
+
+    :param occupied_positions: Клетки, занятые при создании индекса
+    :type occupied_positions: collections.abc.Iterable
+    """
+
+    __slots__ = ('_occupied',)
+
+    def __init__(self, occupied_positions=()):
+        """Метод инициализации индекса."""
+        self._occupied = set(occupied_positions)
+
+    def __len__(self):
+        """Количество свободных клеток."""
+        return BOARD_WIDTH * BOARD_HEIGHT - len(self._occupied)
+
+    def __contains__(self, position):
+        """Проверяет, занята ли клетка."""
+        return position in self._occupied
+
+    def occupy(self, position):
+        """Отмечает клетку занятой."""
+        self._occupied.add(position)
+
+    def release(self, position):
+        """Отмечает клетку свободной."""
+        self._occupied.discard(position)
+
+    def random_free(self, rng=random):
+        """
+        Возвращает случайную свободную клетку.
+
+        :param rng: Источник случайных чисел
+        :type rng: random.Random
+        :raises BoardFullError: Если свободных клеток не осталось
+        """
+        cells = BOARD_WIDTH * BOARD_HEIGHT
+        for _ in range(SPARSE_ATTEMPTS):
+            cell = rng.randrange(cells)
+            if cell not in self._occupied:
+                return cell
+
+        start = rng.randrange(cells)
+        for offset in range(cells):
+            cell = (start + offset) % cells
+            if cell not in self._occupied:
+                return cell
+        raise BoardFullError('На игровом поле нет свободных клеток.')
+
+    def copy(self):
+        """Независимая копия индекса."""
+        return self.__class__(self._occupied)
+
+    def to_array(self):
+        """
+        Пустой массив: выбор клетки не зависит от истории индекса, и
+        индекс восстанавливается по занятым клеткам.
+
+        :rtype: array.array
+        """
+        return array('H')
+
+
+def new_cell_index(occupied_positions=()):
+    """
+    Создаёт индекс свободных клеток, подходящий для размера поля.
+
+    :rtype: CellIndex
+    """
+    if BOARD_WIDTH * BOARD_HEIGHT >= SPARSE_BOARD_CELLS:
+        return SparseCellIndex(occupied_positions)
+    return CellIndex(occupied_positions)
+
+
+def cell_number(x, y):
+    """Номер клетки поля по столбцу и строке: строки подряд слева направо."""
+    return y * BOARD_WIDTH + x
+
+
+def cell_coordinates(cell):
+    """
+    Столбец и строка клетки поля по её номеру.
+
+    :rtype: tuple[int, int]
+    """
+    y, x = divmod(cell, BOARD_WIDTH)
+    return x, y
+
+
+def cell_pixels(cell):
+    """
+    Левый верхний угол клетки поля в пикселях.
+
+    Игровая логика работает с номерами клеток, в пиксели они переводятся
+    только при отрисовке.
+
+    :rtype: tuple[int, int]
+    """
+    y, x = divmod(cell, BOARD_WIDTH)
+    return x * GRID_SIZE, y * GRID_SIZE
+
+
+class _NeighborTable(dict):
+    """
+    Соседи клеток большого поля, вычисляемые при первом запросе.
+
+    Змейка и поиск пути обходят малую часть клеток большого поля,
+    поэтому таблица заполняется только для них.
+    """
+
+    def __init__(self, width, height):
+        """Метод инициализации таблицы."""
+        super().__init__()
+        self.width = width
+        self.height = height
+
+    def __missing__(self, cell):
+        """Вычисляет соседей клетки с учётом краёв поля."""
+        width, height = self.width, self.height
+        y, x = divmod(cell, width)
+        neighbors = self[cell] = (
+            (y - 1) % height * width + x,
+            (y + 1) % height * width + x,
+            y * width + (x - 1) % width,
+            y * width + (x + 1) % width,
+        )
+        return neighbors
+
+
+def neighbor_table(width=BOARD_WIDTH, height=BOARD_HEIGHT):
+    """
+    Таблица соседей клеток поля: `table[cell][direction]`.
+
+    Для каждой клетки хранятся номера соседних клеток в порядке
+    `DIRECTIONS` с учётом перехода через края поля, так что ход змейки -
+    это два обращения по индексу. На небольшом поле это общий для всех
+    партий кортеж, построенный при первом вызове, на большом - словарь,
+    заполняемый по мере обращения к клеткам.
+
+    :param width: Ширина поля в клетках
+    :type width: int
+    :param height: Высота поля в клетках
+    :type height: int
+    :rtype: tuple[tuple[int, int, int, int]] | dict
+    """
+    table = _neighbor_tables.get((width, height))
+    if table is None:
+        table = _NeighborTable(width, height)
+        if width * height < SPARSE_BOARD_CELLS:
+            table = tuple(map(table.__getitem__, range(width * height)))
+        _neighbor_tables[width, height] = table
+    return table
+
+
+def _direction_number(direction):
+    """Номер направления в снимке партии."""
+    if direction is None:
+        return _NO_DIRECTION
+    return DIRECTIONS.index(direction)
+
+
+def _check_snake(length, body, direction, next_direction, turns,
+                 turns_size):
+    """
+    Проверяет змейку из снимка партии.
+
+    :raises StateError: Если длина, тело или направления повреждены
+    """
+    if not 0 < len(body) <= length <= BOARD_WIDTH * BOARD_HEIGHT:
+        raise StateError(
+            f'Недопустимая длина змейки: {length}, сегментов {len(body)}.'
+        )
+    if len(turns) != turns_size:
+        raise StateError('Снимок партии обрывается.')
+    directions = (direction, *turns)
+    if next_direction != _NO_DIRECTION:
+        directions += (next_direction,)
+    if max(directions) >= len(DIRECTIONS):
+        raise StateError('Недопустимое направление змейки в снимке.')
+
+
+def _check_cells(*arrays):
+    """
+    Проверяет, что номера клеток из снимка лежат на поле.
+
+    :raises StateError: Если какая-то клетка вне поля
+    """
+    cells = BOARD_WIDTH * BOARD_HEIGHT
+    if any(values and max(values) >= cells for values in arrays):
+        raise StateError('В снимке есть клетка вне поля.')
+
+
+def _pack_array(typecode, values):
+    """Байты массива целых в порядке little-endian."""
+    values = array(typecode, values)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values.tobytes()
+
+
+def _unpack_array(typecode, data, offset, count):
+    """
+    Читает массив целых в порядке little-endian.
+
+    :return: Массив и смещение за его концом
+    :rtype: tuple[array.array, int]
+    :raises StateError: Если данных не хватает
+    """
+    values = array(typecode)
+    end = offset + values.itemsize * count
+    if end > len(data):
+        raise StateError('Снимок партии обрывается.')
+    values.frombytes(data[offset:end])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values, end
+
+
+def neighbor_position(position, direction):
+    """Возвращает соседнюю клетку в направлении движения с учётом краёв."""
+    return neighbor_table()[position][DIRECTION_INDEX[direction]]
+
+
+# Описание классов игры.
+class GameObject:
+    """
+    Базовый класс, игровых объектов.
+
+    Содержит в себе два атрибута и
+    один метод, которые будут наследоваться дочерними
+    классами.
+
+    :param position: Номер клетки объекта на игровом поле
+    :type position: int
+    :param body_color: Цвет объекта. Будет переопределен объектом класса
+    :type body_color: None
+    """
+
+    __slots__ = ('_position', 'body_color')
+
+    def __init__(self):
+        """Метод инициализации объекта."""
+        self.position = cell_number(BOARD_WIDTH // 2, BOARD_HEIGHT // 2)
+        self.body_color = None
+
+    @property
+    def position(self):
+        """Клетка объекта на игровом поле."""
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        self._position = value
+
+    def draw(self, surface):
+        """Метод отрисовки объектов на игровом поле."""
+        raise NotImplementedError(
+            'Метод должен быть реализован в дочернем классе.'
+        )
+
+
+class PhysicalObject(GameObject):
+    """
+    Промежуточный базовый класс, для физицеских объектов на игровом поле.
+
+    Представляет общие методы отрисовки на экране, и генерацию случайной
+    позиции при создании, исключая занятые клетки.
+
+    :param position: Номер клетки объекта на игровом поле. Смена позиции
+    сразу отражается в сетке объектов, в которую добавлен объект.
+    :type position: int
+    :param body_color: Основной цвет объекта для отрисовки.
+    :type body_color: tuple
+    :param rng: Источник случайных чисел для выбора позиции. По умолчанию -
+    модуль random
+    :type rng: random.Random
+    :param grid: Сетка объектов, в которую добавлен объект, или None
+    :type grid: NoneType | EntityGrid
+    """
+
+    # Позиция хранится в слоте `_position` базового класса, здесь
+    # переопределяется только её запись.
+    __slots__ = ('rng', 'grid')
+
+    def __init__(self, occupied_positions=None, rng=None):
+        """Методо инициализации объекта."""
+        self.grid = None
+        super().__init__()
+        self.rng = random if rng is None else rng
+        if occupied_positions is None:
+            occupied_positions = set()
+        self.randomize_position(occupied_positions)
+
+    @property
+    def position(self):
+        """Клетка объекта на игровом поле."""
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        old_position = getattr(self, '_position', None)
+        self._position = value
+        if self.grid is not None:
+            self.grid.move(self, old_position)
+
+    def __getstate__(self):
+        """
+        Состояние для `copy`: копия получает позицию напрямую, не
+        перемещая исходный объект в его сетке.
+        """
+        return None, {
+            '_position': self._position, 'rng': self.rng, 'grid': self.grid,
+            'body_color': self.body_color,
+        }
+
+    def draw(self, surface):
+        """Отрисовка физических объектов на игровом поле."""
+        draw_cell(surface, self.position, self.body_color)
+
+    def randomize_position(self, occupied_positions):
+        """
+        Переносит объект в случайную свободную клетку сетки.
+
+        :param occupied_positions: Занятые клетки. Индекс `CellIndex`
+        используется напрямую, по остальным контейнерам он строится.
+        :type occupied_positions: CellIndex | collections.abc.Container
+        :raises BoardFullError: Если свободных клеток не осталось
+        """
+        if not isinstance(occupied_positions, CellIndex):
+            occupied_positions = new_cell_index(occupied_positions)
+        self.position = occupied_positions.random_free(self.rng)
+
+
+class Apple(PhysicalObject):
+    """
+    Класс яблока - игрового объекта, который может быть съеден змейкой.
+
+    Наследуется от класса PhysicalObject. Позиция генерируется
+    случайным образом на игровом поле.
+
+    :param position: Номер клетки объекта, определяется случайно
+    :type position: int
+    :param body_color: Цвет объекта - Яблоко
+    :type body_color: tuple
+    """
+
+    __slots__ = ()
+
+    def __init__(self, occupied_positions=None, body_color=APPLE_COLOR,
+                 rng=None):
+        """Метод инициализации объекта."""
+        super().__init__(occupied_positions, rng)
+        self.body_color = body_color
+
+
+class UninedibleApple(Apple):
+    """
+    Дочерний класс, описывает игровой объект несъедобное яблоко.
+
+    :param position: Номер клетки объекта, определяется случайно
+    :type position: int
+    :param body_color: Цвет объекта - Несъедобное яблоко
+    :type body_color: tuple
+    """
+
+    __slots__ = ()
+
+    def __init__(self, occupied_positions=None, rng=None):
+        """Метод инициализации объекта."""
+        super().__init__(occupied_positions, rng=rng)
+        self.body_color = ANOTHER_APPLE_COLOR
+
+
+class Stone(PhysicalObject):
+    """
+    Класс камня - статичного препятствия на игровом поле.
+
+    Наследуется от класса PhysicalObject. При столкновении с камнем
+    змейка погибает. Позиция генерируется случайным образом на игровом поле.
+
+    :param position: Номер клетки объекта, определяется случайно
+    :type position: int
+    :param body_color: Цвет объекта - Камень
+    :type body_color: tuple
+    """
+
+    __slots__ = ()
+
+    def __init__(self, occupied_positions=None, body_color=STONE_COLOR,
+                 rng=None):
+        """Метод инициализации объекта."""
+        super().__init__(occupied_positions, rng)
+        self.body_color = body_color
+
+
+class _SparseCellCounts(dict):
+    """Число сегментов в клетках большого поля: хранятся только занятые."""
+
+    __slots__ = ()
+
+    def __missing__(self, cell):
+        """Свободная клетка."""
+        return 0
+
+    def __setitem__(self, cell, count):
+        """Обновляет число сегментов, забывая освободившиеся клетки."""
+        if count:
+            super().__setitem__(cell, count)
+        else:
+            self.pop(cell, None)
+
+
+class SnakeBody:
+    """
+    Тело змейки: кольцевой буфер номеров клеток от головы к хвосту.
+
+    Номера клеток упакованы в `array`, и число сегментов в каждой клетке
+    тоже хранится в `array` по номерам клеток (на большом поле - в словаре
+    только занятых клеток), поэтому тело не держит по объекту Python на
+    сегмент. Снаружи тело ведёт себя как очередь номеров клеток: голова -
+    первый элемент, а проверка `position in body` выполняется за O(1).
+
+    :param positions: Начальные клетки от головы к хвосту
+    :type positions: collections.abc.Iterable[int]
+    """
+
+    __slots__ = ('_cells', '_head', '_size', '_counts')
+
+    def __init__(self, positions=()):
+        """Метод инициализации тела."""
+        self._cells = array(CELL_TYPECODE, (0,)) * SNAKE_BODY_CAPACITY
+        self._head = 0
+        self._size = 0
+        if BOARD_WIDTH * BOARD_HEIGHT >= SPARSE_BOARD_CELLS:
+            self._counts = _SparseCellCounts()
+        else:
+            self._counts = array('H', bytes(2 * BOARD_WIDTH * BOARD_HEIGHT))
+        self.extend(positions)
+
+    @classmethod
+    def from_array(cls, cells):
+        """Тело по номерам клеток от головы к хвосту."""
+        return cls(cells)
+
+    def __len__(self):
+        """Количество сегментов."""
+        return self._size
+
+    def __iter__(self):
+        """Клетки сегментов от головы к хвосту."""
+        return iter(self.to_array())
+
+    def __getitem__(self, index):
+        """Клетка сегмента: 0 - голова, -1 - хвост."""
+        size = self._size
+        if index == 0 and size:
+            return self._cells[self._head]
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError('Индекс вне тела змейки.')
+        cells = self._cells
+        return cells[(self._head + index) % len(cells)]
+
+    def __contains__(self, position):
+        """Проверяет, занята ли клетка телом."""
+        return self._counts[position] > 0
+
+    def count(self, position):
+        """Количество сегментов тела в клетке."""
+        return self._counts[position]
+
+    def appendleft(self, position):
+        """Добавляет сегмент перед головой."""
+        self.push(position, None)
+
+    def push(self, position, length):
+        """
+        Добавляет сегмент перед головой и убирает хвост сверх длины.
+
+        :param length: Длина тела или None, чтобы не убирать хвост
+        :type length: NoneType | int
+        :return: Клетка убранного хвоста или None
+        :rtype: NoneType | int
+        """
+        if self._size == len(self._cells):
+            self._reserve()
+        cells = self._cells
+        capacity = len(cells)
+        self._head = head = (self._head - 1) % capacity
+        cells[head] = position
+        counts = self._counts
+        counts[position] += 1
+        size = self._size + 1
+        if length is None or size <= length:
+            self._size = size
+            return None
+        self._size = size - 1
+        tail = cells[(head + size - 1) % capacity]
+        counts[tail] -= 1
+        return tail
+
+    def append(self, position):
+        """Добавляет сегмент за хвостом."""
+        self._reserve()
+        cells = self._cells
+        cells[(self._head + self._size) % len(cells)] = position
+        self._size += 1
+        self._counts[position] += 1
+
+    def extend(self, positions):
+        """Добавляет сегменты за хвостом."""
+        for position in positions:
+            self.append(position)
+
+    def pop(self):
+        """Убирает хвостовой сегмент и возвращает его клетку."""
+        if not self._size:
+            raise IndexError('Тело змейки пусто.')
+        self._size -= 1
+        cells = self._cells
+        cell = cells[(self._head + self._size) % len(cells)]
+        self._counts[cell] -= 1
+        return cell
+
+    def clear(self):
+        """Убирает все сегменты."""
+        counts = self._counts
+        for cell in self.to_array():
+            counts[cell] -= 1
+        self._head = self._size = 0
+
+    def copy(self):
+        """Независимая копия тела."""
+        other = self.__class__.__new__(self.__class__)
+        other._cells = self._cells[:]
+        other._head = self._head
+        other._size = self._size
+        other._counts = copy.copy(self._counts)
+        return other
+
+    def to_array(self):
+        """
+        Номера клеток от головы к хвосту.
+
+        :rtype: array.array
+        """
+        cells = self._cells
+        head = self._head
+        end = head + self._size
+        if end <= len(cells):
+            return cells[head:end]
+        return cells[head:] + cells[:end - len(cells)]
+
+    def _reserve(self):
+        """Удваивает буфер, если в нём не осталось места."""
+        if self._size == len(self._cells):
+            cells = self.to_array()
+            self._cells = cells + array(CELL_TYPECODE, (0,)) * len(cells)
+            self._head = 0
+
+
+class Snake(GameObject):
+    """
+    Дочерний класс, переопределяются атрибуты и метод для объекта - Змейка.
+
+    :param length: Длина змейки. По умолчанию значение = 1
+    :type length: int
+    :param positions: Клетки частей тела змейки, голова - первый
+    элемент. Начальная позиция центр поля. Число сегментов в клетке
+    (`positions.count`) обновляется только у головы и хвоста, поэтому
+    проверка занятости клетки не зависит от длины змейки.
+    :type positions: SnakeBody
+    :param direction: Направление движения змейки. По умолчанию - вправо
+    :type direction: tuple
+    :param next_direction: следующее направление движения, применяется после
+    обработки нажатия клавиш. По умолчанию - None
+    :type next_direction: NoneType | tuple
+    :param turns: Повороты, нажатые между тиками, по одному на тик
+    :type turns: collections.deque[tuple]
+    :param body_color: цвет змейки. По умолчанию - зеленый
+    :type body_color: tuple
+    :param last: Хранит в себе клетку последнего элемента перед тем как
+    стереть его.
+    :type last: NoneType | int
+    :param rng: Источник случайных чисел для выбора направления. По
+    умолчанию - модуль random
+    :type rng: random.Random
+    :param neighbors: Таблица соседей клеток поля, см. `neighbor_table`
+    :type neighbors: tuple[tuple[int, int, int, int]] | dict
+    """
+
+    __slots__ = (
+        'length', 'positions', 'direction', 'next_direction', 'turns', 'last',
+        'rng', 'neighbors',
+    )
+
+    def __init__(self, rng=None):
+        """Метод инициализации объекта."""
+        super().__init__()
+        self.body_color = SNAKE_COLOR
+        self.rng = random if rng is None else rng
+        self.neighbors = neighbor_table()
+        self.positions = SnakeBody((self.position,))
+        self.turns = deque(maxlen=MAX_QUEUED_TURNS)
+        self.reset()
+
+    def queue_turn(self, direction):
+        """
+        Ставит поворот в очередь, применяемую по одному повороту за тик.
+
+        Поворот проверяется относительно направления, в котором змейка
+        будет двигаться к его тику: повторы и развороты на 180 градусов
+        отбрасываются, как и повороты сверх `MAX_QUEUED_TURNS`.
+
+        :return: Принят ли поворот
+        :rtype: bool
+        """
+        turns = self.turns
+        if len(turns) == turns.maxlen:
+            return False
+        dx, dy = turns[-1] if turns else self.next_direction or self.direction
+        if direction in ((dx, dy), (-dx, -dy)):
+            return False
+        turns.append(direction)
+        return True
+
+    def pop_turn(self):
+        """
+        Забирает направление для следующего тика.
+
+        Направление, заданное через `next_direction`, важнее очереди.
+
+        :rtype: NoneType | tuple
+        """
+        direction = self.next_direction
+        self.next_direction = None
+        if direction is None and self.turns:
+            direction = self.turns.popleft()
+        return direction
+
+    def update_direction(self, next_direction=None):
+        """Обновляет навпрвление движения змейки."""
+        if next_direction is None:
+            next_direction = self.pop_turn()
+        else:
+            self.next_direction = None
+
+        if next_direction:
+            dx, dy = self.direction
+            if next_direction != (-dx, -dy):
+                self.direction = next_direction
+
+    def move(self):
+        """Обновляет позицию змейки."""
+        positions = self.positions
+        # Переход через край поля уже учтён в таблице соседей.
+        new_head = self.neighbors[positions[0]][
+            DIRECTION_INDEX[self.direction]
+        ]
+        self.last = positions.push(new_head, self.length)
+
+    def draw(self, surface):
+        """Отрисовывает змейку на экране, затирая след."""
+        if self.last is not None:
+            erase_cell(surface, self.last)
+
+        for position in self.positions:
+            draw_cell(surface, position, self.body_color)
+
+    def occupies(self, position):
+        """Проверяет, занята ли клетка телом змейки."""
+        return position in self.positions
+
+    def get_head_position(self):
+        """Возвращает позицию головы змейки."""
+        return self.positions[0]
+
+    def decrease_length(self):
+        """Уменьшает длину змейки на один сегмент."""
+        if len(self.positions) > 1:
+            self.last = self.positions.pop()
+            self.length -= 1
+            return True
+        return False
+
+    def reset(self, head_position=None):
+        """
+        Сбрасывает змейку в начальное состояние.
+
+        :param head_position: Клетка головы. По умолчанию голова остаётся
+        на месте
+        :type head_position: NoneType | int
+        """
+        direction_tuple = (UP, DOWN, LEFT, RIGHT)
+        self.length = 1
+        if head_position is None:
+            head_position = self.positions[0]
+        self.positions.clear()
+        self.positions.append(head_position)
+        self.last = None
+        self.direction = self.rng.choice(direction_tuple)
+        self.next_direction = None
+        self.turns.clear()
+
+
+def initialize_game_objects():
+    """Инициализация всех игровых объектов."""
+    snake = Snake()
+    snake_positions = set(snake.positions)
+
+    apple = Apple(snake_positions)
+    occupied_after_apple = snake_positions | {apple.position}
+
+    stone = Stone(occupied_after_apple)
+    occupied_after_stone = occupied_after_apple | {stone.position}
+
+    another_apple = UninedibleApple(occupied_after_stone)
+
+    return snake, apple, stone, another_apple
+
+
+def handle_apple_collision(
+    snake,
+    apple,
+    occupied_positions,
+    current_score,
+    current_speed
+):
+    """Обработка столкновения с яблоком."""
+    snake.length += 1
+    new_score = current_score + 2
+
+    if current_speed <= MAX_SPEED:
+        new_speed = current_speed + 2
+    else:
+        new_speed = current_speed
+
+    apple.randomize_position(occupied_positions)
+    return new_score, new_speed
+
+
+def handle_another_apple_collision(snake, another_apple, occupied_positions):
+    """Обработка столкновения с несъедобным яблоком."""
+    # Игра заканчивается.
+    if len(snake.positions) == 1:
+        return False
+
+    # ИГра продолжается.
+    snake.decrease_length()
+    another_apple.randomize_position(occupied_positions)
+    return True
+
+
+def check_game_over(snake, stone):
+    """Проверка условий завершения игры."""
+    head_position = snake.get_head_position()
+
+    # Столкновение с телом змейки или с камнем: голова сама занимает
+    # свою клетку, поэтому второй сегмент в ней означает столкновение.
+    return (snake.positions.count(head_position) > 1
+            or stone.position == head_position)
+
+
+class EntityGrid:
+    """
+    Объекты поля, разложенные по клеткам: хэш от клетки к объекту.
+
+    Узнать, что лежит в клетке, можно за O(1) при любом числе объектов.
+    Объекты, добавленные в сетку, сами сообщают ей о смене позиции.
+
+    :param version: Счётчик изменений, растёт при каждом перемещении,
+    добавлении и удалении объекта
+    :type version: int
+    """
+
+    __slots__ = ('_cells', 'version')
+
+    def __init__(self, entities=()):
+        """Метод инициализации сетки."""
+        self._cells = {}
+        self.version = 0
+        for entity in entities:
+            self.add(entity)
+
+    def __len__(self):
+        """Количество занятых объектами клеток."""
+        return len(self._cells)
+
+    def __contains__(self, position):
+        """Проверяет, лежит ли в клетке объект."""
+        return position in self._cells
+
+    def at(self, position):
+        """
+        Возвращает объект в клетке.
+
+        :rtype: NoneType | PhysicalObject
+        """
+        return self._cells.get(position)
+
+    def add(self, entity):
+        """Добавляет объект в сетку."""
+        entity.grid = self
+        self._cells[entity.position] = entity
+        self.version += 1
+
+    def remove(self, entity):
+        """Убирает объект из сетки."""
+        if self._cells.get(entity.position) is entity:
+            del self._cells[entity.position]
+        entity.grid = None
+        self.version += 1
+
+    def move(self, entity, old_position):
+        """Переносит объект из прежней клетки в его текущую позицию."""
+        if self._cells.get(old_position) is entity:
+            del self._cells[old_position]
+        self._cells[entity.position] = entity
+        self.version += 1
+
+
+class OccupiedPositions:
+    """
+    Занятые клетки поля без копирования тела змейки в новое множество.
+
+    Поддерживает проверку `position in occupied_positions`, которой
+    пользуется `PhysicalObject.randomize_position`.
+
+    :param snake: Змейка
+    :type snake: Snake
+    :param objects: Объекты поля: сетка или перечень объектов
+    :type objects: EntityGrid | tuple[PhysicalObject]
+    """
+
+    def __init__(self, snake, objects):
+        """Метод инициализации представления."""
+        self.snake = snake
+        self.objects = objects
+
+    def __contains__(self, position):
+        """Проверяет, занята ли клетка змейкой или объектом."""
+        if self.snake.occupies(position):
+            return True
+        if isinstance(self.objects, EntityGrid):
+            return position in self.objects
+        return any(
+            game_object.position == position for game_object in self.objects
+        )
+
+
+class GameState:
+    """
+    Полное состояние одной партии и её пошаговое продвижение.
+
+    Не зависит от pygame и от часов: один вызов `step` - один игровой тик.
+    Рендерер читает из состояния объекты и клетки, освобождённые за шаг.
+
+    :param snake: Змейка
+    :type snake: Snake
+    :param apples: Съедобные яблоки
+    :type apples: list[Apple]
+    :param stones: Камни
+    :type stones: list[Stone]
+    :param another_apples: Несъедобные яблоки
+    :type another_apples: list[UninedibleApple]
+    :param apple: Первое съедобное яблоко или None
+    :type apple: NoneType | Apple
+    :param stone: Первый камень или None
+    :type stone: NoneType | Stone
+    :param another_apple: Первое несъедобное яблоко или None
+    :type another_apple: NoneType | UninedibleApple
+    :param objects: Все объекты поля в порядке отрисовки
+    :type objects: tuple[PhysicalObject]
+    :param entities: Все объекты поля, разложенные по клеткам
+    :type entities: EntityGrid
+    :param score: Счёт текущей партии
+    :type score: int
+    :param speed: Скорость игры, тиков в секунду
+    :type speed: int
+    :param ticks: Количество шагов текущей партии
+    :type ticks: int
+    :param freed_cells: Клетки, освобождённые змейкой за последний шаг,
+    а после `reset` - все клетки, занятые в прошлой партии
+    :type freed_cells: list[int]
+    :param respawned: Объекты, сменившие позицию за последний шаг или
+    при `reset`
+    :type respawned: list[PhysicalObject]
+    :param cells: Индекс свободных клеток, обновляется по мере движения
+    змейки и появления объектов
+    :type cells: CellIndex
+    :param rng: Источник случайных чисел всех объектов партии
+    :type rng: random.Random
+    :param seed: Зерно, с которого началась текущая партия. Зерно и
+    клетка головы полностью определяют партию при тех же действиях.
+    :type seed: int
+    :param profiler: Профилировщик фаз тика или None
+    :type profiler: NoneType | snake_profile.FrameProfiler
+    """
+
+    __slots__ = (
+        'rng', 'profiler', 'snake', 'cells', 'apples', 'stones',
+        'another_apples', 'apple', 'stone', 'another_apple', 'objects',
+        'entities', 'seed', 'score', 'speed', 'ticks', 'freed_cells',
+        'respawned',
+    )
+
+    def __init__(self, seed=None, head_position=None, apples=1, stones=1,
+                 another_apples=1):
+        """Метод инициализации состояния."""
+        self.rng = random.Random(seed)
+        self.profiler = None
+        self.snake = Snake(self.rng)
+        self.cells = new_cell_index(self.snake.positions)
+        self.apples = [
+            Apple(self.cells, rng=self.rng) for _ in range(apples)
+        ]
+        self.stones = [
+            Stone(self.cells, rng=self.rng) for _ in range(stones)
+        ]
+        self.another_apples = [
+            UninedibleApple(self.cells, rng=self.rng)
+            for _ in range(another_apples)
+        ]
+        self.apple = next(iter(self.apples), None)
+        self.stone = next(iter(self.stones), None)
+        self.another_apple = next(iter(self.another_apples), None)
+        self.objects = (
+            *self.apples, *self.another_apples, *self.stones
+        )
+        self.entities = EntityGrid()
+        self.ticks = 0
+        self.reset(seed, head_position)
+
+    def occupied_positions(self):
+        """Возвращает представление всех занятых клеток поля."""
+        return OccupiedPositions(self.snake, self.entities)
+
+    def reset(self, seed=None, head_position=None):
+        """
+        Начинает новую партию, по умолчанию сохраняя положение головы.
+
+        :param seed: Зерно партии. По умолчанию берётся из генератора
+        состояния, так что серия партий определяется первым зерном.
+        Приводится к 32 битам (`seed & SEED_MASK`): партия играется с
+        тем зерном, которое попадает в снимок и запись
+        :type seed: NoneType | int
+        :param head_position: Начальная клетка головы змейки
+        :type head_position: NoneType | int
+        """
+        if seed is None:
+            seed = self.rng.getrandbits(32)
+        seed &= SEED_MASK
+        self.seed = seed
+        self.rng.seed(seed)
+        # Клетки прошлой партии, включая освобождённые последним шагом: по
+        # ним и по новым позициям объектов `draw_step` перерисовывает поле
+        # без полной перерисовки.
+        freed_cells = self.freed_cells if self.ticks else []
+        freed_cells.extend(self.snake.positions)
+        freed_cells.extend(entity.position for entity in self.objects)
+        self.snake.reset(head_position)
+
+        # Индекс строится заново, чтобы выбор клеток зависел только от
+        # зерна, а не от истории предыдущей партии.
+        self.cells = new_cell_index(self.snake.positions)
+        self.entities = EntityGrid()
+        self.respawn((*self.apples, *self.stones, *self.another_apples))
+
+        self.score = 0
+        self.speed = INIT_SPEED
+        self.ticks = 0
+        self.freed_cells = freed_cells
+        self.respawned = list(self.objects)
+
+    def respawn(self, entities):
+        """
+        Переносит объекты в случайные свободные клетки за один проход.
+
+        Объекты добавляются в сетку `entities`, если ещё не добавлены.
+
+        :raises BoardFullError: Если свободных клеток не хватило
+        """
+        cells = self.cells
+        for entity in entities:
+            entity.randomize_position(cells)
+            cells.occupy(entity.position)
+            if entity.grid is not self.entities:
+                self.entities.add(entity)
+
+    def step(self, action=None):
+        """
+        Выполняет один игровой тик.
+
+        :param action: Новое направление движения или None
+        :type action: NoneType | tuple
+        :return: Награда за шаг, признак конца партии и событие шага
+        :rtype: StepResult
+        """
+        snake = self.snake
+        profiler = self.profiler
+        snake.update_direction(action)
+        if profiler is not None:
+            profiler.mark('update_direction')
+
+        snake.move()
+        self.ticks += 1
+
+        freed_cells = self.freed_cells = []
+        self.respawned = []
+        if snake.last is not None:
+            freed_cells.append(snake.last)
+
+        # Голова всегда занимает клетку, а освобождённый хвост не может
+        # быть под объектом: объекты не появляются на теле змейки.
+        self.cells.occupy(snake.get_head_position())
+        if snake.last is not None and not snake.occupies(snake.last):
+            self.cells.release(snake.last)
+        if profiler is not None:
+            profiler.mark('move')
+
+        result = self._handle_collisions()
+        if profiler is not None:
+            profiler.mark('collisions')
+        return result
+
+    def save_state(self):
+        """
+        Упаковывает всё, от чего зависят правила, в компактные байты.
+
+        В снимок входят змейка с очередью поворотов, клетки объектов,
+        счёт, скорость, порядок индекса свободных клеток и состояние
+        генератора случайных чисел, поэтому партия, восстановленная
+        из снимка, продолжается так же, как исходная.
+
+        :rtype: bytes
+        """
+        snake = self.snake
+        free_cells = self.cells.to_array()
+        header = _STATE_HEADER.pack(
+            STATE_MAGIC, STATE_VERSION, BOARD_WIDTH, BOARD_HEIGHT,
+            self.seed, self.score, self.speed, self.ticks,
+            DIRECTIONS.index(snake.direction),
+            _direction_number(snake.next_direction),
+            snake.length, len(snake.positions), len(snake.turns),
+            len(self.apples), len(self.stones), len(self.another_apples),
+            len(free_cells)
+        )
+        _, rng_words, gauss = self.rng.getstate()
+        return b''.join((
+            header,
+            _pack_array('I', snake.positions.to_array()),
+            _pack_array('I', (
+                entity.position for entity in (
+                    *self.apples, *self.stones, *self.another_apples
+                )
+            )),
+            bytes(map(DIRECTIONS.index, snake.turns)),
+            _pack_array('H', free_cells),
+            _pack_array('I', rng_words),
+            _STATE_GAUSS.pack(gauss is not None, gauss or 0.0),
+        ))
+
+    def load_state(self, data):
+        """
+        Восстанавливает партию из снимка `save_state`.
+
+        :raises StateError: Если данные повреждены, сняты на поле другого
+        размера или с другим числом объектов
+        """
+        try:
+            header = _STATE_HEADER.unpack_from(data)
+        except struct.error as error:
+            raise StateError(f'Слишком короткий снимок партии: {error}')
+        (magic, version, width, height, seed, score, speed, ticks,
+         direction, next_direction, length, body_size, turns_size,
+         apples, stones, another_apples, free_size) = header
+        if magic != STATE_MAGIC or version != STATE_VERSION:
+            raise StateError('Неизвестный формат снимка партии.')
+        if (width, height) != (BOARD_WIDTH, BOARD_HEIGHT):
+            raise StateError(
+                f'Снимок сделан для поля {width}x{height}, '
+                f'а текущее поле {BOARD_WIDTH}x{BOARD_HEIGHT}.'
+            )
+        entities = (*self.apples, *self.stones, *self.another_apples)
+        if (apples, stones, another_apples) != (
+            len(self.apples), len(self.stones), len(self.another_apples)
+        ):
+            raise StateError('В снимке другое число объектов поля.')
+
+        offset = _STATE_HEADER.size
+        body, offset = _unpack_array('I', data, offset, body_size)
+        cells, offset = _unpack_array('I', data, offset, len(entities))
+        turns = data[offset:offset + turns_size]
+        offset += turns_size
+        free_cells, offset = _unpack_array('H', data, offset, free_size)
+        rng_words, offset = _unpack_array(
+            'I', data, offset, _RNG_STATE_WORDS
+        )
+        try:
+            has_gauss, gauss = _STATE_GAUSS.unpack_from(data, offset)
+        except struct.error as error:
+            raise StateError(f'Снимок партии обрывается: {error}')
+        rng_state = (3, tuple(rng_words), gauss if has_gauss else None)
+        # Всё проверяется до первого изменения, чтобы повреждённый снимок
+        # не оставлял партию восстановленной наполовину.
+        _check_snake(length, body, direction, next_direction, turns,
+                     turns_size)
+        _check_cells(body, cells, free_cells)
+        try:
+            random.Random().setstate(rng_state)
+        except (TypeError, ValueError) as error:
+            raise StateError(f'Повреждено состояние генератора: {error}')
+
+        self.seed, self.score, self.speed, self.ticks = (
+            seed, score, speed, ticks
+        )
+        self.rng.setstate(rng_state)
+        self._load_snake(body, length, direction, next_direction, turns)
+        self._load_entities(entities, cells, free_cells)
+
+    def fork(self):
+        """
+        Независимая копия партии для перебора вариантов продолжения.
+
+        Копируются только изменяемые части: тело змейки, позиции объектов,
+        индекс клеток и генератор. Профилировщик не копируется.
+
+        :rtype: GameState
+        """
+        other = copy.copy(self)
+        other.profiler = None
+        other.rng = random.Random()
+        other.rng.setstate(self.rng.getstate())
+
+        snake = other.snake = copy.copy(self.snake)
+        snake.rng = other.rng
+        snake.positions = self.snake.positions.copy()
+        snake.turns = self.snake.turns.copy()
+
+        other.cells = self.cells.copy()
+        other.entities = EntityGrid()
+        forks = {}
+        for entity in self.objects:
+            forked = forks[id(entity)] = copy.copy(entity)
+            forked.rng = other.rng
+            other.entities.add(forked)
+        other.apples = [forks[id(entity)] for entity in self.apples]
+        other.stones = [forks[id(entity)] for entity in self.stones]
+        other.another_apples = [
+            forks[id(entity)] for entity in self.another_apples
+        ]
+        other.apple = next(iter(other.apples), None)
+        other.stone = next(iter(other.stones), None)
+        other.another_apple = next(iter(other.another_apples), None)
+        other.objects = tuple(forks[id(entity)] for entity in self.objects)
+        other.freed_cells = list(self.freed_cells)
+        other.respawned = [forks[id(entity)] for entity in self.respawned]
+        return other
+
+    def _handle_collisions(self):
+        """Обрабатывает столкновения головы после движения змейки."""
+        snake = self.snake
+        head_position = snake.get_head_position()
+        entity = self.entities.at(head_position)
+        reward = 0.0
+        event = None
+
+        try:
+            if isinstance(entity, UninedibleApple):
+                if not handle_another_apple_collision(
+                    snake, entity, self.cells
+                ):
+                    return StepResult(GAME_OVER_REWARD, True, EVENT_GAME_OVER)
+                self.freed_cells.append(snake.last)
+                self._sync(entity.position, snake.last)
+                self.respawned.append(entity)
+                reward = ANOTHER_APPLE_REWARD
+                event = EVENT_ANOTHER_APPLE
+
+            elif isinstance(entity, Apple):
+                self.score, self.speed = handle_apple_collision(
+                    snake, entity, self.cells, self.score, self.speed
+                )
+                self._sync(entity.position)
+                self.respawned.append(entity)
+                reward = APPLE_REWARD
+                event = EVENT_APPLE
+        except BoardFullError:
+            # Объекту некуда появиться: змейка заняла всё поле.
+            return StepResult(APPLE_REWARD, True, EVENT_BOARD_FULL)
+
+        # Проверка условий завершения игры: голова сама занимает свою
+        # клетку, поэтому второй сегмент в ней означает столкновение.
+        if snake.positions.count(head_position) > 1 or isinstance(
+            entity, Stone
+        ):
+            return StepResult(GAME_OVER_REWARD, True, EVENT_GAME_OVER)
+
+        return StepResult(reward, False, event)
+
+    def _load_snake(self, body, length, direction, next_direction, turns):
+        """Восстанавливает змейку по данным снимка."""
+        snake = self.snake
+        snake.positions = SnakeBody.from_array(body)
+        snake.length = length
+        snake.last = None
+        snake.direction = DIRECTIONS[direction]
+        snake.next_direction = (
+            None if next_direction == _NO_DIRECTION
+            else DIRECTIONS[next_direction]
+        )
+        snake.turns.clear()
+        snake.turns.extend(DIRECTIONS[turn] for turn in turns)
+
+    def _load_entities(self, entities, cells, free_cells):
+        """Расставляет объекты и строит индекс клеток по данным снимка."""
+        self.entities = EntityGrid()
+        for entity, cell in zip(entities, cells):
+            entity.grid = None
+            entity.position = cell
+            self.entities.add(entity)
+        if isinstance(self.cells, SparseCellIndex):
+            self.cells = SparseCellIndex(
+                (*self.snake.positions, *(
+                    entity.position for entity in entities
+                ))
+            )
+        else:
+            self.cells = CellIndex.from_array(free_cells)
+        self.freed_cells = []
+        self.respawned = []
+
+    def _sync(self, *positions):
+        """Приводит индекс свободных клеток в соответствие с полем."""
+        occupied_positions = self.occupied_positions()
+        for position in positions:
+            if position in occupied_positions:
+                self.cells.occupy(position)
+            else:
+                self.cells.release(position)
+
+
+class FixedTimestep:
+    """
+    Планировщик игровых тиков с фиксированным шагом по времени.
+
+    Время между кадрами копится в аккумуляторе и расходуется целыми
+    тиками длительностью `1000 / rate` мс. Частота игры не зависит от
+    частоты кадров: медленный кадр догоняется несколькими тиками подряд,
+    но не больше `max_steps` за кадр, остаток отставания отбрасывается.
+
+    :param max_steps: Наибольшее число тиков за один кадр
+    :type max_steps: int
+    :param accumulator: Накопленное и ещё не отыгранное время, мс
+    :type accumulator: float
+    """
+
+    def __init__(self, max_steps=MAX_CATCH_UP_TICKS):
+        """Метод инициализации планировщика."""
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+        self._steps = 0
+
+    def add(self, elapsed_ms):
+        """Добавляет время, прошедшее с прошлого кадра."""
+        self.accumulator += elapsed_ms
+        self._steps = 0
+
+    def consume(self, rate):
+        """
+        Расходует время одного тика, если оно накоплено.
+
+        :param rate: Текущая скорость игры, тиков в секунду
+        :type rate: int
+        :return: Нужно ли выполнить ещё один тик в этом кадре
+        :rtype: bool
+        """
+        step_ms = 1000 / rate
+        if self.accumulator < step_ms:
+            return False
+        if self._steps >= self.max_steps:
+            self.accumulator %= step_ms
+            return False
+        self.accumulator -= step_ms
+        self._steps += 1
+        return True
@@ -0,0 +1,189 @@
+"""Среда для обучения с подкреплением поверх правил `GameState`.
+
+Интерфейс повторяет привычный для таких сред: `reset(seed)` начинает
+партию и возвращает наблюдение, `step(action)` возвращает наблюдение,
+награду, признак конца партии и словарь подробностей, `render()` - картинку
+поля. Наблюдение - массив NumPy из нескольких слоёв размером с поле: тело
+змейки, голова, яблоки, несъедобные яблоки и камни. За тик меняются лишь
+несколько клеток (новая голова, освобождённый хвост, появившиеся на новых
+местах объекты), поэтому наблюдение не строится заново, а дописывается
+в этих клетках.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from snake_batch import NO_ACTION
+from snake_core import (
+    ANOTHER_APPLE_COLOR,
+    APPLE_COLOR,
+    BOARD_BACKGROUND_COLOR,
+    BOARD_HEIGHT,
+    BOARD_WIDTH,
+    DIRECTIONS,
+    SNAKE_COLOR,
+    STONE_COLOR,
+    Apple,
+    GameState,
+    Stone,
+    UninedibleApple,
+)
+
+# Слои наблюдения:
+CHANNEL_BODY = 0
+CHANNEL_HEAD = 1
+CHANNEL_APPLE = 2
+CHANNEL_ANOTHER_APPLE = 3
+CHANNEL_STONE = 4
+OBSERVATION_CHANNELS = 5
+
+# Слой наблюдения для каждого вида объектов поля:
+_ENTITY_CHANNELS = {
+    Apple: CHANNEL_APPLE,
+    UninedibleApple: CHANNEL_ANOTHER_APPLE,
+    Stone: CHANNEL_STONE,
+}
+
+# Цвета слоёв в картинке `render`: слои ниже по списку рисуются поверх.
+_RENDER_COLORS = (
+    (CHANNEL_APPLE, APPLE_COLOR),
+    (CHANNEL_ANOTHER_APPLE, ANOTHER_APPLE_COLOR),
+    (CHANNEL_STONE, STONE_COLOR),
+    (CHANNEL_BODY, SNAKE_COLOR),
+)
+
+EnvStepResult = namedtuple(
+    'EnvStepResult', ('observation', 'reward', 'done', 'info')
+)
+
+
+class SnakeEnv:
+    """
+    Одна партия Змейки с наблюдением в виде слоёв NumPy.
+
+    Наблюдение имеет форму `(OBSERVATION_CHANNELS, BOARD_HEIGHT,
+    BOARD_WIDTH)` и тип uint8: единица в слое означает, что в клетке есть
+    сегмент змейки (слой тела включает и голову), голова или объект
+    соответствующего вида. Среда возвращает один и тот же массив, который
+    меняется на месте при каждом шаге, - чтобы сохранить наблюдение,
+    его нужно скопировать.
+
+    :param state: Состояние партии
+    :type state: GameState
+    :param observation: Текущее наблюдение
+    :type observation: numpy.ndarray
+    """
+
+    def __init__(self, seed=None, apples=1, stones=1, another_apples=1):
+        """Метод инициализации среды."""
+        self.state = GameState(
+            seed, apples=apples, stones=stones, another_apples=another_apples
+        )
+        self.observation = np.zeros(
+            (OBSERVATION_CHANNELS, BOARD_HEIGHT, BOARD_WIDTH), dtype=np.uint8
+        )
+        # Те же данные, что у наблюдения, с клетками по номерам. Отдельные
+        # клетки пишутся через memoryview: запись элемента массива NumPy
+        # из Python в несколько раз медленнее.
+        self._cells = self.observation.reshape(OBSERVATION_CHANNELS, -1)
+        self._view = memoryview(self.observation.reshape(-1))
+        self._offsets = tuple(
+            channel * BOARD_WIDTH * BOARD_HEIGHT
+            for channel in range(OBSERVATION_CHANNELS)
+        )
+        self._head = None
+        self._rebuild()
+
+    def reset(self, seed=None):
+        """
+        Начинает новую партию.
+
+        :param seed: Зерно партии. По умолчанию берётся из генератора
+        состояния
+        :type seed: NoneType | int
+        :return: Наблюдение
+        :rtype: numpy.ndarray
+        """
+        self.state.reset(seed)
+        self._rebuild()
+        return self.observation
+
+    def step(self, action=NO_ACTION):
+        """
+        Выполняет один игровой тик.
+
+        После конца партии перед следующим шагом нужно вызвать `reset`.
+
+        :param action: Номер направления из `DIRECTIONS` или `NO_ACTION`,
+        чтобы не менять направление
+        :type action: int
+        :return: Наблюдение, награда, признак конца партии и подробности:
+        событие шага, счёт, длина змейки и число тиков
+        :rtype: EnvStepResult
+        """
+        state = self.state
+        result = state.step(None if action < 0 else DIRECTIONS[action])
+
+        # Наблюдение дописывается только в клетках, изменившихся за шаг.
+        refresh = self._refresh
+        refresh(self._head)
+        for cell in state.freed_cells:
+            refresh(cell)
+        for entity in state.respawned:
+            refresh(entity.position)
+        self._head = state.snake.get_head_position()
+        refresh(self._head)
+
+        info = {
+            'event': result.event,
+            'score': state.score,
+            'length': state.snake.length,
+            'ticks': state.ticks,
+        }
+        return EnvStepResult(
+            self.observation, result.reward, result.done, info
+        )
+
+    def render(self, cell_size=1):
+        """
+        Картинка поля по наблюдению, без pygame.
+
+        :param cell_size: Сторона клетки в пикселях
+        :type cell_size: int
+        :return: Массив RGB формы `(высота, ширина, 3)`
+        :rtype: numpy.ndarray
+        """
+        image = np.empty((BOARD_HEIGHT, BOARD_WIDTH, 3), dtype=np.uint8)
+        image[:] = BOARD_BACKGROUND_COLOR
+        for channel, color in _RENDER_COLORS:
+            image[self.observation[channel] > 0] = color
+        if cell_size > 1:
+            image = image.repeat(cell_size, axis=0).repeat(cell_size, axis=1)
+        return image
+
+    def _rebuild(self):
+        """Строит наблюдение заново, после начала партии."""
+        state = self.state
+        cells = self._cells
+        cells[:] = 0
+        cells[CHANNEL_BODY, np.array(state.snake.positions.to_array())] = 1
+        for entity in state.objects:
+            cells[_ENTITY_CHANNELS[type(entity)], entity.position] = 1
+        self._head = state.snake.get_head_position()
+        cells[CHANNEL_HEAD, self._head] = 1
+
+    def _refresh(self, cell):
+        """Приводит все слои одной клетки в соответствие с полем."""
+        state = self.state
+        view = self._view
+        offsets = self._offsets
+        for offset in offsets:
+            view[offset + cell] = 0
+        if state.snake.occupies(cell):
+            view[offsets[CHANNEL_BODY] + cell] = 1
+            if cell == state.snake.get_head_position():
+                view[offsets[CHANNEL_HEAD] + cell] = 1
+        entity = state.entities.at(cell)
+        if entity is not None:
+            view[offsets[_ENTITY_CHANNELS[type(entity)]] + cell] = 1
@@ -0,0 +1,288 @@
+"""Массовый прогон партий без окна на всех ядрах процессора.
+
+Партии раздаются пулу процессов пачками, каждая партия получает своё
+зерно, результаты возвращаются по мере готовности и сливаются в общую
+статистику распределений счёта и длины.
+
+Запуск из командной строки::
+
+    python snake_farm.py --games 100000 --policy greedy
+"""
+
+import argparse
+import multiprocessing
+import random
+from collections import Counter, namedtuple
+
+from snake_autopilot import Autopilot
+from snake_core import (
+    DIRECTIONS,
+    BOARD_HEIGHT,
+    BOARD_WIDTH,
+    EVENT_GAME_OVER,
+    GameState,
+    Stone,
+    UninedibleApple,
+    cell_coordinates,
+    neighbor_position,
+)
+
+# Ограничение длины одной партии в тиках, чтобы зациклившаяся политика
+# не занимала процесс бесконечно:
+FARM_MAX_TICKS = 10_000
+
+# Сколько партий отправляется процессу за один раз:
+FARM_CHUNK_SIZE = 64
+
+GameResult = namedtuple(
+    'GameResult', ('seed', 'score', 'length', 'ticks', 'event')
+)
+
+
+class RandomPolicy:
+    """
+    Политика, выбирающая случайное направление каждый тик.
+
+    У политики свой генератор, который в первом тике партии засевается
+    её зерном. Генератор игры, по которому появляются объекты, политика
+    не трогает, поэтому партия повторяется по записанным действиям, а
+    разные политики на одном зерне получают одни и те же поля.
+    """
+
+    def __init__(self):
+        """Метод инициализации политики."""
+        self.rng = random.Random()
+
+    def __call__(self, state):
+        """Возвращает случайное направление."""
+        if state.ticks == 0:
+            self.rng.seed(state.seed)
+        return self.rng.choice(DIRECTIONS)
+
+
+random_policy = RandomPolicy()
+
+
+def _wrapped_distance(first, second, size):
+    """Расстояние по одной оси на поле, замкнутом по краям."""
+    distance = abs(first - second) % size
+    return min(distance, size - distance)
+
+
+def greedy_policy(state):
+    """
+    Политика, двигающаяся к яблоку по безопасным клеткам.
+
+    Из направлений, не ведущих назад, в тело змейки, камни и
+    несъедобные яблоки, выбирается ближайшее к первому яблоку. Если
+    безопасных ходов нет, направление не меняется.
+    """
+    snake = state.snake
+    head = snake.get_head_position()
+    tail = snake.positions[-1]
+    apple_x, apple_y = cell_coordinates(state.apple.position)
+    dx, dy = snake.direction
+    reverse = (-dx, -dy)
+
+    best_direction = None
+    best_distance = None
+    for direction in DIRECTIONS:
+        if direction == reverse:
+            continue
+        position = neighbor_position(head, direction)
+        if isinstance(state.entities.at(position), (Stone, UninedibleApple)):
+            continue
+        if snake.occupies(position) and (
+            position != tail or len(snake.positions) < snake.length
+        ):
+            continue
+        x, y = cell_coordinates(position)
+        distance = (
+            _wrapped_distance(x, apple_x, BOARD_WIDTH)
+            + _wrapped_distance(y, apple_y, BOARD_HEIGHT)
+        )
+        if best_distance is None or distance < best_distance:
+            best_direction, best_distance = direction, distance
+    return best_direction
+
+
+POLICIES = {
+    'random': random_policy,
+    'greedy': greedy_policy,
+    'autopilot': Autopilot(),
+}
+
+
+def play_game(seed, policy=greedy_policy, max_ticks=FARM_MAX_TICKS):
+    """
+    Играет одну партию без окна.
+
+    :param seed: Зерно партии
+    :type seed: int
+    :param policy: Функция, возвращающая по состоянию игры направление
+    из `DIRECTIONS` или None
+    :type policy: Callable[[GameState], NoneType | tuple]
+    :param max_ticks: Наибольшая длительность партии в тиках
+    :type max_ticks: int
+    :rtype: GameResult
+    """
+    state = GameState(seed)
+    event = None
+    while state.ticks < max_ticks:
+        result = state.step(policy(state))
+        if result.done:
+            event = result.event
+            break
+    return GameResult(
+        seed, state.score, state.snake.length, state.ticks, event
+    )
+
+
+class FarmStats:
+    """
+    Сводная статистика партий, пополняемая по мере поступления.
+
+    :param games: Количество партий
+    :type games: int
+    :param ticks: Суммарное количество тиков
+    :type ticks: int
+    :param scores: Распределение счёта: счёт и число партий с ним
+    :type scores: collections.Counter
+    :param lengths: Распределение длины змейки в конце партии
+    :type lengths: collections.Counter
+    :param events: Чем заканчивались партии
+    :type events: collections.Counter
+    """
+
+    def __init__(self):
+        """Метод инициализации статистики."""
+        self.games = 0
+        self.ticks = 0
+        self.scores = Counter()
+        self.lengths = Counter()
+        self.events = Counter()
+
+    def add(self, result):
+        """Добавляет результат одной партии."""
+        self.games += 1
+        self.ticks += result.ticks
+        self.scores[result.score] += 1
+        self.lengths[result.length] += 1
+        self.events[result.event] += 1
+
+    def merge(self, other):
+        """Добавляет статистику другой фермы."""
+        self.games += other.games
+        self.ticks += other.ticks
+        self.scores.update(other.scores)
+        self.lengths.update(other.lengths)
+        self.events.update(other.events)
+
+    @property
+    def mean_score(self):
+        """Средний счёт партии."""
+        if not self.games:
+            return 0.0
+        return sum(
+            score * count for score, count in self.scores.items()
+        ) / self.games
+
+    def score_percentile(self, percent):
+        """Счёт, не превышаемый заданной долей партий."""
+        return _percentile(self.scores, self.games, percent)
+
+    def length_percentile(self, percent):
+        """Длина змейки, не превышаемая заданной долей партий."""
+        return _percentile(self.lengths, self.games, percent)
+
+    def summary(self):
+        """Краткая текстовая сводка."""
+        return (
+            f'партий: {self.games}, тиков: {self.ticks}, '
+            f'средний счёт: {self.mean_score:.2f}, '
+            f'p50/p99 счёта: {self.score_percentile(50)}/'
+            f'{self.score_percentile(99)}, '
+            f'максимум: {max(self.scores, default=None)}, '
+            f'поражений: {self.events[EVENT_GAME_OVER]}'
+        )
+
+
+def _percentile(distribution, total, percent):
+    """Процентиль распределения, заданного счётчиком значений."""
+    if not total:
+        return None
+    rank = min(int(total * percent / 100), total - 1)
+    for value in sorted(distribution):
+        rank -= distribution[value]
+        if rank < 0:
+            return value
+
+
+def _play_chunk(task):
+    """Играет пачку партий в процессе пула."""
+    seeds, policy, max_ticks = task
+    if isinstance(policy, str):
+        policy = POLICIES[policy]
+    return [play_game(seed, policy, max_ticks) for seed in seeds]
+
+
+def run_farm(num_games, policy='greedy', seed=0, workers=None,
+             max_ticks=FARM_MAX_TICKS, chunk_size=FARM_CHUNK_SIZE,
+             on_result=None):
+    """
+    Играет множество партий в пуле процессов.
+
+    :param num_games: Количество партий
+    :type num_games: int
+    :param policy: Имя политики из `POLICIES` или функция уровня модуля,
+    которую можно передать в другой процесс
+    :type policy: str | Callable[[GameState], NoneType | tuple]
+    :param seed: Зерно первой партии, остальные получают следующие зёрна
+    :type seed: int
+    :param workers: Количество процессов, по умолчанию - по числу ядер
+    :type workers: NoneType | int
+    :param max_ticks: Наибольшая длительность партии в тиках
+    :type max_ticks: int
+    :param chunk_size: Сколько партий отправляется процессу за раз
+    :type chunk_size: int
+    :param on_result: Вызывается для каждого результата по мере готовности
+    :type on_result: NoneType | Callable[[GameResult], None]
+    :rtype: FarmStats
+    """
+    tasks = (
+        (range(start, min(start + chunk_size, seed + num_games)),
+         policy, max_ticks)
+        for start in range(seed, seed + num_games, chunk_size)
+    )
+    stats = FarmStats()
+    # Процессы запускаются заново, а не копией текущего: копия процесса,
+    # успевшего запустить потоки (например, pygame), может зависнуть.
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(workers) as pool:
+        for results in pool.imap_unordered(_play_chunk, tasks):
+            for result in results:
+                stats.add(result)
+                if on_result is not None:
+                    on_result(result)
+    return stats
+
+
+def main():
+    """Запуск фермы из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--policy', choices=sorted(POLICIES),
+                        default='greedy')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--max-ticks', type=int, default=FARM_MAX_TICKS)
+    args = parser.parse_args()
+
+    stats = run_farm(
+        args.games, args.policy, args.seed, args.workers, args.max_ticks
+    )
+    print(stats.summary())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""Замеры фаз игрового кадра в гистограммах задержек.
+
+Профилировщик отмечает концы фаз кадра вызовами `mark`: время с прошлой
+отметки попадает в гистограмму фазы. Гистограммы логарифмические, с
+восемью корзинами на каждое удвоение времени, поэтому запись - это
+несколько целочисленных операций, а процентили считаются с точностью
+до 12.5%.
+"""
+
+import csv
+import json
+import time
+
+# Корзин на каждое удвоение времени:
+_SUB_BUCKETS = 8
+
+# Интервал записи отчёта в файл по умолчанию, секунд:
+PROFILE_DUMP_INTERVAL = 5.0
+
+# Имя, под которым записывается длительность кадра целиком:
+FRAME_PHASE = 'frame'
+
+
+def _bucket_index(value):
+    """Номер корзины для значения в наносекундах."""
+    if value < _SUB_BUCKETS:
+        return value
+    exponent = value.bit_length() - 1
+    mantissa = (value >> (exponent - 3)) & (_SUB_BUCKETS - 1)
+    return (exponent - 2) * _SUB_BUCKETS + mantissa
+
+
+def _bucket_value(index):
+    """Нижняя граница корзины в наносекундах."""
+    if index < _SUB_BUCKETS:
+        return index
+    exponent, mantissa = divmod(index, _SUB_BUCKETS)
+    return (_SUB_BUCKETS + mantissa) << (exponent - 1)
+
+
+class LatencyHistogram:
+    """
+    Гистограмма задержек с логарифмическими корзинами.
+
+    :param count: Количество записанных значений
+    :type count: int
+    :param max: Наибольшее записанное значение, нс
+    :type max: int
+    """
+
+    def __init__(self):
+        """Метод инициализации гистограммы."""
+        self.counts = [0] * (64 * _SUB_BUCKETS)
+        self.count = 0
+        self.max = 0
+
+    def record(self, value):
+        """Записывает значение в наносекундах."""
+        self.counts[_bucket_index(value)] += 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """Значение, не превышаемое заданной долей записей, нс."""
+        if not self.count:
+            return 0
+        rank = min(int(self.count * percent / 100), self.count - 1)
+        for index, count in enumerate(self.counts):
+            rank -= count
+            if rank < 0:
+                return min(_bucket_value(index), self.max)
+        return self.max
+
+
+class FrameProfiler:
+    """
+    Профилировщик фаз кадра с подсчётом пропущенных сроков кадра.
+
+    :param budget_ms: Бюджет времени кадра, мс. Кадр, работа которого
+    длилась дольше, считается пропустившим срок
+    :type budget_ms: float
+    :param dump_path: Файл отчёта, `.json` или `.csv`, или None
+    :type dump_path: NoneType | str
+    :param dump_interval: Интервал записи отчёта, секунд
+    :type dump_interval: float
+    :param writer: Фоновый поток записи `BackgroundWriter` или None. Если
+    задан, сводка снимается в кадре, а файл пишется в фоновом потоке
+    :type writer: NoneType | snake_writer.BackgroundWriter
+    :param histograms: Гистограммы фаз по именам
+    :type histograms: dict[str, LatencyHistogram]
+    :param frames: Количество кадров
+    :type frames: int
+    :param missed_frames: Количество кадров, превысивших бюджет
+    :type missed_frames: int
+    """
+
+    def __init__(self, budget_ms, dump_path=None,
+                 dump_interval=PROFILE_DUMP_INTERVAL, writer=None):
+        """Метод инициализации профилировщика."""
+        self.writer = writer
+        self.budget_ns = int(budget_ms * 1e6)
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self.histograms = {}
+        self.frames = 0
+        self.missed_frames = 0
+        self._frame_start = self._last = time.perf_counter_ns()
+        self._last_dump = time.monotonic()
+
+    def start_frame(self):
+        """Отмечает начало работы кадра."""
+        self._frame_start = self._last = time.perf_counter_ns()
+
+    def mark(self, phase):
+        """Записывает время с прошлой отметки как длительность фазы."""
+        now = time.perf_counter_ns()
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = LatencyHistogram()
+        histogram.record(now - self._last)
+        self._last = now
+
+    def end_frame(self):
+        """Отмечает конец кадра и при необходимости пишет отчёт."""
+        self._last = self._frame_start
+        self.mark(FRAME_PHASE)
+        self.frames += 1
+        if self._last - self._frame_start > self.budget_ns:
+            self.missed_frames += 1
+        if (self.dump_path is not None
+                and time.monotonic() - self._last_dump >= self.dump_interval):
+            if self.writer is None:
+                self.dump()
+            else:
+                # Гистограммы меняются каждый кадр, поэтому в поток
+                # передаётся уже готовая сводка.
+                self._last_dump = time.monotonic()
+                self.writer.submit(self._write_report, self.report())
+
+    def report(self):
+        """
+        Сводка по фазам: количество, p50, p99 и максимум в миллисекундах.
+
+        :rtype: dict
+        """
+        phases = {
+            phase: {
+                'count': histogram.count,
+                'p50_ms': histogram.percentile(50) / 1e6,
+                'p99_ms': histogram.percentile(99) / 1e6,
+                'max_ms': histogram.max / 1e6,
+            }
+            for phase, histogram in self.histograms.items()
+        }
+        return {
+            'frames': self.frames,
+            'missed_frames': self.missed_frames,
+            'phases': phases,
+        }
+
+    def dump(self, path=None):
+        """Записывает сводку в файл JSON или CSV по расширению имени."""
+        self._write_report(self.report(), path)
+        self._last_dump = time.monotonic()
+
+    def _write_report(self, report, path=None):
+        """Записывает готовую сводку в файл."""
+        path = path or self.dump_path
+        with open(path, 'w', encoding='utf-8', newline='') as file:
+            if str(path).endswith('.csv'):
+                writer = csv.writer(file)
+                writer.writerow(
+                    ('phase', 'count', 'p50_ms', 'p99_ms', 'max_ms')
+                )
+                for phase, stats in report['phases'].items():
+                    writer.writerow((phase, *stats.values()))
+                writer.writerow(('missed_frames', report['missed_frames']))
+            else:
+                json.dump(report, file, indent=2)
+
+
+class NullProfiler:
+    """Профилировщик-заглушка: отметки ничего не делают."""
+
+    def start_frame(self):
+        """Ничего не делает."""
+
+    def mark(self, phase):
+        """Ничего не делает."""
+
+    def end_frame(self):
+        """Ничего не делает."""
+
+    def dump(self, path=None):
+        """Ничего не делает."""
@@ -0,0 +1,250 @@
+"""Запись кадров игры в поток RGB или последовательность PNG.
+
+Кадр снимается с поверхности окна одним копированием её буфера пикселей
+в заранее выделенный слот, без обхода пикселей и без `pg.image.save`
+в игровом цикле. Слоты передаются через ограниченную очередь фоновому
+потоку, который переставляет каналы в RGB и пишет кадры на диск. Если
+поток не успевает и свободных слотов нет, кадр пропускается, а игровой
+цикл не ждёт диска.
+
+Сырой поток RGB можно собрать в видео, например::
+
+    ffmpeg -f rawvideo -pix_fmt rgb24 -s 640x480 -r 60 -i game.rgb game.mp4
+"""
+
+import queue
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
+# Форматы записи: сырой поток RGB в одном файле или каталог PNG:
+RECORD_FORMAT_RAW = 'raw'
+RECORD_FORMAT_PNG = 'png'
+
+# Расширения файла, по которым выбирается сырой поток:
+RAW_SUFFIXES = ('.rgb', '.raw')
+
+# Сколько кадров может ждать записи, прежде чем новые начнут пропускаться:
+RECORD_QUEUE_FRAMES = 8
+
+# Как часто `capture` без пропуска кадров проверяет, жив ли поток записи,
+# пока ждёт свободного слота, секунд:
+RECORD_WAIT_CHECK = 0.1
+
+
+class FrameRecorder:
+    """
+    Запись кадров в фоновом потоке с пропуском кадров при отставании.
+
+    Размер и формат пикселей берутся с первого снятого кадра, все
+    следующие кадры должны быть с поверхности того же размера и формата.
+
+    :param path: Файл сырого потока RGB или каталог для PNG
+    :type path: pathlib.Path | str
+    :param record_format: `RECORD_FORMAT_RAW` или `RECORD_FORMAT_PNG`. По
+    умолчанию выбирается по расширению `path`
+    :type record_format: NoneType | str
+    :param queue_frames: Сколько кадров может ждать записи
+    :type queue_frames: int
+    :param drop_frames: Пропускать кадры, если запись отстаёт. Если False,
+    `capture` ждёт свободного слота - так записываются партии без окна,
+    где важен каждый кадр
+    :type drop_frames: bool
+    :param captured: Количество переданных кадров
+    :type captured: int
+    :param dropped: Количество пропущенных кадров
+    :type dropped: int
+    :param written: Количество записанных кадров
+    :type written: int
+    :param error: Ошибка, прекратившая запись кадров, или None
+    :type error: NoneType | Exception
+    """
+
+    def __init__(self, path, record_format=None,
+                 queue_frames=RECORD_QUEUE_FRAMES, drop_frames=True):
+        """Метод инициализации записи."""
+        self.path = Path(path)
+        if record_format is None:
+            record_format = (
+                RECORD_FORMAT_RAW if self.path.suffix in RAW_SUFFIXES
+                else RECORD_FORMAT_PNG
+            )
+        self.record_format = record_format
+        self.queue_frames = queue_frames
+        self.drop_frames = drop_frames
+        self.captured = self.dropped = self.written = 0
+        self.error = None
+        self._free = queue.Queue()
+        self._frames = queue.Queue()
+        self._layout = None
+        self._thread = None
+
+    def __enter__(self):
+        """Вход в контекст записи."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Дописывает кадры из очереди и завершает запись."""
+        self.close()
+
+    def capture(self, surface):
+        """
+        Снимает кадр с поверхности.
+
+        :param surface: Поверхность окна
+        :type surface: pygame.Surface
+        :return: Принят ли кадр в очередь на запись
+        :rtype: bool
+        :raises Exception: Ошибка, остановившая запись кадров
+        """
+        if self.error is not None:
+            raise self.error
+        if self._layout is None:
+            self._start(surface)
+        elif self._layout[:2] != (surface.get_size(), surface.get_pitch()):
+            raise ValueError('Размер кадра изменился во время записи.')
+        self.captured += 1
+        try:
+            slot = self._take_slot()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+        # Одно копирование буфера поверхности; пока на буфер есть ссылка,
+        # поверхность заблокирована, поэтому ссылка не сохраняется.
+        slot[:] = np.frombuffer(surface.get_buffer(), dtype=np.uint8)
+        self._frames.put(slot)
+        return True
+
+    def close(self):
+        """
+        Дописывает кадры из очереди и завершает фоновый поток.
+
+        :raises Exception: Ошибка, остановившая запись кадров
+        """
+        if self._thread is not None:
+            self._frames.put(None)
+            self._thread.join()
+            self._thread = None
+        if self.error is not None:
+            raise self.error
+
+    def _take_slot(self):
+        """
+        Берёт свободный слот, без пропуска кадров - дожидаясь его.
+
+        :raises queue.Empty: Если кадры пропускаются и слотов нет
+        :raises Exception: Если запись остановилась, пока слот ожидался
+        """
+        if self.drop_frames:
+            return self._free.get_nowait()
+        while True:
+            try:
+                return self._free.get(timeout=RECORD_WAIT_CHECK)
+            except queue.Empty:
+                pass
+            if self.error is not None:
+                raise self.error
+            if not self._thread.is_alive():
+                raise RuntimeError('Поток записи кадров остановился.')
+
+    def _start(self, surface):
+        """Выделяет слоты под формат поверхности и запускает поток."""
+        bytesize = surface.get_bytesize()
+        if bytesize not in (3, 4):
+            raise ValueError('Записываются только поверхности 24 и 32 бит.')
+        # Номер байта каждого канала RGB внутри пикселя.
+        channels = [shift // 8 for shift in surface.get_shifts()[:3]]
+        if sys.byteorder == 'big':
+            channels = [bytesize - 1 - channel for channel in channels]
+        self._layout = (
+            surface.get_size(), surface.get_pitch(), bytesize, channels
+        )
+        frame_bytes = surface.get_pitch() * surface.get_height()
+        for _ in range(self.queue_frames):
+            self._free.put(np.empty(frame_bytes, dtype=np.uint8))
+        if self.record_format == RECORD_FORMAT_PNG:
+            self.path.mkdir(parents=True, exist_ok=True)
+        self._thread = threading.Thread(
+            target=self._write_frames, name='frame-recorder', daemon=True
+        )
+        self._thread.start()
+
+    def _to_rgb(self, slot):
+        """Переставляет байты кадра в плотный массив RGB."""
+        (width, height), pitch, bytesize, channels = self._layout
+        pixels = slot.reshape(height, pitch)[:, :width * bytesize]
+        return np.ascontiguousarray(
+            pixels.reshape(height, width, bytesize)[:, :, channels]
+        )
+
+    def _write_frames(self):
+        """Фоновый поток: пишет кадры из очереди, пока не придёт None."""
+        output = None
+        try:
+            if self.record_format == RECORD_FORMAT_RAW:
+                output = open(self.path, 'wb')
+            while True:
+                slot = self._frames.get()
+                if slot is None:
+                    break
+                if self.error is not None:
+                    # После ошибки кадры только возвращаются в пул, чтобы
+                    # игровой цикл не остановился в ожидании слота.
+                    self._free.put(slot)
+                    continue
+                try:
+                    self._write_slot(output, slot)
+                except Exception as error:
+                    self.error = error
+        except Exception as error:
+            self.error = error
+            self._drain()
+        finally:
+            if output is not None:
+                output.close()
+
+    def _write_slot(self, output, slot):
+        """Записывает кадр из слота и возвращает слот в пул."""
+        try:
+            rgb = self._to_rgb(slot)
+        finally:
+            # Слот свободен сразу после перестановки каналов.
+            self._free.put(slot)
+        self._write(output, rgb)
+        self.written += 1
+
+    def _drain(self):
+        """Возвращает слоты из очереди, пока не придёт None."""
+        while True:
+            slot = self._frames.get()
+            if slot is None:
+                return
+            self._free.put(slot)
+
+    def _write(self, output, rgb):
+        """Записывает один кадр RGB."""
+        if output is not None:
+            output.write(rgb.data)
+            return
+        import pygame as pg
+
+        height, width = rgb.shape[:2]
+        image = pg.image.frombuffer(rgb.data, (width, height), 'RGB')
+        pg.image.save(image, str(self.path / f'frame_{self.written:06d}.png'))
+
+
+class NullRecorder:
+    """Запись-заглушка: кадры не снимаются."""
+
+    def __enter__(self):
+        """Вход в контекст записи."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Ничего не делает."""
+
+    def capture(self, surface):
+        """Ничего не делает."""
+        return False
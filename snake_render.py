@@ -0,0 +1,579 @@
+"""Отрисовка состояния игры на поверхности pygame.
+
+Игровая логика хранит клетки номерами, в пиксели они переводятся только
+здесь, при выводе клеток на поверхность.
+"""
+
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pygame as pg
+
+from snake_core import (
+    BOARD_BACKGROUND_COLOR,
+    BOARD_HEIGHT,
+    BOARD_PIXEL_HEIGHT,
+    BOARD_PIXEL_WIDTH,
+    BOARD_WIDTH,
+    BORDER_COLOR,
+    GRID_SIZE,
+    cell_coordinates,
+    cell_pixels,
+)
+
+# Как часто обновляется текст панели профилировщика, секунд:
+OVERLAY_REFRESH_INTERVAL = 0.5
+
+# Цвет текста панели профилировщика:
+OVERLAY_TEXT_COLOR = (255, 255, 255)
+
+# Сторона квадратного куска большого поля, клеток:
+CHUNK_CELLS = 16
+
+# Наименьшая сторона клетки в окне, пикселей, при которой масштабирующий
+# рендерер рисует рамки клеток:
+MIN_BORDER_CELL_SIZE = 4
+
+
+class TileCache:
+    """
+    Кэш заранее отрисованных клеток поля.
+
+    Для каждого цвета один раз рисуется клетка с рамкой `BORDER_COLOR`,
+    после чего клетки копируются на поле через `blit` вместо построения
+    прямоугольника и двух вызовов `pg.draw.rect`. Кэш сбрасывается при
+    смене размера клетки или цвета рамки.
+
+    :param surface: Поверхность, в формате которой создаются клетки
+    :type surface: pygame.Surface
+    :param cell_size: Размер клетки в пикселях
+    :type cell_size: int
+    :param border_color: Цвет рамки клетки
+    :type border_color: tuple
+    """
+
+    def __init__(self, surface, cell_size=GRID_SIZE,
+                 border_color=BORDER_COLOR):
+        """Метод инициализации кэша."""
+        self.surface = surface
+        self._tiles = {}
+        self._cell_size = cell_size
+        self._border_color = border_color
+
+    @property
+    def cell_size(self):
+        """Размер клетки в пикселях."""
+        return self._cell_size
+
+    @cell_size.setter
+    def cell_size(self, value):
+        if value != self._cell_size:
+            self._cell_size = value
+            self._tiles.clear()
+
+    @property
+    def border_color(self):
+        """Цвет рамки клетки."""
+        return self._border_color
+
+    @border_color.setter
+    def border_color(self, value):
+        if value != self._border_color:
+            self._border_color = value
+            self._tiles.clear()
+
+    def tile(self, color):
+        """Возвращает клетку заданного цвета с рамкой."""
+        tile = self._tiles.get(color)
+        if tile is None:
+            tile = self._tiles[color] = self._render(color, border=True)
+        return tile
+
+    def background(self):
+        """Возвращает клетку цвета фона без рамки."""
+        key = (None, BOARD_BACKGROUND_COLOR)
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile = self._tiles[key] = self._render(
+                BOARD_BACKGROUND_COLOR, border=False
+            )
+        return tile
+
+    def _render(self, color, border):
+        """Рисует одну клетку в формате целевой поверхности."""
+        size = self._cell_size
+        tile = pg.Surface((size, size), 0, self.surface)
+        tile.fill(color)
+        if border:
+            pg.draw.rect(tile, self._border_color, tile.get_rect(), 1)
+        return tile
+
+
+class Renderer:
+    """
+    Рендерер, перерисовывающий только изменившиеся за тик клетки.
+
+    За один тик меняются лишь новая голова, освобождённые змейкой клетки
+    и объекты, сменившие позицию, поэтому стоимость кадра не зависит от
+    длины змейки. На экран передаются только прямоугольники этих клеток.
+    Клетки берутся из `TileCache` и выводятся одним вызовом `blits`.
+
+    :param surface: Поверхность для отрисовки
+    :type surface: pygame.Surface
+    :param tiles: Кэш отрисованных клеток
+    :type tiles: TileCache
+    :param dirty_rects: Прямоугольники, изменённые с последнего вывода
+    на экран
+    :type dirty_rects: list[pygame.Rect]
+    """
+
+    def __init__(self, surface):
+        """Метод инициализации рендерера."""
+        self.surface = surface
+        self.tiles = TileCache(surface)
+        self.dirty_rects = []
+
+    def draw_full(self, state):
+        """Перерисовывает всё поле и выводит его на экран целиком."""
+        self.surface.fill(BOARD_BACKGROUND_COLOR)
+        tile = self.tiles.tile
+        snake_tile = tile(state.snake.body_color)
+        self.surface.blits(
+            [(tile(game_object.body_color), cell_pixels(game_object.position))
+             for game_object in state.objects]
+            + [(snake_tile, cell_pixels(position))
+               for position in state.snake.positions],
+            False
+        )
+        self.dirty_rects.clear()
+        pg.display.update()
+
+    def draw_step(self, state):
+        """
+        Перерисовывает клетки, изменившиеся за последний тик.
+
+        На экран изменения выводятся вызовом `flip`, один раз за кадр,
+        даже если за кадр прошло несколько тиков.
+        """
+        tile = self.tiles.tile
+        background = self.tiles.background()
+        snake = state.snake
+
+        # Сначала стираем след: на освободившейся клетке может оказаться
+        # голова или только что появившийся объект.
+        blit_sequence = [
+            (background, cell_pixels(position))
+            for position in state.freed_cells
+        ]
+        blit_sequence.append(
+            (tile(snake.body_color), cell_pixels(snake.get_head_position()))
+        )
+        blit_sequence.extend(
+            (tile(game_object.body_color), cell_pixels(game_object.position))
+            for game_object in state.respawned
+        )
+        self.dirty_rects.extend(self.surface.blits(blit_sequence))
+
+    def compose(self):
+        """Ничего не делает: клетки рисуются прямо в окне."""
+
+    def flip(self):
+        """Выводит на экран накопленные изменённые прямоугольники."""
+        pg.display.update(self.dirty_rects)
+        self.dirty_rects.clear()
+
+
+def _spans(start, length, world_size, chunk_size):
+    """
+    Делит отрезок мира на части, попадающие в отдельные куски.
+
+    Мир замкнут по краям, поэтому отрезок может переходить через край.
+
+    :return: Номер куска, смещение внутри куска, длина части и её
+    смещение от начала отрезка, в пикселях
+    :rtype: list[tuple[int, int, int, int]]
+    """
+    spans = []
+    offset = 0
+    length = min(length, world_size)
+    while offset < length:
+        position = (start + offset) % world_size
+        chunk, inner = divmod(position, chunk_size)
+        size = min(chunk_size - inner, world_size - position, length - offset)
+        spans.append((chunk, inner, size, offset))
+        offset += size
+    return spans
+
+
+class Camera:
+    """
+    Камера, показывающая часть поля вокруг головы змейки.
+
+    Если поле не больше окна по какой-либо оси, камера по этой оси не
+    сдвигается.
+
+    :param view_size: Размер окна в пикселях
+    :type view_size: tuple[int, int]
+    :param world_size: Размер поля в пикселях
+    :type world_size: tuple[int, int]
+    :param left: Координата поля, видимая у левого края окна
+    :type left: int
+    :param top: Координата поля, видимая у верхнего края окна
+    :type top: int
+    """
+
+    def __init__(self, view_size,
+                 world_size=(BOARD_PIXEL_WIDTH, BOARD_PIXEL_HEIGHT)):
+        """Метод инициализации камеры."""
+        self.view_width, self.view_height = view_size
+        self.world_width, self.world_height = world_size
+        self.left = self.top = 0
+
+    def follow(self, position):
+        """Ставит клетку с заданным номером в центр окна."""
+        x, y = cell_pixels(position)
+        if self.world_width > self.view_width:
+            self.left = (
+                x + GRID_SIZE // 2 - self.view_width // 2
+            ) % self.world_width
+        if self.world_height > self.view_height:
+            self.top = (
+                y + GRID_SIZE // 2 - self.view_height // 2
+            ) % self.world_height
+
+
+class ChunkRenderer:
+    """
+    Рендерер большого поля, рисующий только куски, видимые в окне.
+
+    Поле делится на квадратные куски по `CHUNK_CELLS` клеток. Кусок
+    рисуется на своей поверхности при первом попадании в окно и хранится
+    в кэше, а изменения за тик дорисовываются в уже готовые куски.
+    Кэш вмещает вдвое больше кусков, чем видно в окне, и вытесняет давно
+    не показанные, поэтому память и работа за кадр зависят от размера
+    окна, а не поля. Тики только дорисовывают куски, а окно собирается
+    из них один раз за кадр, в `compose` или `flip`, сколько бы тиков ни
+    прошло. Интерфейс совпадает с `Renderer`.
+
+    :param surface: Поверхность окна
+    :type surface: pygame.Surface
+    :param chunk_cells: Сторона куска, клеток
+    :type chunk_cells: int
+    :param world_size: Размер поля в пикселях
+    :type world_size: tuple[int, int]
+    :param camera: Камера, следующая за головой змейки
+    :type camera: Camera
+    :param tiles: Кэш отрисованных клеток
+    :type tiles: TileCache
+    :param dirty_rects: Прямоугольники, изменённые с последнего вывода
+    на экран
+    :type dirty_rects: list[pygame.Rect]
+    """
+
+    def __init__(self, surface, chunk_cells=CHUNK_CELLS,
+                 world_size=(BOARD_PIXEL_WIDTH, BOARD_PIXEL_HEIGHT)):
+        """Метод инициализации рендерера."""
+        self.surface = surface
+        self.camera = Camera(surface.get_size(), world_size)
+        self.tiles = TileCache(surface)
+        self.dirty_rects = []
+        self.chunk_size = chunk_cells * GRID_SIZE
+        view_width, view_height = surface.get_size()
+        self.capacity = 2 * (
+            (view_width // self.chunk_size + 2)
+            * (view_height // self.chunk_size + 2)
+        )
+        self._chunks = OrderedDict()
+        # Состояние, изменения которого дорисованы в куски, но ещё не
+        # собраны в окно:
+        self._pending = None
+
+    def draw_full(self, state):
+        """Сбрасывает кэш кусков и выводит видимую часть поля целиком."""
+        self._chunks.clear()
+        self._pending = None
+        self._compose(state)
+        self.dirty_rects.clear()
+        pg.display.update()
+
+    def draw_step(self, state):
+        """
+        Дорисовывает изменения тика в готовые куски.
+
+        Окно собирается и выводится на экран вызовом `flip`, один раз за
+        кадр.
+        """
+        tile = self.tiles.tile
+        background = self.tiles.background()
+        changes = [
+            (background, cell_pixels(position))
+            for position in state.freed_cells
+        ]
+        changes.append((
+            tile(state.snake.body_color),
+            cell_pixels(state.snake.get_head_position())
+        ))
+        changes.extend(
+            (tile(game_object.body_color), cell_pixels(game_object.position))
+            for game_object in state.respawned
+        )
+        size = self.chunk_size
+        for cell_tile, (x, y) in changes:
+            chunk = self._chunks.get((x // size, y // size))
+            if chunk is not None:
+                chunk.blit(cell_tile, (x % size, y % size))
+        self._pending = state
+
+    def compose(self):
+        """Собирает окно из кусков, если с прошлой сборки были тики."""
+        if self._pending is not None:
+            self._compose(self._pending)
+            self._pending = None
+
+    def flip(self):
+        """Собирает окно и выводит на экран изменённые прямоугольники."""
+        self.compose()
+        pg.display.update(self.dirty_rects)
+        self.dirty_rects.clear()
+
+    def _compose(self, state):
+        """Собирает окно из видимых кусков поля."""
+        camera = self.camera
+        camera.follow(state.snake.get_head_position())
+        size = self.chunk_size
+        columns = _spans(
+            camera.left, camera.view_width, camera.world_width, size
+        )
+        rows = _spans(
+            camera.top, camera.view_height, camera.world_height, size
+        )
+        self.surface.fill(BOARD_BACKGROUND_COLOR)
+        self.surface.blits(
+            [
+                (self._chunk(state, (column, row)), (x, y),
+                 (inner_x, inner_y, width, height))
+                for row, inner_y, height, y in rows
+                for column, inner_x, width, x in columns
+            ],
+            False
+        )
+        self.dirty_rects.append(self.surface.get_rect())
+
+    def _chunk(self, state, key):
+        """Возвращает кусок из кэша, рисуя его при промахе."""
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+            return chunk
+        chunk = self._chunks[key] = self._render_chunk(state, key)
+        if len(self._chunks) > self.capacity:
+            self._chunks.popitem(last=False)
+        return chunk
+
+    def _render_chunk(self, state, key):
+        """Рисует кусок поля с клетками змейки и объектов в нём."""
+        size = self.chunk_size
+        left, top = key[0] * size, key[1] * size
+        width = min(size, self.camera.world_width - left)
+        height = min(size, self.camera.world_height - top)
+        chunk = pg.Surface((width, height), 0, self.surface)
+        chunk.fill(BOARD_BACKGROUND_COLOR)
+
+        # Клетки куска проверяются по змейке и сетке объектов, поэтому
+        # стоимость не зависит ни от длины змейки, ни от числа объектов.
+        snake = state.snake
+        entity_at = state.entities.at
+        tile = self.tiles.tile
+        snake_tile = tile(snake.body_color)
+        blit_sequence = []
+        for y in range(0, height, GRID_SIZE):
+            row = (top + y) // GRID_SIZE * BOARD_WIDTH
+            for x in range(0, width, GRID_SIZE):
+                cell = row + (left + x) // GRID_SIZE
+                if snake.occupies(cell):
+                    blit_sequence.append((snake_tile, (x, y)))
+                    continue
+                entity = entity_at(cell)
+                if entity is not None:
+                    blit_sequence.append((tile(entity.body_color), (x, y)))
+        chunk.blits(blit_sequence, False)
+        return chunk
+
+
+class ScaledRenderer:
+    """
+    Рендерер, рисующий поле по пикселю на клетку и растягивающий его
+    на окно.
+
+    Поле хранится на маленькой поверхности размером с поле, пиксель на
+    клетку: за тик на ней перекрашиваются лишь клетки новой головы,
+    освобождённого хвоста и объектов, сменивших позицию, поэтому
+    стоимость тика не зависит от размера поля. Раз в кадр, в `compose`
+    или `flip`, поверхность растягивается на окно одним вызовом
+    `pg.transform.scale`, а рамки клеток накладываются заранее нарисованной
+    сеткой; эта работа зависит от размера окна. Рамки рисуются у всех
+    клеток, в том числе пустых, и только если окно вмещает целое число
+    клеток не меньше `MIN_BORDER_CELL_SIZE` пикселей. Интерфейс совпадает
+    с `Renderer`.
+
+    :param surface: Поверхность окна
+    :type surface: pygame.Surface
+    :param cells: Поверхность поля, пиксель на клетку
+    :type cells: pygame.Surface
+    :param dirty_rects: Прямоугольники, изменённые с последнего вывода
+    на экран
+    :type dirty_rects: list[pygame.Rect]
+    """
+
+    def __init__(self, surface):
+        """Метод инициализации рендерера."""
+        self.surface = surface
+        # Формат совпадает с окном, поэтому `scale` пишет прямо в окно.
+        self.cells = pg.Surface((BOARD_WIDTH, BOARD_HEIGHT), 0, surface)
+        self.dirty_rects = []
+        self._borders = self._render_borders()
+        self._changed = False
+
+    def draw_full(self, state):
+        """Перерисовывает всё поле и выводит его на экран целиком."""
+        pixels = np.empty((BOARD_WIDTH, BOARD_HEIGHT, 3), dtype=np.uint8)
+        pixels[:] = BOARD_BACKGROUND_COLOR
+        for game_object in state.objects:
+            pixels[cell_coordinates(game_object.position)] = (
+                game_object.body_color
+            )
+        body = np.array(state.snake.positions.to_array())
+        pixels[body % BOARD_WIDTH, body // BOARD_WIDTH] = (
+            state.snake.body_color
+        )
+        pg.surfarray.blit_array(self.cells, pixels)
+        self._compose()
+        self.dirty_rects.clear()
+        pg.display.update()
+
+    def draw_step(self, state):
+        """
+        Перекрашивает клетки, изменившиеся за последний тик.
+
+        Окно собирается и выводится на экран вызовом `flip`, один раз за
+        кадр.
+        """
+        set_at = self.cells.set_at
+        # Сначала стираем след: на освободившейся клетке может оказаться
+        # голова или только что появившийся объект.
+        for position in state.freed_cells:
+            set_at(cell_coordinates(position), BOARD_BACKGROUND_COLOR)
+        set_at(
+            cell_coordinates(state.snake.get_head_position()),
+            state.snake.body_color
+        )
+        for game_object in state.respawned:
+            set_at(
+                cell_coordinates(game_object.position), game_object.body_color
+            )
+        self._changed = True
+
+    def compose(self):
+        """Растягивает поле на окно, если с прошлой сборки были тики."""
+        if self._changed:
+            self._compose()
+
+    def flip(self):
+        """Собирает окно и выводит на экран изменённые прямоугольники."""
+        self.compose()
+        pg.display.update(self.dirty_rects)
+        self.dirty_rects.clear()
+
+    def _compose(self):
+        """Растягивает поле на окно и накладывает рамки клеток."""
+        pg.transform.scale(self.cells, self.surface.get_size(), self.surface)
+        if self._borders is not None:
+            self.surface.blit(self._borders, (0, 0))
+        self.dirty_rects.append(self.surface.get_rect())
+        self._changed = False
+
+    def _render_borders(self):
+        """Рисует сетку рамок клеток с прозрачным фоном или возвращает None."""
+        view_width, view_height = self.surface.get_size()
+        cell_width, rest_x = divmod(view_width, BOARD_WIDTH)
+        cell_height, rest_y = divmod(view_height, BOARD_HEIGHT)
+        if rest_x or rest_y or (
+            min(cell_width, cell_height) < MIN_BORDER_CELL_SIZE
+        ):
+            return None
+        borders = pg.Surface((view_width, view_height), 0, self.surface)
+        borders.fill(BOARD_BACKGROUND_COLOR)
+        borders.set_colorkey(BOARD_BACKGROUND_COLOR)
+        for y in range(0, view_height, cell_height):
+            for x in range(0, view_width, cell_width):
+                pg.draw.rect(
+                    borders, BORDER_COLOR, (x, y, cell_width, cell_height), 1
+                )
+        return borders
+
+
+class ProfileOverlay:
+    """
+    Панель со сводкой профилировщика поверх игрового поля.
+
+    Текст перерисовывается не чаще `refresh_interval`, а в каждом кадре
+    панель только копируется на поле и добавляется к изменённым
+    прямоугольникам рендерера.
+
+    :param profiler: Профилировщик кадра
+    :type profiler: snake_profile.FrameProfiler
+    :param position: Левый верхний угол панели
+    :type position: tuple
+    :param refresh_interval: Интервал обновления текста, секунд
+    :type refresh_interval: float
+    """
+
+    def __init__(self, profiler, position=(0, 0),
+                 refresh_interval=OVERLAY_REFRESH_INTERVAL):
+        """Метод инициализации панели."""
+        self.profiler = profiler
+        self.position = position
+        self.refresh_interval = refresh_interval
+        self._panel = None
+        self._updated = 0.0
+        self._font = None
+
+    def draw(self, renderer):
+        """Выводит панель на поле рендерера."""
+        now = time.monotonic()
+        if self._panel is None or now - self._updated >= self.refresh_interval:
+            self._panel = self._render()
+            self._updated = now
+        renderer.dirty_rects.append(
+            renderer.surface.blit(self._panel, self.position)
+        )
+
+    def _render(self):
+        """Рисует текст сводки на панели."""
+        if self._font is None:
+            self._font = pg.font.Font(None, 18)
+        report = self.profiler.report()
+        lines = [
+            f'frames {report["frames"]}  missed {report["missed_frames"]}'
+        ]
+        lines.extend(
+            f'{phase:16} p50 {stats["p50_ms"]:7.3f}  '
+            f'p99 {stats["p99_ms"]:7.3f}  max {stats["max_ms"]:7.3f} ms'
+            for phase, stats in report['phases'].items()
+        )
+        line_height = self._font.get_linesize()
+        width = max(self._font.size(line)[0] for line in lines)
+        # Панель только растёт, чтобы новая перекрывала старую целиком.
+        if self._panel is not None:
+            width = max(width, self._panel.get_width())
+        height = max(line_height * len(lines),
+                     0 if self._panel is None else self._panel.get_height())
+        panel = pg.Surface((width, height))
+        panel.fill(BOARD_BACKGROUND_COLOR)
+        for index, line in enumerate(lines):
+            panel.blit(
+                self._font.render(line, True, OVERLAY_TEXT_COLOR),
+                (0, index * line_height)
+            )
+        return panel
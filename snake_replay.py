@@ -0,0 +1,194 @@
+"""Компактные записи партий и их воспроизведение без окна.
+
+Партия полностью определяется зерном генератора, начальной клеткой
+головы и действиями игрока, поэтому запись хранит только их. Действия
+хранятся как смены направления: для каждой - число тиков с прошлой смены
+и номер направления, упакованные в одно целое переменной длины.
+
+Записи партий сохраняются вместе с результатами в базе `snake_scores`.
+Выгрузка записи из базы в файл для просмотра::
+
+    python snake_replay.py game.snkr --seed 12345
+"""
+
+import argparse
+import struct
+
+from snake_core import BOARD_HEIGHT, BOARD_WIDTH, DIRECTIONS, SEED_MASK
+from snake_core import GameState, cell_coordinates, cell_number
+from snake_scores import SCORE_DB_PATH, ScoreStore
+
+REPLAY_MAGIC = b'SNKR'
+REPLAY_VERSION = 1
+
+# Сигнатура, версия, зерно, размеры поля, клетка головы, число тиков.
+_HEADER = struct.Struct('<4sBIHHHHI')
+
+
+class ReplayError(ValueError):
+    """Данные не являются записью партии поддерживаемой версии."""
+
+
+def _write_varint(buffer, value):
+    """Дописывает неотрицательное целое в формате LEB128."""
+    while value > 0x7F:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varints(data, offset):
+    """Читает целые в формате LEB128 до конца данных."""
+    value = shift = 0
+    for byte in data[offset:]:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        yield value
+        value = shift = 0
+    if shift:
+        raise ReplayError('Запись партии обрывается посреди числа.')
+
+
+class Replay:
+    """
+    Запись одной партии: зерно, начальная голова и смены направления.
+
+    :param seed: Зерно партии
+    :type seed: int
+    :param head_position: Начальная клетка головы змейки
+    :type head_position: int
+    :param turns: Смены направления, номер тика и направление
+    :type turns: list[tuple[int, tuple]]
+    :param ticks: Длительность партии в тиках
+    :type ticks: int
+    """
+
+    def __init__(self, seed, head_position, turns=None, ticks=0):
+        """Метод инициализации записи."""
+        self.seed = seed
+        self.head_position = head_position
+        self.turns = [] if turns is None else turns
+        self.ticks = ticks
+
+    @classmethod
+    def start(cls, state):
+        """Начинает запись партии, только что начатой в `state`."""
+        return cls(state.seed, state.snake.get_head_position())
+
+    def record(self, action):
+        """Отмечает прошедший тик и действие, переданное в `step`."""
+        if action is not None:
+            self.turns.append((self.ticks, action))
+        self.ticks += 1
+
+    def to_bytes(self):
+        """Упаковывает запись в компактное двоичное представление."""
+        buffer = bytearray(_HEADER.pack(
+            REPLAY_MAGIC, REPLAY_VERSION, self.seed & SEED_MASK,
+            BOARD_WIDTH, BOARD_HEIGHT, *cell_coordinates(self.head_position),
+            self.ticks
+        ))
+        previous_tick = 0
+        for tick, direction in self.turns:
+            _write_varint(
+                buffer,
+                (tick - previous_tick) << 2 | DIRECTIONS.index(direction)
+            )
+            previous_tick = tick
+        return bytes(buffer)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Восстанавливает запись из двоичного представления.
+
+        :raises ReplayError: Если данные повреждены или записаны для поля
+        другого размера
+        """
+        try:
+            (magic, version, seed, width, height,
+             head_x, head_y, ticks) = _HEADER.unpack_from(data)
+        except struct.error as error:
+            raise ReplayError(f'Слишком короткая запись партии: {error}')
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ReplayError('Неизвестный формат записи партии.')
+        if (width, height) != (BOARD_WIDTH, BOARD_HEIGHT):
+            raise ReplayError(
+                f'Запись сделана для поля {width}x{height}, '
+                f'а текущее поле {BOARD_WIDTH}x{BOARD_HEIGHT}.'
+            )
+
+        turns = []
+        tick = 0
+        for value in _read_varints(data, _HEADER.size):
+            tick += value >> 2
+            turns.append((tick, DIRECTIONS[value & 3]))
+        return cls(seed, cell_number(head_x, head_y), turns, ticks)
+
+    def save(self, path):
+        """Сохраняет запись в файл."""
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        """Загружает запись из файла."""
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read())
+
+
+def play_replay(replay, on_step=None):
+    """
+    Заново проигрывает партию с максимальной скоростью.
+
+    :param replay: Запись партии
+    :type replay: Replay
+    :param on_step: Вызывается после каждого тика с состоянием и
+    результатом шага, например для отрисовки
+    :type on_step: NoneType | Callable[[GameState, StepResult], None]
+    :return: Состояние после последнего тика записи
+    :rtype: GameState
+    """
+    state = GameState(replay.seed, replay.head_position)
+    turns = iter(replay.turns)
+    next_turn = next(turns, None)
+    for tick in range(replay.ticks):
+        action = None
+        if next_turn is not None and next_turn[0] == tick:
+            action = next_turn[1]
+            next_turn = next(turns, None)
+        result = state.step(action)
+        if on_step is not None:
+            on_step(state, result)
+        if result.done:
+            break
+    return state
+
+
+def main():
+    """Выгрузка записи партии из базы результатов в файл."""
+    parser = argparse.ArgumentParser(
+        description='Выгрузка записи партии из базы результатов. По '
+        'умолчанию выгружается лучшая партия.'
+    )
+    parser.add_argument('output', help='файл записи, например game.snkr')
+    parser.add_argument('--db', default=SCORE_DB_PATH)
+    parser.add_argument('--id', type=int, default=None,
+                        help='номер результата в базе')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='зерно партии')
+    args = parser.parse_args()
+
+    with ScoreStore(args.db) as scores:
+        data = scores.replay(args.id, args.seed)
+    if data is None:
+        parser.exit(1, 'В базе нет подходящей записи партии.\n')
+    replay = Replay.from_bytes(data)
+    replay.save(args.output)
+    print(f'Зерно {replay.seed}, тиков {replay.ticks}: {args.output}')
+
+
+if __name__ == '__main__':
+    main()
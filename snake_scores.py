@@ -0,0 +1,292 @@
+"""Хранилище результатов игр на SQLite с пакетной записью."""
+
+import sqlite3
+import time
+import uuid
+from collections import Counter, namedtuple
+
+# Файл базы результатов по умолчанию:
+SCORE_DB_PATH = 'score_stats.sqlite3'
+
+# Сколько результатов копится в памяти перед записью на диск:
+SCORE_BATCH_SIZE = 256
+
+ScoreRecord = namedtuple(
+    'ScoreRecord',
+    ('session', 'score', 'length', 'ticks', 'duration', 'seed', 'timestamp',
+     'replay')
+)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    session TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    ticks INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    seed INTEGER,
+    timestamp REAL NOT NULL,
+    replay BLOB
+);
+CREATE INDEX IF NOT EXISTS scores_score ON scores (score);
+CREATE INDEX IF NOT EXISTS scores_session_score ON scores (session, score);
+CREATE TABLE IF NOT EXISTS score_counts (
+    session TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (session, score)
+);
+CREATE TABLE IF NOT EXISTS score_totals (
+    score INTEGER PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+'''
+
+# Сводки заполняются по уже записанным результатам, если их ещё нет:
+# например, в базе, созданной до появления сводок.
+_FILL_COUNTS = (
+    'INSERT INTO score_counts (session, score, count) '
+    'SELECT session, score, COUNT(*) FROM scores '
+    'WHERE NOT EXISTS (SELECT 1 FROM score_counts) '
+    'GROUP BY session, score'
+)
+_FILL_TOTALS = (
+    'INSERT INTO score_totals (score, count) '
+    'SELECT score, COUNT(*) FROM scores '
+    'WHERE NOT EXISTS (SELECT 1 FROM score_totals) '
+    'GROUP BY score'
+)
+
+_ADD_COUNT = (
+    'INSERT INTO score_counts (session, score, count) VALUES (?, ?, ?) '
+    'ON CONFLICT (session, score) DO UPDATE '
+    'SET count = count + excluded.count'
+)
+_ADD_TOTAL = (
+    'INSERT INTO score_totals (score, count) VALUES (?, ?) '
+    'ON CONFLICT (score) DO UPDATE SET count = count + excluded.count'
+)
+
+_INSERT = (
+    'INSERT INTO scores '
+    '(session, score, length, ticks, duration, seed, timestamp, replay) '
+    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+)
+
+
+class ScoreStore:
+    """
+    Хранилище результатов игр с индексами для таблицы рекордов.
+
+    Результаты копятся в памяти и записываются одной транзакцией, когда
+    их набирается `batch_size`, при запросе или при закрытии хранилища.
+    Запросы лучших результатов идут по индексу счёта и не сортируют всю
+    историю. Для процентилей в той же транзакции ведутся две сводки:
+    число партий с каждым счётом в каждой сессии и во всей истории, так
+    что процентиль считается по различным значениям счёта, а не по всем
+    партиям или сессиям. Файл базы
+    открывается при первой записи или запросе.
+
+    :param path: Путь к файлу базы или ':memory:'
+    :type path: str
+    :param session: Идентификатор сессии, по умолчанию - новый
+    :type session: NoneType | str
+    :param batch_size: Размер пакета записи
+    :type batch_size: int
+    """
+
+    def __init__(self, path=SCORE_DB_PATH, session=None,
+                 batch_size=SCORE_BATCH_SIZE):
+        """Метод инициализации хранилища."""
+        self.session = session or uuid.uuid4().hex
+        self.batch_size = batch_size
+        self.path = path
+        self._pending = []
+        self._connection = None
+
+    def __enter__(self):
+        """Вход в контекст хранилища."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Записывает накопленные результаты и закрывает базу."""
+        self.close()
+
+    def add(self, score, length, ticks, duration, seed=None,
+            timestamp=None, replay=None):
+        """
+        Добавляет результат партии в очередь на запись.
+
+        :param score: Счёт
+        :type score: int
+        :param length: Длина змейки в конце партии
+        :type length: int
+        :param ticks: Количество игровых тиков
+        :type ticks: int
+        :param duration: Длительность партии, секунд
+        :type duration: float
+        :param seed: Зерно генератора случайных чисел партии
+        :type seed: NoneType | int
+        :param timestamp: Время окончания партии, по умолчанию - текущее
+        :type timestamp: NoneType | float
+        :param replay: Запись партии `Replay.to_bytes`
+        :type replay: NoneType | bytes
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        self._pending.append(ScoreRecord(
+            self.session, score, length, ticks, duration, seed, timestamp,
+            replay
+        ))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Записывает накопленные результаты одной транзакцией."""
+        if not self._pending:
+            return
+        counts = Counter(
+            (record.session, record.score) for record in self._pending
+        )
+        connection = self._connect()
+        with connection:
+            connection.executemany(_INSERT, self._pending)
+            connection.executemany(_ADD_COUNT, (
+                (session, score, count)
+                for (session, score), count in counts.items()
+            ))
+            totals = Counter()
+            for (_, score), count in counts.items():
+                totals[score] += count
+            connection.executemany(_ADD_TOTAL, totals.items())
+        self._pending.clear()
+
+    def close(self):
+        """Записывает накопленные результаты и закрывает базу."""
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def count(self, session=None):
+        """Количество сохранённых результатов, всего или за сессию."""
+        where, params = self._where(session)
+        self.flush()
+        return self._connect().execute(
+            f'SELECT COUNT(*) FROM scores{where}', params
+        ).fetchone()[0]
+
+    def top(self, n=10, session=None):
+        """
+        Возвращает лучшие результаты по убыванию счёта.
+
+        :param n: Количество результатов
+        :type n: int
+        :param session: Сессия или None для всей истории
+        :type session: NoneType | str
+        :rtype: list[ScoreRecord]
+        """
+        where, params = self._where(session)
+        self.flush()
+        rows = self._connect().execute(
+            f'SELECT {", ".join(ScoreRecord._fields)} FROM scores{where} '
+            'ORDER BY score DESC LIMIT ?',
+            params + (n,)
+        )
+        return [ScoreRecord(*row) for row in rows]
+
+    def percentile(self, percent, session=None):
+        """
+        Возвращает счёт, не превышаемый заданной долей результатов.
+
+        :param percent: Процентиль от 0 до 100
+        :type percent: float
+        :param session: Сессия или None для всей истории
+        :type session: NoneType | str
+        :rtype: NoneType | int
+        """
+        self.flush()
+        if session is None:
+            query, params = (
+                'SELECT score, count FROM score_totals ORDER BY score', ()
+            )
+        else:
+            query, params = (
+                'SELECT score, count FROM score_counts WHERE session = ? '
+                'ORDER BY score',
+                (session,)
+            )
+        counts = self._connect().execute(query, params).fetchall()
+        total = sum(count for _, count in counts)
+        if not total:
+            return None
+        rank = min(int(total * percent / 100), total - 1)
+        for score, count in counts:
+            rank -= count
+            if rank < 0:
+                return score
+
+    def replay(self, record_id=None, seed=None):
+        """
+        Возвращает запись лучшей партии, подходящей под условия.
+
+        :param record_id: Номер результата в базе или None
+        :type record_id: NoneType | int
+        :param seed: Зерно партии или None
+        :type seed: NoneType | int
+        :return: Запись партии `Replay.to_bytes` или None, если партий с
+        записью не нашлось
+        :rtype: NoneType | bytes
+        """
+        conditions, params = ['replay IS NOT NULL'], ()
+        if record_id is not None:
+            conditions.append('id = ?')
+            params += (record_id,)
+        if seed is not None:
+            conditions.append('seed = ?')
+            params += (seed,)
+        self.flush()
+        row = self._connect().execute(
+            f'SELECT replay FROM scores WHERE {" AND ".join(conditions)} '
+            'ORDER BY score DESC LIMIT 1',
+            params
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def session_summary(self, session=None):
+        """
+        Возвращает количество партий, лучший и средний счёт сессии.
+
+        :param session: Сессия, по умолчанию - текущая
+        :type session: NoneType | str
+        :rtype: tuple[int, NoneType | int, NoneType | float]
+        """
+        self.flush()
+        return self._connect().execute(
+            'SELECT COUNT(*), MAX(score), AVG(score) FROM scores '
+            'WHERE session = ?',
+            (session or self.session,)
+        ).fetchone()
+
+    def _connect(self):
+        """Открывает базу и создаёт таблицу при первом обращении."""
+        if self._connection is None:
+            # База может открыться в фоновом потоке записи, а закрыться
+            # в основном после его завершения; одновременно с ней всегда
+            # работает только один поток.
+            self._connection = sqlite3.connect(
+                self.path, check_same_thread=False
+            )
+            self._connection.executescript(_SCHEMA)
+            with self._connection:
+                self._connection.execute(_FILL_COUNTS)
+                self._connection.execute(_FILL_TOTALS)
+        return self._connection
+
+    @staticmethod
+    def _where(session):
+        """Условие отбора по сессии для запроса."""
+        if session is None:
+            return '', ()
+        return ' WHERE session = ?', (session,)
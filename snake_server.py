@@ -0,0 +1,277 @@
+"""Сервер, ведущий множество партий в одном процессе на asyncio.
+
+Каждое подключение по TCP - отдельная партия на правилах `GameState`.
+Протокол строковый. Клиент присылает по строке на команду: `U`, `D`,
+`L`, `R` - поворот, `Q` - выход. Сервер присылает по строке JSON на
+сообщение: при подключении и после каждого проигрыша - полный снимок
+партии, а после каждого тика - только изменения: новую клетку головы,
+освободившиеся клетки и объекты, появившиеся на новых местах.
+Координаты передаются номерами клеток.
+
+Все партии продвигает один общий планировщик: он просыпается с частотой
+`SERVER_TICK_RATE` и отыгрывает каждой партии столько тиков, сколько
+требует её скорость.
+
+Запуск из командной строки::
+
+    python snake_server.py --port 8765
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+
+from snake_core import (
+    BOARD_HEIGHT,
+    BOARD_WIDTH,
+    DIRECTIONS,
+    FixedTimestep,
+    GameState,
+    Stone,
+    UninedibleApple,
+    cell_coordinates,
+)
+
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
+
+# Частота, с которой планировщик продвигает все партии, раз в секунду:
+SERVER_TICK_RATE = 60
+
+# Клиент, не успевающий читать и накопивший столько неотправленных
+# байт, отключается, чтобы не держать память сервера:
+MAX_WRITE_BUFFER = 64 * 1024
+
+# Команды поворота в порядке `DIRECTIONS`:
+TURN_COMMANDS = dict(zip((b'U', b'D', b'L', b'R'), DIRECTIONS))
+QUIT_COMMAND = b'Q'
+
+# Обозначения объектов в сообщениях:
+KIND_APPLE = 'a'
+KIND_ANOTHER_APPLE = 'x'
+KIND_STONE = 's'
+
+
+def _cell(position):
+    """Столбец и строка клетки по её номеру."""
+    return list(cell_coordinates(position))
+
+
+def _kind(game_object):
+    """Обозначение вида объекта поля."""
+    if isinstance(game_object, UninedibleApple):
+        return KIND_ANOTHER_APPLE
+    if isinstance(game_object, Stone):
+        return KIND_STONE
+    return KIND_APPLE
+
+
+def _encode(message):
+    """Кодирует сообщение в строку протокола."""
+    return json.dumps(message, separators=(',', ':')).encode() + b'\n'
+
+
+class GameSession:
+    """
+    Партия одного подключённого игрока.
+
+    :param session_id: Номер партии на сервере
+    :type session_id: int
+    :param writer: Поток для отправки сообщений игроку
+    :type writer: asyncio.StreamWriter
+    :param state: Состояние партии
+    :type state: GameState
+    :param timestep: Планировщик тиков партии по её скорости
+    :type timestep: FixedTimestep
+    """
+
+    def __init__(self, session_id, writer, seed=None):
+        """Метод инициализации партии."""
+        self.session_id = session_id
+        self.writer = writer
+        self.state = GameState(seed)
+        self.timestep = FixedTimestep()
+
+    def turn(self, direction):
+        """Ставит поворот в очередь, применяемую по повороту за тик."""
+        self.state.snake.queue_turn(direction)
+
+    def snapshot(self):
+        """
+        Полный снимок партии.
+
+        :rtype: dict
+        """
+        state = self.state
+        return {
+            'type': 'state',
+            'session': self.session_id,
+            'board': [BOARD_WIDTH, BOARD_HEIGHT],
+            'seed': state.seed,
+            'score': state.score,
+            'snake': [_cell(position) for position in state.snake.positions],
+            'objects': [
+                [_kind(game_object), *_cell(game_object.position)]
+                for game_object in state.objects
+            ],
+        }
+
+    def advance(self, elapsed_ms):
+        """
+        Отыгрывает тики, накопившиеся за прошедшее время.
+
+        :return: Сообщения об изменениях, по одному на тик
+        :rtype: list[dict]
+        """
+        state = self.state
+        timestep = self.timestep
+        timestep.add(elapsed_ms)
+        messages = []
+        while timestep.consume(state.speed):
+            result = state.step()
+            if result.done:
+                messages.append({
+                    't': state.ticks, 'e': result.event, 'score': state.score
+                })
+                state.reset()
+                messages.append(self.snapshot())
+                continue
+            message = {
+                't': state.ticks,
+                'h': _cell(state.snake.get_head_position()),
+            }
+            if state.freed_cells:
+                message['f'] = [_cell(cell) for cell in state.freed_cells]
+            if state.respawned:
+                message['s'] = [
+                    [_kind(game_object), *_cell(game_object.position)]
+                    for game_object in state.respawned
+                ]
+            if result.event is not None:
+                message['e'] = result.event
+                message['score'] = state.score
+            messages.append(message)
+        return messages
+
+
+class GameServer:
+    """
+    Сервер партий с общим планировщиком тиков.
+
+    :param host: Адрес для подключений
+    :type host: str
+    :param port: Порт для подключений, 0 - любой свободный
+    :type port: int
+    :param tick_rate: Частота работы планировщика, раз в секунду
+    :type tick_rate: int
+    :param sessions: Партии подключённых игроков по номерам
+    :type sessions: dict[int, GameSession]
+    """
+
+    def __init__(self, host=SERVER_HOST, port=SERVER_PORT,
+                 tick_rate=SERVER_TICK_RATE):
+        """Метод инициализации сервера."""
+        self.host = host
+        self.port = port
+        self.tick_rate = tick_rate
+        self.sessions = {}
+        self._ids = itertools.count(1)
+        self._server = None
+        self._scheduler = None
+
+    async def start(self):
+        """Начинает принимать подключения и запускает планировщик."""
+        self._server = await asyncio.start_server(
+            self._handle_client, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._scheduler = asyncio.create_task(self._run_scheduler())
+
+    async def serve_forever(self):
+        """Работает до отмены задачи."""
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Останавливает планировщик и отключает всех игроков."""
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            self._scheduler = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for session in list(self.sessions.values()):
+            self._disconnect(session)
+
+    def tick(self, elapsed_ms):
+        """Продвигает все партии и рассылает игрокам изменения."""
+        for session in list(self.sessions.values()):
+            messages = session.advance(elapsed_ms)
+            if messages:
+                self._send(session, messages)
+
+    async def _run_scheduler(self):
+        """Вызывает `tick` с частотой `tick_rate`."""
+        loop = asyncio.get_running_loop()
+        interval = 1 / self.tick_rate
+        last = loop.time()
+        while True:
+            await asyncio.sleep(max(last + interval - loop.time(), 0))
+            now = loop.time()
+            self.tick((now - last) * 1000)
+            last = now
+
+    async def _handle_client(self, reader, writer):
+        """Ведёт партию одного подключения до его закрытия."""
+        session = GameSession(next(self._ids), writer)
+        self.sessions[session.session_id] = session
+        self._send(session, [session.snapshot()])
+        try:
+            while True:
+                line = (await reader.readline()).strip().upper()
+                if not line or line == QUIT_COMMAND:
+                    break
+                direction = TURN_COMMANDS.get(line)
+                if direction is not None:
+                    session.turn(direction)
+        except (ConnectionError, ValueError):
+            # Разрыв соединения или слишком длинная строка.
+            pass
+        finally:
+            self._disconnect(session)
+
+    def _send(self, session, messages):
+        """Отправляет сообщения, отключая не успевающего читать игрока."""
+        transport = session.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            self._disconnect(session)
+            return
+        session.writer.write(b''.join(map(_encode, messages)))
+
+    def _disconnect(self, session):
+        """Завершает партию и закрывает подключение."""
+        self.sessions.pop(session.session_id, None)
+        session.writer.close()
+
+
+def main():
+    """Запуск сервера из командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(GameServer(args.host, args.port).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Фоновый поток для записи на диск вне игрового цикла.
+
+Побочные действия конца партии - запись результата в базу, отчёт
+профилировщика - ставятся в очередь одним вызовом `submit` и выполняются
+по порядку в отдельном потоке. Очередь не ограничена, поэтому `submit`
+никогда не ждёт: даже если диск на общем хранилище подвис на секунды,
+кадр и первый тик следующей партии выводятся вовремя, а задачи
+дописываются, когда диск освободится.
+"""
+
+import queue
+import threading
+
+
+class BackgroundWriter:
+    """
+    Выполнение задач записи по порядку в фоновом потоке.
+
+    Поток запускается при первой задаче. Объекты, с которыми работают
+    задачи (например, `ScoreStore`), после этого нельзя трогать из
+    игрового цикла до `close`: все обращения к ним идут через очередь.
+
+    :param submitted: Количество поставленных задач
+    :type submitted: int
+    :param completed: Количество выполненных задач, в том числе с ошибкой
+    :type completed: int
+    :param error: Первая ошибка задачи или None. Ошибка не останавливает
+    поток: следующие задачи выполняются
+    :type error: NoneType | Exception
+    """
+
+    def __init__(self):
+        """Метод инициализации потока записи."""
+        self.submitted = self.completed = 0
+        self.error = None
+        self._tasks = queue.Queue()
+        self._thread = None
+
+    def __enter__(self):
+        """Вход в контекст потока записи."""
+        return self
+
+    def __exit__(self, *exc_info):
+        """Дожидается задач из очереди и завершает поток."""
+        self.close()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Ставит вызов `func(*args, **kwargs)` в очередь, не дожидаясь его.
+
+        Аргументы передаются в поток как есть, поэтому изменяемые данные,
+        которые игровой цикл продолжит менять, нужно копировать заранее.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name='background-writer', daemon=True
+            )
+            self._thread.start()
+        self.submitted += 1
+        self._tasks.put((func, args, kwargs))
+
+    def close(self):
+        """
+        Выполняет задачи из очереди и завершает фоновый поток.
+
+        :raises Exception: Первая ошибка задачи
+        """
+        if self._thread is not None:
+            self._tasks.put(None)
+            self._thread.join()
+            self._thread = None
+        if self.error is not None:
+            raise self.error
+
+    def _run(self):
+        """Фоновый поток: выполняет задачи, пока не придёт None."""
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            func, args, kwargs = task
+            try:
+                func(*args, **kwargs)
+            except Exception as error:
+                if self.error is None:
+                    self.error = error
+            self.completed += 1
@@ -0,0 +1,102 @@
+import os
+import subprocess
+import sys
+
+import snake_autopilot
+from snake_core import GameState
+
+
+def test_hamiltonian_cycle_visits_every_cell():
+    for width, height in ((32, 24), (5, 4), (4, 5)):
+        cycle = snake_autopilot.hamiltonian_cycle(width, height)
+        cell, visited = 0, set()
+        for _ in range(width * height):
+            visited.add(cell)
+            x, y = cell % width, cell // width
+            next_x, next_y = cycle[cell] % width, cycle[cell] // width
+            assert abs(x - next_x) + abs(y - next_y) == 1, (
+                'Цикл должен проходить только по соседним клеткам.'
+            )
+            cell = cycle[cell]
+        assert cell == 0 and len(visited) == width * height, (
+            'Цикл должен обходить все клетки и замыкаться.'
+        )
+    assert snake_autopilot.hamiltonian_cycle(5, 5) is None
+
+
+def test_hamiltonian_cycle_is_cached_on_disk(tmp_path):
+    cycle = snake_autopilot.load_hamiltonian_cycle(6, 4, tmp_path)
+    assert (tmp_path / 'hamiltonian_6x4.bin').exists(), (
+        'Построенный цикл должен сохраняться в кэш.'
+    )
+    assert snake_autopilot.load_hamiltonian_cycle(6, 4, tmp_path) == cycle
+
+
+def test_broken_cycle_cache_is_rebuilt(tmp_path):
+    path = tmp_path / 'hamiltonian_6x4.bin'
+    cycle = snake_autopilot.hamiltonian_cycle(6, 4)
+    for broken in (
+        cycle.tobytes()[:-4], cycle.tobytes() * 2, b'\x01\x02\x03',
+        bytes(len(cycle.tobytes())),
+    ):
+        path.write_bytes(broken)
+        assert snake_autopilot.load_hamiltonian_cycle(
+            6, 4, tmp_path
+        ) == cycle, 'Повреждённый кэш цикла не должен использоваться.'
+        assert path.read_bytes() == cycle.tobytes(), (
+            'Повреждённый кэш цикла должен перезаписываться.'
+        )
+
+
+def test_autopilot_eats_apples_and_avoids_hazards(tmp_path):
+    autopilot = snake_autopilot.Autopilot(cache_dir=tmp_path)
+    state = GameState(seed=5)
+    for _ in range(500):
+        autopilot.steer(state)
+        result = state.step(None)
+        assert not result.done, 'Автопилот не должен проигрывать так рано.'
+    assert state.score >= 20, 'Автопилот должен собирать яблоки.'
+
+
+def test_autopilot_tick_is_bounded_on_large_board(tmp_path):
+    # Размер поля задаётся при импорте, поэтому партия идёт в отдельном
+    # процессе.
+    code = '''
+import time
+import snake_autopilot
+from snake_core import GameState
+autopilot = snake_autopilot.Autopilot()
+autopilot.prepare()
+visited = []
+search_neighbors = autopilot._search_neighbors
+def counted(cell):
+    visited.append(cell)
+    return search_neighbors(cell)
+autopilot._search_neighbors = counted
+state = GameState(seed=5)
+worst, slow = 0, 0
+for _ in range(3000):
+    visited.clear()
+    started = time.perf_counter()
+    autopilot.steer(state)
+    slow += time.perf_counter() - started > 0.02
+    worst = max(worst, len(visited))
+    if state.step(None).done:
+        state.reset()
+print(worst, slow, state.score)
+'''
+    environment = dict(
+        os.environ, SNAKE_BOARD_SIZE='300x300', SNAKE_CACHE_DIR=str(tmp_path)
+    )
+    process = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True,
+        cwd=snake_autopilot.__file__.rpartition('/')[0], env=environment,
+        check=True,
+    )
+    worst, slow, score = map(int, process.stdout.split())
+    assert worst <= 2 * snake_autopilot.SEARCH_BUDGET, (
+        'За тик автопилот должен просматривать ограниченное число клеток, '
+        'независимо от размера поля.'
+    )
+    assert slow <= 3, 'Тики автопилота на большом поле не должны затягиваться.'
+    assert score > 0, 'Автопилот должен собирать яблоки и на большом поле.'
@@ -0,0 +1,127 @@
+import pytest
+
+import snake_core
+
+np = pytest.importorskip('numpy')
+snake_batch = pytest.importorskip('snake_batch')
+
+
+@pytest.fixture
+def batch():
+    return snake_batch.BatchGame(64, seed=0)
+
+
+def test_batch_invariants_hold_after_random_steps(batch):
+    rng = np.random.default_rng(0)
+    for _ in range(500):
+        batch.step(rng.integers(-1, 4, size=batch.num_games))
+    assert (batch.occupancy.sum(axis=1) == batch.body_size).all(), (
+        'Счётчики занятости клеток должны совпадать с длиной тела змейки.'
+    )
+    assert (batch.apple != batch.stone).all()
+    assert (batch.apple != batch.another_apple).all()
+    assert (batch.occupancy[batch._rows, batch.apple] == 0).all(), (
+        'Яблоко не должно появляться на теле змейки.'
+    )
+    _assert_free_index(batch)
+
+
+def _assert_free_index(batch):
+    for game in range(batch.num_games):
+        free = batch.free[game, :batch.free_count[game]]
+        taken = set(np.flatnonzero(batch.occupancy[game])) | {
+            batch.apple[game], batch.stone[game], batch.another_apple[game]
+        }
+        assert set(free) == set(range(batch.num_cells)) - taken, (
+            'Индекс свободных клеток должен совпадать с полем.'
+        )
+        assert (batch.free_index[game, free] == np.arange(free.size)).all()
+
+
+def test_batch_eats_apple(batch):
+    right = snake_batch.DIRECTIONS.index(snake_core.RIGHT)
+    batch.direction[:] = right
+    head = batch.head
+    batch.apple[:] = head // batch.width * batch.width + (
+        head % batch.width + 1
+    ) % batch.width
+    batch.stone[:] = batch.another_apple[:] = -1
+    result = batch.step()
+    assert not result.done.any()
+    assert (result.reward == snake_batch.APPLE_REWARD).all()
+    assert (batch.length == 2).all() and (batch.score == 2).all()
+    batch.stone[:] = batch.another_apple[:] = batch.apple[:] = -1
+    batch.step()
+    assert (batch.body_size == 2).all()
+
+
+def test_batch_ignores_opposite_direction(batch):
+    left = snake_batch.DIRECTIONS.index(snake_core.LEFT)
+    right = snake_batch.DIRECTIONS.index(snake_core.RIGHT)
+    batch.direction[:] = right
+    batch.step(np.full(batch.num_games, left))
+    assert (batch.direction == right).all(), (
+        'Разворот на 180 градусов должен игнорироваться.'
+    )
+
+
+def _batch_body(batch, game):
+    return [
+        int(batch.body[game, (batch.head_index[game] - index)
+                       % batch.num_cells])
+        for index in range(batch.body_size[game])
+    ]
+
+
+def _sync_objects(batch, game, state):
+    batch.direction[game] = snake_batch.DIRECTIONS.index(
+        state.snake.direction
+    )
+    # Генераторы движков разные, поэтому объекты переносятся в клетки,
+    # выбранные `GameState`, вместе с индексом свободных клеток.
+    rows = np.array([game])
+    objects = (batch.apple, batch.stone, batch.another_apple)
+    for positions in objects:
+        batch._release(rows, positions[rows])
+    for positions, entity in zip(
+        objects, (state.apple, state.stone, state.another_apple)
+    ):
+        positions[game] = entity.position
+        batch._occupy(rows, positions[rows])
+
+
+def test_batch_matches_game_state_move_for_move():
+    games = 16
+    batch = snake_batch.BatchGame(games, seed=1)
+    states = [snake_core.GameState(seed=game) for game in range(games)]
+    for game, state in enumerate(states):
+        _sync_objects(batch, game, state)
+    rng = np.random.default_rng(2)
+    finished = eaten = 0
+    for _ in range(3000):
+        actions = rng.integers(-1, 4, size=games)
+        actions[rng.random(games) < 0.7] = snake_batch.NO_ACTION
+        result = batch.step(actions)
+        for game, state in enumerate(states):
+            action = actions[game]
+            expected = state.step(
+                None if action < 0 else snake_core.DIRECTIONS[action]
+            )
+            assert (
+                result.reward[game], result.done[game], result.score[game],
+                result.length[game],
+            ) == (
+                expected.reward, expected.done, state.score,
+                state.snake.length,
+            ), 'Пакетный движок должен следовать правилам GameState.'
+            eaten += expected.event == snake_core.EVENT_APPLE
+            if expected.done:
+                finished += 1
+                state.reset()
+            assert _batch_body(batch, game) == list(state.snake.positions), (
+                'Тело змейки в пакетном движке должно совпадать с GameState.'
+            )
+            _sync_objects(batch, game, state)
+    assert finished > games, 'Партии должны заканчиваться и начинаться снова.'
+    assert eaten > games, 'Змейки должны съедать яблоки.'
+    _assert_free_index(batch)
@@ -0,0 +1,324 @@
+import subprocess
+import sys
+
+import pytest
+
+import snake_core
+
+
+@pytest.fixture
+def state():
+    return snake_core.GameState()
+
+
+@pytest.mark.parametrize('module_name', ('snake_core', 'the_snake'))
+def test_import_does_not_load_pygame(module_name):
+    code = (
+        f'import sys, {module_name}; '
+        'sys.exit("pygame" in sys.modules or "numpy" in sys.modules)'
+    )
+    process = subprocess.run(
+        [sys.executable, '-c', code], cwd=snake_core.__file__.rpartition('/')[0]
+    )
+    assert process.returncode == 0, (
+        f'Импорт модуля `{module_name}` не должен загружать pygame, SDL '
+        'и NumPy.'
+    )
+
+
+def test_step_moves_snake(state):
+    head = state.snake.get_head_position()
+    result = state.step()
+    assert isinstance(result, snake_core.StepResult)
+    assert state.snake.get_head_position() != head, (
+        'После `GameState.step` голова змейки должна сместиться.'
+    )
+    assert state.ticks == 1
+
+
+def test_step_eats_apple(state):
+    snake = state.snake
+    snake.direction = snake_core.RIGHT
+    state.apple.position = snake_core.neighbor_position(
+        snake.get_head_position(), snake_core.RIGHT
+    )
+    state.stone.position = state.another_apple.position = -1
+    result = state.step()
+    assert result.event == snake_core.EVENT_APPLE
+    assert result.reward == snake_core.APPLE_REWARD
+    assert state.score == 2 and snake.length == 2
+
+
+def test_step_game_over_on_stone(state):
+    snake = state.snake
+    snake.direction = snake_core.RIGHT
+    state.stone.position = snake_core.neighbor_position(
+        snake.get_head_position(), snake_core.RIGHT
+    )
+    state.apple.position = state.another_apple.position = -1
+    result = state.step()
+    assert result.done and result.event == snake_core.EVENT_GAME_OVER
+
+
+def test_snake_occupancy_matches_body(state):
+    directions = (snake_core.UP, snake_core.DOWN,
+                  snake_core.LEFT, snake_core.RIGHT, None)
+    for tick in range(2000):
+        if state.step(directions[tick * 7 % 5]).done:
+            state.reset()
+        snake = state.snake
+        counts = {}
+        for position in snake.positions:
+            counts[position] = counts.get(position, 0) + 1
+        assert all(
+            snake.positions.count(position) == count
+            for position, count in counts.items()
+        ) and sum(snake.positions._counts) == len(snake.positions), (
+            'Индекс занятых клеток должен совпадать с телом змейки.'
+        )
+
+
+def test_self_collision_ends_game(state):
+    snake = state.snake
+    head_x, head_y = snake_core.cell_coordinates(snake.get_head_position())
+    snake.positions.extend(
+        snake_core.cell_number(x, y) for x, y in (
+            (head_x + 1, head_y), (head_x + 1, head_y + 1),
+            (head_x, head_y + 1), (head_x - 1, head_y + 1),
+        )
+    )
+    snake.length = len(snake.positions)
+    snake.direction = snake_core.DOWN
+    state.apple.position = state.stone.position = -1
+    state.another_apple.position = -1
+    assert snake_core.check_game_over(snake, state.stone) is False
+    assert state.step().done, (
+        'Столкновение головы с телом должно завершать игру.'
+    )
+
+
+def test_cell_index_matches_board(state):
+    all_cells = set(range(snake_core.BOARD_WIDTH * snake_core.BOARD_HEIGHT))
+    directions = (snake_core.UP, snake_core.LEFT, None, None, None)
+    for tick in range(3000):
+        if state.step(directions[tick * 3 % 5]).done:
+            state.reset()
+        occupied = set(state.snake.positions) | {
+            game_object.position for game_object in state.objects
+        }
+        free = set(state.cells.to_array())
+        assert free == all_cells - occupied, (
+            'Индекс свободных клеток должен совпадать с полем.'
+        )
+
+
+def test_randomize_position_on_full_board(apple):
+    cells = snake_core.CellIndex()
+    for position in range(len(cells)):
+        cells.occupy(position)
+    with pytest.raises(snake_core.BoardFullError):
+        apple.randomize_position(cells)
+    cells.release(0)
+    apple.randomize_position(cells)
+    assert apple.position == 0
+
+
+def test_sparse_cell_index_finds_last_free_cell():
+    cells = snake_core.SparseCellIndex()
+    all_cells = range(len(cells))
+    for position in all_cells:
+        cells.occupy(position)
+    with pytest.raises(snake_core.BoardFullError):
+        cells.random_free()
+    cells.release(all_cells[-1])
+    assert len(cells) == 1 and all_cells[-1] not in cells
+    assert cells.random_free() == all_cells[-1], (
+        'Последняя свободная клетка находится перебором после попыток.'
+    )
+
+
+def test_fixed_timestep_runs_ticks_at_game_speed():
+    scheduler = snake_core.FixedTimestep(max_steps=3)
+    ticks = 0
+    for _ in range(40):
+        scheduler.add(25)
+        while scheduler.consume(10):
+            ticks += 1
+    assert ticks == 10, (
+        'За секунду кадров должно пройти столько тиков, какова скорость игры.'
+    )
+    scheduler.add(1000)
+    caught_up = 0
+    while scheduler.consume(10):
+        caught_up += 1
+    assert caught_up == 3 and scheduler.accumulator < 100, (
+        'Отставание догоняется не больше чем `max_steps` тиками за кадр.'
+    )
+
+
+def test_entity_grid_tracks_many_objects():
+    state = snake_core.GameState(
+        seed=4, apples=40, stones=60, another_apples=30
+    )
+    assert len(state.objects) == 130
+    directions = (snake_core.UP, snake_core.LEFT, None, None, None)
+    events = set()
+    for tick in range(2000):
+        result = state.step(directions[tick * 3 % 5])
+        events.add(result.event)
+        if result.done:
+            state.reset()
+        positions = [game_object.position for game_object in state.objects]
+        assert len(set(positions)) == len(positions) == len(state.entities)
+        for game_object in state.objects:
+            assert state.entities.at(game_object.position) is game_object, (
+                'Сетка объектов должна следить за перемещением объектов.'
+            )
+            assert not state.snake.occupies(game_object.position)
+    assert {snake_core.EVENT_APPLE, snake_core.EVENT_ANOTHER_APPLE,
+            snake_core.EVENT_GAME_OVER} <= events
+
+
+def test_quick_turns_are_applied_one_per_tick(state):
+    snake = state.snake
+    snake.direction = snake_core.RIGHT
+    assert snake.queue_turn(snake_core.UP)
+    assert not snake.queue_turn(snake_core.DOWN), (
+        'Разворот относительно предыдущего поворота должен отбрасываться.'
+    )
+    assert snake.queue_turn(snake_core.LEFT)
+    assert snake.queue_turn(snake_core.DOWN)
+    assert not snake.queue_turn(snake_core.RIGHT), (
+        'Очередь поворотов должна быть ограничена.'
+    )
+
+    directions = []
+    for _ in range(4):
+        state.step()
+        directions.append(snake.direction)
+    assert directions == [
+        snake_core.UP, snake_core.LEFT, snake_core.DOWN, snake_core.DOWN
+    ], 'Быстрые повороты должны применяться по одному за тик.'
+
+
+def _play(state, ticks):
+    history = []
+    for tick in range(ticks):
+        action = snake_core.DIRECTIONS[tick * 7 // 5 % 4] if tick % 3 else None
+        result = state.step(action)
+        history.append((
+            result, tuple(state.snake.positions), state.score,
+            tuple(game_object.position for game_object in state.objects),
+        ))
+        if result.done:
+            state.reset()
+    return history
+
+
+def test_saved_and_forked_states_continue_like_original():
+    state = snake_core.GameState(seed=3, apples=3, stones=5)
+    _play(state, 200)
+    data = state.save_state()
+    fork = state.fork()
+    expected = _play(state, 1000)
+    assert any(result.done for result, *_ in expected)
+
+    restored = snake_core.GameState(apples=3, stones=5)
+    restored.load_state(data)
+    assert _play(restored, 1000) == expected, (
+        'Партия из снимка должна продолжаться так же, как исходная.'
+    )
+    assert _play(fork, 1000) == expected, (
+        'Копия партии должна продолжаться так же, как исходная.'
+    )
+
+
+def test_load_state_rejects_foreign_data(state):
+    data = snake_core.GameState(stones=2).save_state()
+    for broken in (b'', b'XXXX' + data[4:], data[:-10], data):
+        with pytest.raises(snake_core.StateError):
+            state.load_state(broken)
+
+
+def test_load_state_rejects_corrupt_fields_without_changes(state):
+    source = snake_core.GameState(seed=4)
+    for action in (snake_core.UP, snake_core.LEFT, None):
+        source.step(action)
+    source.snake.turns.extend((snake_core.DOWN, snake_core.RIGHT))
+    data = source.save_state()
+    header = list(snake_core._STATE_HEADER.unpack_from(data))
+    rest = data[snake_core._STATE_HEADER.size:]
+    body_size = header[11]
+    turns_offset = 4 * (body_size + len(source.objects))
+    corrupt = []
+    for field, value in ((8, 4), (9, 7), (10, 0), (11, 0), (11, 10**6)):
+        fields = header.copy()
+        fields[field] = value
+        corrupt.append(snake_core._STATE_HEADER.pack(*fields) + rest)
+    corrupt.append(
+        data[:snake_core._STATE_HEADER.size + turns_offset] + b'\x09'
+        + data[snake_core._STATE_HEADER.size + turns_offset + 1:]
+    )
+    before = state.save_state()
+    for broken in corrupt:
+        with pytest.raises(snake_core.StateError):
+            state.load_state(broken)
+        assert state.save_state() == before, (
+            'Повреждённый снимок не должен менять партию.'
+        )
+
+
+def test_any_integer_seed_fits_snapshot():
+    for seed in (2**33 + 5, -1):
+        state = snake_core.GameState(seed=seed)
+        assert state.seed == seed & snake_core.SEED_MASK
+        restored = snake_core.GameState()
+        restored.load_state(state.save_state())
+        assert restored.seed == state.seed
+        replayed = snake_core.GameState(seed=state.seed)
+        assert _play(replayed, 300) == _play(state, 300), (
+            'Партия должна повторяться по сохранённому зерну.'
+        )
+
+
+def test_snake_body_behaves_like_deque():
+    import random
+    from collections import deque
+
+    rng = random.Random(1)
+    cells = range(snake_core.BOARD_WIDTH * snake_core.BOARD_HEIGHT)
+    body = snake_core.SnakeBody()
+    expected = deque()
+    for _ in range(5000):
+        operation = rng.random()
+        if operation < 0.4 or not expected:
+            position = cells[rng.randrange(len(cells))]
+            body.appendleft(position)
+            expected.appendleft(position)
+        elif operation < 0.6:
+            position = cells[rng.randrange(len(cells))]
+            body.append(position)
+            expected.append(position)
+        else:
+            assert body.pop() == expected.pop()
+        assert len(body) == len(expected)
+    assert list(body) == list(expected)
+    assert body[0] == expected[0] and body[-1] == expected[-1]
+    for position in cells[:50]:
+        assert body.count(position) == expected.count(position), (
+            'Тело змейки должно считать сегменты в каждой клетке.'
+        )
+    copy = body.copy()
+    copy.clear()
+    assert len(copy) == 0 and list(body) == list(expected)
+    assert not any(not_free for not_free in copy._counts)
+    assert not hasattr(snake_core.Snake(), '__dict__'), (
+        'Объекты игры должны хранить атрибуты в __slots__.'
+    )
+    slots = [
+        slot for cls in snake_core.Apple.__mro__
+        for slot in cls.__dict__.get('__slots__', ())
+    ]
+    assert len(slots) == len(set(slots)) and 'position' not in slots, (
+        'Позиция объекта должна храниться в одном слоте.'
+    )
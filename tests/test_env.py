@@ -0,0 +1,50 @@
+import pytest
+
+import snake_core
+
+np = pytest.importorskip('numpy')
+snake_env = pytest.importorskip('snake_env')
+
+
+def test_incremental_observation_matches_rebuild():
+    env = snake_env.SnakeEnv(seed=5, apples=3, stones=4, another_apples=3)
+    rebuilt = snake_env.SnakeEnv(seed=5, apples=3, stones=4, another_apples=3)
+    rng = np.random.default_rng(0)
+    events = set()
+    observation = env.reset(seed=11)
+    for _ in range(3000):
+        observation, reward, done, info = env.step(rng.integers(-1, 4))
+        events.add(info['event'])
+        rebuilt.state = env.state
+        rebuilt._rebuild()
+        assert (observation == rebuilt.observation).all(), (
+            'Наблюдение, дописанное за шаг, должно совпадать с построенным '
+            'заново.'
+        )
+        if done:
+            observation = env.reset()
+    assert {snake_core.EVENT_APPLE, snake_core.EVENT_ANOTHER_APPLE,
+            snake_core.EVENT_GAME_OVER} <= events
+
+
+def test_observation_layers_and_render():
+    env = snake_env.SnakeEnv(seed=1)
+    observation = env.reset(seed=2)
+    state = env.state
+    assert observation.shape == (
+        snake_env.OBSERVATION_CHANNELS,
+        snake_core.BOARD_HEIGHT, snake_core.BOARD_WIDTH,
+    )
+    head_y, head_x = np.argwhere(observation[snake_env.CHANNEL_HEAD])[0]
+    assert snake_core.cell_number(head_x, head_y) == (
+        state.snake.get_head_position()
+    )
+    assert observation[snake_env.CHANNEL_STONE].sum() == len(state.stones)
+
+    image = env.render(cell_size=snake_core.GRID_SIZE)
+    x, y = snake_core.cell_pixels(state.apple.position)
+    assert image.shape == (
+        snake_core.BOARD_HEIGHT * snake_core.GRID_SIZE,
+        snake_core.BOARD_WIDTH * snake_core.GRID_SIZE, 3,
+    )
+    assert tuple(image[y, x]) == snake_core.APPLE_COLOR
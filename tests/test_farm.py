@@ -0,0 +1,49 @@
+import snake_farm
+
+
+def test_play_game_is_deterministic():
+    first = snake_farm.play_game(3, snake_farm.greedy_policy, 2000)
+    second = snake_farm.play_game(3, snake_farm.greedy_policy, 2000)
+    assert first == second, 'Партия с тем же зерном должна повторяться.'
+    assert first.score > 0, 'Жадная политика должна съедать яблоки.'
+
+
+def test_run_farm_collects_every_game():
+    results = []
+    stats = snake_farm.run_farm(
+        20, 'random', seed=100, workers=2, max_ticks=300, chunk_size=3,
+        on_result=results.append
+    )
+    assert stats.games == 20 == len(results)
+    assert sorted(result.seed for result in results) == list(range(100, 120))
+    assert sum(stats.scores.values()) == 20
+    assert stats.ticks == sum(result.ticks for result in results)
+
+    merged = snake_farm.FarmStats()
+    merged.merge(stats)
+    merged.merge(stats)
+    assert merged.games == 40 and merged.scores == stats.scores + stats.scores
+
+
+def test_random_policy_keeps_game_rng():
+    results = []
+    for seed in range(30):
+        actions = []
+
+        def policy(state):
+            actions.append(snake_farm.random_policy(state))
+            return actions[-1]
+
+        result = snake_farm.play_game(seed, policy, 500)
+        state = snake_farm.GameState(seed)
+        for action in actions:
+            state.step(action)
+        assert (state.score, state.ticks) == (result.score, result.ticks), (
+            'Партия случайной политики должна повторяться по её действиям.'
+        )
+        results.append(result)
+    assert any(result.score > 0 for result in results)
+    assert results[:3] == [
+        snake_farm.play_game(seed, snake_farm.random_policy, 500)
+        for seed in range(3)
+    ]
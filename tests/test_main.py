@@ -16,3 +16,19 @@ def test_main_run_without_exceptions(_the_snake):
             f'`{type(error).__name__}: {error}`\n\n'
             'Убедитесь, что функция работает корректно.'
         )
+
+
+@pytest.mark.timeout(5, method='thread')
+@pytest.mark.usefixtures('modified_clock')
+def test_short_profiled_run_writes_report(_the_snake, tmp_path, monkeypatch):
+    import json
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(_the_snake, 'PROFILE_PATH', str(tmp_path / 'p.json'))
+    with pytest.raises(StopInfiniteLoop):
+        _the_snake.main()
+    report = json.loads((tmp_path / 'p.json').read_text(encoding='utf-8'))
+    assert report['frames'] >= 1, (
+        'Запуск короче интервала записи отчёта должен оставлять отчёт '
+        'профилировщика.'
+    )
@@ -0,0 +1,34 @@
+import json
+
+from snake_profile import FRAME_PHASE, FrameProfiler, LatencyHistogram
+
+
+def test_histogram_percentiles_are_close():
+    histogram = LatencyHistogram()
+    for value in range(1, 10_001):
+        histogram.record(value * 1000)
+    assert histogram.count == 10_000
+    assert histogram.max == 10_000_000
+    for percent, expected in ((50, 5_000_000), (99, 9_900_000)):
+        assert abs(histogram.percentile(percent) - expected) <= expected / 8, (
+            'Процентиль гистограммы должен быть точен до 12.5%.'
+        )
+
+
+def test_profiler_reports_phases_and_missed_frames(tmp_path):
+    path = tmp_path / 'profile.json'
+    profiler = FrameProfiler(budget_ms=0, dump_path=str(path))
+    for _ in range(3):
+        profiler.start_frame()
+        profiler.mark('move')
+        profiler.mark('draw')
+        profiler.end_frame()
+    profiler.dump()
+    report = json.loads(path.read_text(encoding='utf-8'))
+    assert report['frames'] == 3 and report['missed_frames'] == 3
+    assert set(report['phases']) == {'move', 'draw', FRAME_PHASE}
+    assert report['phases']['move']['count'] == 3
+
+    profiler.dump(str(tmp_path / 'profile.csv'))
+    rows = (tmp_path / 'profile.csv').read_text(encoding='utf-8').split()
+    assert rows[0] == 'phase,count,p50_ms,p99_ms,max_ms'
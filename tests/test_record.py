@@ -0,0 +1,79 @@
+import threading
+
+import pygame as pg
+import pytest
+
+pytest.importorskip('numpy')
+snake_record = pytest.importorskip('snake_record')
+
+
+def _frames(count, size=(64, 48)):
+    frames = []
+    for index in range(count):
+        surface = pg.Surface(size)
+        surface.fill((index * 40 % 256, 200, 7))
+        pg.draw.rect(surface, (255, 0, index), (index, 3, 10, 20))
+        frames.append(surface)
+    return frames
+
+
+@pytest.mark.parametrize('name', ('game.rgb', 'frames'))
+def test_recorded_frames_match_surface(tmp_path, name):
+    frames = _frames(5)
+    path = tmp_path / name
+    with snake_record.FrameRecorder(path, drop_frames=False) as recorder:
+        for surface in frames:
+            assert recorder.capture(surface)
+    assert recorder.written == len(frames) and recorder.dropped == 0
+
+    expected = [pg.image.tostring(surface, 'RGB') for surface in frames]
+    if path.suffix == '.rgb':
+        assert path.read_bytes() == b''.join(expected), (
+            'Поток RGB должен совпадать с пикселями кадров.'
+        )
+    else:
+        written = sorted(path.glob('*.png'))
+        assert [
+            pg.image.tostring(pg.image.load(str(file)), 'RGB')
+            for file in written
+        ] == expected, 'Кадры PNG должны совпадать с пикселями кадров.'
+
+
+def test_recorder_drops_frames_instead_of_waiting(tmp_path, monkeypatch):
+    release = threading.Event()
+    original_write = snake_record.FrameRecorder._write
+
+    def slow_write(self, output, rgb):
+        release.wait(10)
+        original_write(self, output, rgb)
+
+    monkeypatch.setattr(snake_record.FrameRecorder, '_write', slow_write)
+    frames = _frames(20)
+    recorder = snake_record.FrameRecorder(
+        tmp_path / 'game.rgb', queue_frames=2
+    )
+    accepted = [recorder.capture(surface) for surface in frames]
+    assert recorder.dropped > 0 and not all(accepted), (
+        'Если запись отстаёт, кадры должны пропускаться без ожидания.'
+    )
+    release.set()
+    recorder.close()
+    assert recorder.written == sum(accepted)
+    assert recorder.captured == recorder.written + recorder.dropped
+
+
+@pytest.mark.timeout(10)
+def test_recorder_error_is_raised_instead_of_waiting(tmp_path, monkeypatch):
+    def broken_to_rgb(self, slot):
+        raise ValueError('broken frame')
+
+    monkeypatch.setattr(snake_record.FrameRecorder, '_to_rgb', broken_to_rgb)
+    recorder = snake_record.FrameRecorder(
+        tmp_path / 'game.rgb', queue_frames=2, drop_frames=False
+    )
+    with pytest.raises(ValueError, match='broken frame'):
+        for surface in _frames(20):
+            recorder.capture(surface)
+    with pytest.raises(ValueError, match='broken frame'):
+        recorder.close()
+    assert recorder.written == 0
@@ -0,0 +1,141 @@
+import pygame as pg
+import pytest
+
+import snake_core
+
+
+def _run_and_compare(renderer_class, state, ticks=400):
+    size = (snake_core.SCREEN_WIDTH, snake_core.SCREEN_HEIGHT)
+    incremental = renderer_class(pg.Surface(size))
+    reference = renderer_class(pg.Surface(size))
+    incremental.draw_full(state)
+    _assert_matches_cell_drawing(incremental.surface, state)
+    directions = (snake_core.UP, snake_core.RIGHT, None, None, None, None)
+    for tick in range(ticks):
+        if state.step(directions[tick * 5 % 6]).done:
+            # Новая партия дорисовывается по клеткам, как и обычный тик.
+            state.reset()
+        incremental.draw_step(state)
+        reference.draw_full(state)
+        if tick % 50 == 0:
+            _assert_matches_cell_drawing(incremental.surface, state)
+        assert (pg.image.tostring(incremental.surface, 'RGB')
+                == pg.image.tostring(reference.surface, 'RGB')), (
+            'Частичная перерисовка должна давать тот же кадр, что и полная.'
+        )
+
+
+def _assert_matches_cell_drawing(surface, state):
+    expected = pg.Surface(surface.get_size())
+    for game_object in state.objects:
+        game_object.draw(expected)
+    for position in state.snake.positions:
+        snake_core.draw_cell(expected, position, state.snake.body_color)
+    assert (pg.image.tostring(surface, 'RGB')
+            == pg.image.tostring(expected, 'RGB')), (
+        'Клетки из кэша должны совпадать с отрисовкой через `pg.draw.rect`.'
+    )
+
+
+@pytest.mark.usefixtures('_the_snake')
+def test_dirty_renderer_matches_full_redraw():
+    from snake_render import Renderer
+
+    state = snake_core.GameState()
+    _run_and_compare(Renderer, state)
+
+
+@pytest.mark.usefixtures('_the_snake')
+def test_tile_cache_rebuilds_on_size_change():
+    from snake_render import TileCache
+
+    cache = TileCache(pg.Surface((1, 1)))
+    tile = cache.tile(snake_core.APPLE_COLOR)
+    assert cache.tile(snake_core.APPLE_COLOR) is tile
+    cache.cell_size = 10
+    assert cache.tile(snake_core.APPLE_COLOR).get_size() == (10, 10), (
+        'Кэш клеток должен перестраиваться при смене размера клетки.'
+    )
+
+
+@pytest.mark.usefixtures('_the_snake')
+def test_chunk_renderer_shows_board_around_head():
+    from snake_render import ChunkRenderer, Renderer
+
+    world_size = (snake_core.BOARD_PIXEL_WIDTH, snake_core.BOARD_PIXEL_HEIGHT)
+    chunked = ChunkRenderer(pg.Surface((300, 220)), chunk_cells=7)
+    chunked.capacity = 4
+    board = Renderer(pg.Surface(world_size))
+    view = pg.Surface((300, 220))
+
+    state = snake_core.GameState(seed=2)
+    chunked.draw_full(state)
+    directions = (snake_core.UP, snake_core.RIGHT, None, None, None, None)
+
+    def assert_matches_board():
+        board.draw_full(state)
+        camera = chunked.camera
+        for dx in (0, world_size[0]):
+            for dy in (0, world_size[1]):
+                view.blit(board.surface, (dx - camera.left, dy - camera.top))
+        assert (pg.image.tostring(chunked.surface, 'RGB')
+                == pg.image.tostring(view, 'RGB')), (
+            'Окно из кусков должно совпадать с частью полного поля.'
+        )
+
+    for tick in range(200):
+        if state.step(directions[tick * 5 % 6]).done:
+            state.reset()
+            chunked.draw_full(state)
+        else:
+            chunked.draw_step(state)
+            chunked.compose()
+        assert_matches_board()
+    assert len(chunked._chunks) <= chunked.capacity
+
+    # Несколько тиков за кадр: окно собирается один раз.
+    frame = pg.image.tostring(chunked.surface, 'RGB')
+    for _ in range(3):
+        if state.step(None).done:
+            state.reset()
+        chunked.draw_step(state)
+    assert pg.image.tostring(chunked.surface, 'RGB') == frame, (
+        'Тик должен дорисовывать только куски, не трогая окно.'
+    )
+    chunked.compose()
+    assert_matches_board()
+
+
+@pytest.mark.usefixtures('_the_snake')
+def test_scaled_renderer_matches_cell_renderer():
+    from snake_render import Renderer, ScaledRenderer
+
+    size = (snake_core.SCREEN_WIDTH, snake_core.SCREEN_HEIGHT)
+    scaled = ScaledRenderer(pg.Surface(size))
+    full = ScaledRenderer(pg.Surface(size))
+    cells = Renderer(pg.Surface(size))
+    state = snake_core.GameState(seed=6, apples=3, stones=3)
+    scaled.draw_full(state)
+    directions = (snake_core.UP, snake_core.RIGHT, None, None, None, None)
+    for tick in range(300):
+        if state.step(directions[tick * 5 % 6]).done:
+            state.reset()
+            scaled.draw_full(state)
+        else:
+            scaled.draw_step(state)
+            scaled.compose()
+        full.draw_full(state)
+        assert (pg.image.tostring(scaled.surface, 'RGB')
+                == pg.image.tostring(full.surface, 'RGB')), (
+            'Обновление клеток за тик должно давать тот же кадр, что и '
+            'полная перерисовка.'
+        )
+        if tick % 50 == 0:
+            # Занятые клетки уже обведены рамкой, поэтому сетка рамок
+            # поверх кадра по клеткам даёт кадр растянутого поля.
+            cells.draw_full(state)
+            cells.surface.blit(scaled._borders, (0, 0))
+            assert (pg.image.tostring(scaled.surface, 'RGB')
+                    == pg.image.tostring(cells.surface, 'RGB')), (
+                'Растянутое поле должно совпадать с полем из клеток.'
+            )
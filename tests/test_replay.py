@@ -0,0 +1,84 @@
+import random
+import subprocess
+import sys
+
+import pytest
+
+import snake_core
+import snake_replay
+from snake_replay import Replay, ReplayError, play_replay
+from snake_scores import ScoreStore
+
+
+def _play_game(state, rng):
+    replay = Replay.start(state)
+    directions = (snake_core.UP, snake_core.DOWN,
+                  snake_core.LEFT, snake_core.RIGHT)
+    while True:
+        action = rng.choice(directions) if rng.random() < 0.2 else None
+        result = state.step(action)
+        replay.record(action)
+        if result.done or state.ticks >= 5000:
+            return replay
+
+
+def _snapshot(state):
+    return (state.score, state.ticks, list(state.snake.positions),
+            [game_object.position for game_object in state.objects])
+
+
+def test_same_seed_gives_same_game():
+    first = snake_core.GameState(seed=42)
+    second = snake_core.GameState(seed=42)
+    assert _snapshot(first) == _snapshot(second)
+    for tick in range(300):
+        assert first.step().done == second.step().done
+    assert _snapshot(first) == _snapshot(second), (
+        'Партии с одинаковым зерном должны совпадать.'
+    )
+
+
+@pytest.mark.parametrize('games_before', (0, 3))
+def test_replay_reproduces_game(games_before):
+    rng = random.Random(games_before)
+    state = snake_core.GameState(seed=7)
+    for _ in range(games_before):
+        _play_game(state, rng)
+        state.reset()
+    replay = _play_game(state, rng)
+
+    restored = Replay.from_bytes(replay.to_bytes())
+    assert restored.turns == replay.turns
+    assert _snapshot(play_replay(restored)) == _snapshot(state), (
+        'Воспроизведение записи должно приводить к тому же состоянию.'
+    )
+
+
+def test_replay_rejects_foreign_data():
+    with pytest.raises(ReplayError):
+        Replay.from_bytes(b'not a replay at all')
+
+
+def test_replay_exported_from_score_store(tmp_path):
+    state = snake_core.GameState(seed=2**40 + 3)
+    replay = _play_game(state, random.Random(1))
+    with ScoreStore(str(tmp_path / 'scores.sqlite3')) as store:
+        store.add(state.score, state.snake.length, state.ticks, 1.0,
+                  seed=state.seed, replay=replay.to_bytes())
+        store.add(0, 1, 1, 1.0, seed=state.seed + 1)
+
+    output = tmp_path / 'game.snkr'
+    subprocess.run(
+        [sys.executable, snake_replay.__file__, str(output),
+         '--db', str(tmp_path / 'scores.sqlite3'), '--seed', str(state.seed)],
+        check=True, capture_output=True,
+    )
+    assert _snapshot(play_replay(Replay.load(output))) == _snapshot(state), (
+        'Выгруженная из базы запись должна воспроизводить партию.'
+    )
+    missing = subprocess.run(
+        [sys.executable, snake_replay.__file__, str(output),
+         '--db', str(tmp_path / 'scores.sqlite3'), '--seed', '1'],
+        capture_output=True,
+    )
+    assert missing.returncode == 1, 'Без подходящей записи - код ошибки.'
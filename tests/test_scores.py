@@ -0,0 +1,95 @@
+import sqlite3
+
+import pytest
+
+from snake_scores import ScoreStore
+
+
+@pytest.fixture
+def store():
+    with ScoreStore(':memory:', session='first', batch_size=10) as store:
+        yield store
+
+
+def test_scores_are_batched(store):
+    for score in range(5):
+        store.add(score, 1, 10, 1.0)
+    assert store._connection is None, (
+        'Результаты должны копиться в памяти до заполнения пакета.'
+    )
+    assert store.count() == 5
+
+
+def test_leaderboard_queries(store):
+    for score in range(100):
+        store.add(score, score // 2 + 1, score * 10, 1.0)
+    store.session = 'second'
+    store.add(1000, 501, 10000, 5.0)
+
+    assert [record.score for record in store.top(3)] == [1000, 99, 98]
+    assert [record.score for record in store.top(2, 'first')] == [99, 98]
+    assert store.percentile(50, 'first') == 50
+    assert store.percentile(100) == 1000
+    assert store.session_summary('first') == (100, 99, 49.5)
+    assert store.session_summary() == (1, 1000, 1000.0)
+
+
+def test_replay_lookup(store):
+    store.add(5, 6, 50, 1.0, seed=1, replay=b'low')
+    store.add(9, 10, 90, 1.0, seed=1, replay=b'high')
+    store.add(20, 21, 200, 1.0, seed=2)
+    store.add(7, 8, 70, 1.0, seed=3, replay=b'other')
+
+    assert store.replay() == b'high', (
+        'По умолчанию выгружается лучшая партия с записью.'
+    )
+    assert store.replay(seed=1) == b'high'
+    assert store.replay(record_id=1) == b'low'
+    assert store.replay(seed=2) is None
+
+
+def test_percentile_uses_score_counts(store):
+    for score in range(100):
+        store.add(score % 10, 1, 10, 1.0)
+    store.session = 'second'
+    for score in (3, 3, 50):
+        store.add(score, 1, 10, 1.0)
+    store.flush()
+
+    counts = store._connect().execute(
+        'SELECT session, score, count FROM score_counts '
+        "WHERE score = 3 ORDER BY session"
+    ).fetchall()
+    assert counts == [('first', 3, 10), ('second', 3, 2)], (
+        'Сводка должна хранить число партий с каждым счётом в сессии.'
+    )
+    totals = store._connect().execute(
+        'SELECT score, count FROM score_totals WHERE score IN (3, 50) '
+        'ORDER BY score'
+    ).fetchall()
+    assert totals == [(3, 12), (50, 1)], (
+        'Общая сводка должна хранить число партий с каждым счётом.'
+    )
+    assert store.percentile(0, 'first') == 0
+    assert store.percentile(55, 'first') == 5
+    assert store.percentile(50, 'second') == 3
+    assert store.percentile(100) == 50
+    assert store.percentile(50, 'missing') is None
+
+
+def test_score_counts_filled_for_old_database(tmp_path):
+    path = str(tmp_path / 'scores.sqlite3')
+    with ScoreStore(path, session='old') as store:
+        for score in (1, 2, 2, 7):
+            store.add(score, 1, 10, 1.0)
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute('DROP TABLE score_counts')
+        connection.execute('DROP TABLE score_totals')
+    connection.close()
+
+    with ScoreStore(path) as store:
+        assert store.percentile(50) == 2, (
+            'Сводка должна заполняться по результатам старой базы.'
+        )
+        assert store.percentile(100, 'old') == 7
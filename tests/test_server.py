@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+import snake_core
+from snake_server import GameServer
+
+
+async def _read_message(reader):
+    line = await asyncio.wait_for(reader.readline(), timeout=5)
+    return json.loads(line)
+
+
+def _apply(board, message):
+    if message.get('type') == 'state':
+        board['snake'] = [tuple(cell) for cell in message['snake']]
+        board['objects'] = {
+            tuple(cell): kind for kind, *cell in message['objects']
+        }
+        return
+    if 'h' not in message:
+        return
+    for cell in message.get('f', ()):
+        board['snake'].remove(tuple(cell))
+    board['snake'].insert(0, tuple(message['h']))
+    board['objects'].pop(tuple(message['h']), None)
+    for kind, *cell in message.get('s', ()):
+        board['objects'][tuple(cell)] = kind
+
+
+def _server_board(session):
+    state = session.state
+    return {
+        'snake': [
+            snake_core.cell_coordinates(position)
+            for position in state.snake.positions
+        ],
+        'objects': {
+            snake_core.cell_coordinates(game_object.position):
+            session.snapshot()['objects'][index][0]
+            for index, game_object in enumerate(state.objects)
+        },
+    }
+
+
+async def _play_sessions():
+    # Тики отыгрываются вручную: планировщик почти не просыпается.
+    server = GameServer(port=0, tick_rate=0.001)
+    await server.start()
+    clients = [
+        await asyncio.open_connection(server.host, server.port)
+        for _ in range(3)
+    ]
+    boards = []
+    for reader, _ in clients:
+        board = {}
+        _apply(board, await _read_message(reader))
+        boards.append(board)
+    assert len(server.sessions) == 3
+
+    sessions = list(server.sessions.values())
+    turns = (b'U\n', b'L\n', b'D\n', b'R\n')
+    for tick in range(60):
+        for index, (_, writer) in enumerate(clients):
+            if (tick + index) % 4 == 0:
+                writer.write(turns[(tick + index) % 3])
+                await writer.drain()
+        await asyncio.sleep(0.005)
+        server.tick(1000 / snake_core.INIT_SPEED)
+
+    clients[0][1].write(b'Q\n')
+    await clients[0][1].drain()
+    await asyncio.sleep(0.05)
+    assert len(server.sessions) == 2, (
+        'По команде выхода партия должна завершаться.'
+    )
+    await server.close()
+    for board, session, (reader, _) in zip(boards, sessions, clients):
+        while line := await asyncio.wait_for(reader.readline(), timeout=5):
+            _apply(board, json.loads(line))
+        assert board == _server_board(session), (
+            'Изменения, присланные сервером, должны воспроизводить партию.'
+        )
+        assert session.state.ticks > 0
+
+
+def test_server_broadcasts_deltas_to_many_sessions():
+    asyncio.run(_play_sessions())
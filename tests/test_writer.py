@@ -0,0 +1,48 @@
+import threading
+
+import pytest
+
+from snake_scores import ScoreStore
+from snake_writer import BackgroundWriter
+
+
+def test_tasks_run_in_order_off_thread():
+    calls = []
+    with BackgroundWriter() as writer:
+        for index in range(100):
+            writer.submit(
+                lambda index=index: calls.append(
+                    (index, threading.current_thread().name)
+                )
+            )
+    assert [index for index, _ in calls] == list(range(100)), (
+        'Задачи должны выполняться в порядке постановки.'
+    )
+    assert {name for _, name in calls} == {'background-writer'}
+    assert writer.completed == writer.submitted == 100
+
+
+def test_submit_does_not_wait_for_stalled_disk(tmp_path):
+    release = threading.Event()
+    store = ScoreStore(str(tmp_path / 'scores.sqlite3'), batch_size=1)
+    writer = BackgroundWriter()
+    writer.submit(release.wait, 10)
+    for score in range(50):
+        writer.submit(store.add, score, 1, 10, 1.0)
+    assert writer.completed == 0, (
+        'Пока запись стоит, постановка задач не должна её ждать.'
+    )
+    release.set()
+    writer.close()
+    assert store.count() == 50
+    store.close()
+
+
+def test_task_error_is_raised_on_close():
+    calls = []
+    writer = BackgroundWriter()
+    writer.submit(lambda: 1 / 0)
+    writer.submit(calls.append, 'next')
+    with pytest.raises(ZeroDivisionError):
+        writer.close()
+    assert calls == ['next'], 'Ошибка задачи не должна останавливать поток.'
@@ -1,448 +1,308 @@
-"""Реализация игры - Змейка, с использованием библиотеки Pygeme."""
+"""Реализация игры - Змейка, с использованием библиотеки Pygeme.
+
+pygame, окно и часы загружаются только при запуске игры: импорт модуля
+ради игровой логики не затрагивает SDL.
+"""
+
+import os
+import sys
+import time
+
+from snake_core import (  # noqa: F401
+    ANOTHER_APPLE_COLOR,
+    APPLE_COLOR,
+    BOARD_BACKGROUND_COLOR,
+    BOARD_HEIGHT,
+    BOARD_PIXEL_HEIGHT,
+    BOARD_PIXEL_WIDTH,
+    BOARD_WIDTH,
+    BORDER_COLOR,
+    DOWN,
+    GRID_HEIGHT,
+    GRID_SIZE,
+    GRID_WIDTH,
+    INIT_SPEED,
+    LEFT,
+    MAX_SPEED,
+    RIGHT,
+    SCREEN_HEIGHT,
+    SCREEN_WIDTH,
+    SNAKE_COLOR,
+    STONE_COLOR,
+    UP,
+    Apple,
+    FixedTimestep,
+    GameObject,
+    GameState,
+    PhysicalObject,
+    Snake,
+    Stone,
+    UninedibleApple,
+    check_game_over,
+    handle_another_apple_collision,
+    handle_apple_collision,
+    initialize_game_objects,
+)
+from snake_autopilot import Autopilot
+from snake_profile import FrameProfiler, NullProfiler
+from snake_replay import Replay, play_replay
+from snake_scores import ScoreStore
+from snake_writer import BackgroundWriter
+
+# Частота кадров отрисовки, не зависит от скорости игры:
+RENDER_FPS = 60
+
+# Файл отчёта профилировщика кадра (.json или .csv). Если переменная
+# окружения задана, фазы кадра замеряются, а сводка видна поверх поля.
+PROFILE_PATH = os.environ.get('SNAKE_PROFILE')
+
+# Если переменная окружения задана, змейкой управляет автопилот.
+AUTOPILOT = bool(os.environ.get('SNAKE_AUTOPILOT'))
+
+# Способ отрисовки поля: `scaled` - поле рисуется по пикселю на клетку и
+# растягивается на окно, иначе клетки рисуются в полный размер.
+RENDER_MODE = os.environ.get('SNAKE_RENDER', '')
+
+# Файл потока RGB (.rgb) или каталог PNG для записи кадров. Если
+# переменная окружения задана, каждый выведенный кадр записывается.
+RECORD_PATH = os.environ.get('SNAKE_RECORD')
+
+
+def _create_screen():
+    """Настройка игрового окна и его заголовка."""
+    import pygame as pg
+
+    surface = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), 0, 32)
+    pg.display.set_caption('Змейка')
+    return surface
+
+
+def _create_clock():
+    """Настройка времени."""
+    import pygame as pg
+
+    return pg.time.Clock()
+
+
+# Окно и часы создаются при первом обращении к `screen` и `clock`,
+# поэтому импорт модуля не инициализирует видеоподсистему SDL.
+_LAZY_GLOBALS = {
+    'screen': _create_screen,
+    'clock': _create_clock,
+}
+
+
+def __getattr__(name):
+    """Создаёт окно или часы при первом обращении к атрибуту модуля."""
+    factory = _LAZY_GLOBALS.get(name)
+    if factory is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = globals()[name] = factory()
+    return value
+
+
+def get_screen():
+    """Возвращает игровое окно, открывая его при первом вызове."""
+    surface = globals().get('screen')
+    return __getattr__('screen') if surface is None else surface
+
+
+def get_clock():
+    """Возвращает часы игры, создавая их при первом вызове."""
+    game_clock = globals().get('clock')
+    return __getattr__('clock') if game_clock is None else game_clock
 
-from random import choice, randint
 
-import pygame as pg
-
-# Константы для размеров поля и сетки:
-SCREEN_WIDTH, SCREEN_HEIGHT = 640, 480
-GRID_SIZE = 20
-GRID_WIDTH = SCREEN_WIDTH // GRID_SIZE
-GRID_HEIGHT = SCREEN_HEIGHT // GRID_SIZE
-
-# Направления движения:
-UP = (0, -1)
-DOWN = (0, 1)
-LEFT = (-1, 0)
-RIGHT = (1, 0)
-
-# Цвет фона - черный:
-BOARD_BACKGROUND_COLOR = (0, 0, 0)
-
-# Цвет границы ячейки
-BORDER_COLOR = (93, 216, 228)
-
-# Цвет яблока
-APPLE_COLOR = (255, 0, 0)
-
-# Цвет несъедобного яблока
-ANOTHER_APPLE_COLOR = (127, 123, 32)
-
-# Цвет камня
-STONE_COLOR = (224, 224, 224)
-
-# Цвет змейки
-SNAKE_COLOR = (0, 255, 0)
-
-# Начальная корость движения змейки:
-INIT_SPEED = 5
-
-# Максимальная скорость движения змейки:
-MAX_SPEED = 25
-
-# Настройка игрового окна:
-screen = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), 0, 32)
-
-# Заголовок окна игрового поля:
-pg.display.set_caption('Змейка')
-
-# Настройка времени:
-clock = pg.time.Clock()
-
-
-# Описание классов игры.
-class GameObject:
-    """
-    Базовый класс, игровых объектов.
-
-    Содержит в себе два атрибута и
-    один метод, которые будут наследоваться дочерними
-    классами.
-
-    :param position: Позиция объекта на игровом поле
-    :type position: tuple
-    :param body_color: Цвет объекта. Будет переопределен объектом класса
-    :type body_color: None
-    """
-
-    def __init__(self):
-        """Метод инициализации объекта."""
-        self.position = ((SCREEN_WIDTH // 2), (SCREEN_HEIGHT // 2))
-        self.body_color = None
-
-    def draw(self):
-        """Метод отрисовки объектов на игровом поле."""
-        raise NotImplementedError(
-            'Метод должен быть реализован в дочернем классе.'
-        )
-
-
-class PhysicalObject(GameObject):
-    """
-    Промежуточный базовый класс, для физицеских объектов на игровом поле.
-
-    Представляет общие методы отрисовки на экране, и генерацию случайной
-    позиции при создании, исключая занятые клетки.
-
-    :param position: Позиция объекта на игровом поле.
-    :type position: tuple
-    :param body_color: Основной цвет объекта для отрисовки.
-    :type body_color: tuple
-    """
-
-    def __init__(self, occupied_positions=None):
-        """Методо инициализации объекта."""
-        super().__init__()
-        self.randomize_position(occupied_positions or set())
-
-    def draw(self):
-        """Отрисовка физических объектов на игровом поле."""
-        rect = pg.Rect(self.position, (GRID_SIZE, GRID_SIZE))
-        pg.draw.rect(screen, self.body_color, rect)
-        pg.draw.rect(screen, BORDER_COLOR, rect, 1)
-
-    def randomize_position(self, occupied_positions):
-        """Метод, возвращает кортеж случайных координат, в приделах сетки."""
-        while True:
-            value_width_x = randint(0, GRID_WIDTH - 1) * GRID_SIZE
-            value_height_y = randint(0, GRID_HEIGHT - 1) * GRID_SIZE
-            new_position = (value_width_x, value_height_y)
-
-            if new_position not in occupied_positions:
-                self.position = new_position
-                break
-
-
-class Apple(PhysicalObject):
-    """
-    Класс яблока - игрового объекта, который может быть съеден змейкой.
-
-    Наследуется от класса PhysicalObject. Позиция генерируется
-    случайным образом на игровом поле.
-
-    :param position: Позиция объекта на игровом поле, определяется случайно
-    :type position: tuple
-    :param body_color: Цвет объекта - Яблоко
-    :type body_color: tuple
-    """
-
-    def __init__(self, occupied_positions=None, body_color=APPLE_COLOR):
-        """Метод инициализации объекта."""
-        super().__init__(occupied_positions)
-        self.body_color = body_color
-
-
-class UninedibleApple(Apple):
-    """
-    Дочерний класс, описывает игровой объект несъедобное яблоко.
-
-    :param position: Позиция объекта на игровом поле, определяется случайно
-    :type position: tuple
-    :param body_color: Цвет объекта - Несъедобное яблоко
-    :type body_color: tuple
-    """
-
-    def __init__(self, occupied_positions=None):
-        """Метод инициализации объекта."""
-        super().__init__(occupied_positions)
-        self.body_color = ANOTHER_APPLE_COLOR
-
-
-class Stone(PhysicalObject):
-    """
-    Класс камня - статичного препятствия на игровом поле.
-
-    Наследуется от класса PhysicalObject. При столкновении с камнем
-    змейка погибает. Позиция генерируется случайным образом на игровом поле.
-
-    :param position: Позиция объекта на игровом поле, определяется случайно
-    :type position: tuple
-    :param body_color: Цвет объекта - Камень
-    :type body_color: tuple
+def handle_keys(game_object):
     """
+    Функция обработки действий пользователя.
 
-    def __init__(self, occupied_positions=None, body_color=STONE_COLOR):
-        """Метод инициализации объекта."""
-        super().__init__(occupied_positions)
-        self.body_color = body_color
-
-
-class Snake(GameObject):
+    Вызывается каждый кадр отрисовки, а не каждый игровой тик. Все
+    нажатия между тиками попадают в очередь поворотов змейки, поэтому
+    два быстрых поворота подряд не теряются.
     """
-    Дочерний класс, переопределяются атрибуты и метод для объекта - Змейка.
-
-    :param length: Длина змейки. По умолчанию значение = 1
-    :type length: int
-    :param positions: Спиоск позиций частей тела змейки. Начальная позиция
-    центр экрана.
-    :type positions: list[tuple]
-    :param direction: Направление движения змейки. По умолчанию - вправо
-    :type direction: tuple
-    :param next_direction: следующее направление движения, применяется после
-    обработки нажатия клавиш. По умолчанию - None
-    :type next_direction: NoneType | tuple
-    :param body_color: цвет змейки. По умолчанию - зеленый
-    :type body_color: tuple
-    :param last: Хранит в себе позицию последнего элемента перед тем как
-    стереть его.
-    :type last: None
-    """
-
-    def __init__(self):
-        """Метод инициализации объекта."""
-        super().__init__()
-        self.body_color = SNAKE_COLOR
-        self.positions = [self.position]
-        self.reset()
-
-    def update_direction(self, next_direction=None):
-        """Обновляет навпрвление движения змейки."""
-        if next_direction is not None:
-            self.next_direction = next_direction
-
-        if self.next_direction:
-            if not ((self.direction == UP and self.next_direction == DOWN)
-               or (self.direction == DOWN and self.next_direction == UP)
-               or (self.direction == LEFT and self.next_direction == RIGHT)
-               or (self.direction == RIGHT and self.next_direction == LEFT)):
-                self.direction = self.next_direction
-            self.next_direction = None
-
-    def move(self):
-        """Обновляет позицию змейки."""
-        current_head_x, current_head_y = self.get_head_position()
-        dx, dy = self.direction
-
-        new_x = (current_head_x + dx * GRID_SIZE) % SCREEN_WIDTH
-        new_y = (current_head_y + dy * GRID_SIZE) % SCREEN_HEIGHT
-
-        new_position_head = (new_x, new_y)
-
-        if len(self.positions) >= self.length:
-            self.last = self.positions[-1]
-        else:
-            self.last = None
-
-        self.positions.insert(0, new_position_head)
-
-        if len(self.positions) > self.length:
-            self.positions.pop()
-
-    def draw(self):
-        """Отрисовывает змейку на экране, затирая след."""
-        if self.last is not None:
-            last_rect = pg.Rect(self.last, (GRID_SIZE, GRID_SIZE))
-            pg.draw.rect(screen, BOARD_BACKGROUND_COLOR, last_rect)
-
-        for position in self.positions:
-            rect = pg.Rect(position, (GRID_SIZE, GRID_SIZE))
-            pg.draw.rect(screen, self.body_color, rect)
-            pg.draw.rect(screen, BORDER_COLOR, rect, 1)
-
-    def get_head_position(self):
-        """Возвращает позицию головы змейки."""
-        return self.positions[0]
-
-    def decrease_length(self):
-        """Уменьшает длину змейки на один сегмент."""
-        if len(self.positions) > 1:
-            self.last = self.positions.pop()
-            self.length -= 1
-            return True
-        return False
-
-    def reset(self):
-        """Сбрасывает змейку в начальное состояние."""
-        direction_tuple = (UP, DOWN, LEFT, RIGHT)
-        self.length = 1
-        del self.positions[1:]
-        self.last = None
-        self.direction = choice(direction_tuple)
-        self.next_direction = None
-
+    import pygame as pg
 
-def handle_keys(game_object):
-    """Функция обработки действий пользователя."""
+    key_directions = {
+        pg.K_UP: UP, pg.K_DOWN: DOWN, pg.K_LEFT: LEFT, pg.K_RIGHT: RIGHT,
+    }
     for event in pg.event.get():
         if event.type == pg.QUIT:
             pg.quit()
             raise SystemExit
-        elif event.type == pg.KEYDOWN:
-            if event.key == pg.K_UP and game_object.direction != DOWN:
-                game_object.next_direction = UP
-            elif event.key == pg.K_DOWN and game_object.direction != UP:
-                game_object.next_direction = DOWN
-            elif event.key == pg.K_LEFT and game_object.direction != RIGHT:
-                game_object.next_direction = LEFT
-            elif event.key == pg.K_RIGHT and game_object.direction != LEFT:
-                game_object.next_direction = RIGHT
-
-
-def initialize_game_objects():
-    """Инициализация всех игровых объектов."""
-    snake = Snake()
-    snake_positions = set(snake.positions)
-
-    apple = Apple(snake_positions)
-    occupied_after_apple = snake_positions | {apple.position}
-
-    stone = Stone(occupied_after_apple)
-    occupied_after_stone = occupied_after_apple | {stone.position}
-
-    another_apple = UninedibleApple(occupied_after_stone)
-
-    return snake, apple, stone, another_apple
-
-
-def draw_initial_screen(snake, apple, another_apple, stone):
-    """Отрисовка начального экрана."""
-    screen.fill(BOARD_BACKGROUND_COLOR)
-    apple.draw()
-    another_apple.draw()
-    stone.draw()
-    snake.draw()
-    pg.display.update()
-
-
-def handle_apple_collision(
-    snake,
-    apple,
-    occupied_positions,
-    current_score,
-    current_speed
-):
-    """Обработка столкновения с яблоком."""
-    snake.length += 1
-    new_score = current_score + 2
-
-    if current_speed <= MAX_SPEED:
-        new_speed = current_speed + 2
-    else:
-        new_speed = current_speed
-
-    apple.randomize_position(occupied_positions)
-    return new_score, new_speed
-
-
-def handle_another_apple_collision(
-    snake, another_apple, occupied_positions, old_tail_position
-):
-    """Обработка столкновения с несъедобным яблоком."""
-    # Игра заканчивается.
-    if len(snake.positions) == 1:
-        return False
+        elif event.type == pg.KEYDOWN and event.key in key_directions:
+            game_object.queue_turn(key_directions[event.key])
 
-    snake.decrease_length()
-    # ИГра продолжается.
-    if old_tail_position:
-        last_rect = pg.Rect(old_tail_position, (GRID_SIZE, GRID_SIZE))
-        pg.draw.rect(screen, BOARD_BACKGROUND_COLOR, last_rect)
-    another_apple.randomize_position(occupied_positions)
-    return True
 
+def reset_game_state(state, renderer):
+    """Сброс состояния игры."""
+    state.reset()
 
-def check_game_over(snake, stone):
-    """Проверка условий завершения игры."""
-    head_position = snake.get_head_position()
+    # Перерисовываются только клетки прошлой и новой партии, а на экран
+    # они выводятся обычным `flip` кадра - без полного обновления окна.
+    renderer.draw_step(state)
 
-    # Столкновение с телом змейки или с камнем
-    return (head_position in snake.positions[1:]
-            or stone.position == head_position)
 
+def save_score(scores, replay, score, length, ticks, duration, seed):
+    """Запись результатов и записи партии в хранилище."""
+    scores.add(
+        score, length, ticks, duration, seed=seed, replay=replay.to_bytes()
+    )
 
-def reset_game_state(snake, apple, another_apple, stone):
-    """Сброс состояния игры."""
-    snake.reset()
 
-    snake_positions = set(snake.positions)
-    apple.randomize_position(snake_positions)
+def create_renderer():
+    """Рендерер окна по режиму `SNAKE_RENDER` и размеру поля."""
+    from snake_render import ChunkRenderer, Renderer, ScaledRenderer
 
-    occupied_after_apple = snake_positions | {apple.position}
-    stone.randomize_position(occupied_after_apple)
+    if RENDER_MODE == 'scaled':
+        return ScaledRenderer(get_screen())
+    if BOARD_PIXEL_WIDTH > SCREEN_WIDTH or BOARD_PIXEL_HEIGHT > SCREEN_HEIGHT:
+        return ChunkRenderer(get_screen())
+    return Renderer(get_screen())
 
-    occupied_after_stone = occupied_after_apple | {stone.position}
-    another_apple.randomize_position(occupied_after_stone)
 
-    # Перерисовка поля
-    screen.fill(BOARD_BACKGROUND_COLOR)
-    apple.draw()
-    another_apple.draw()
-    stone.draw()
-    snake.draw()
-    pg.display.update()
+def create_autopilot():
+    """
+    Автопилот с загруженным циклом и массивами поиска или None.
 
-    # score, speed
-    return 0, INIT_SPEED
+    Всё, что зависит от размера поля, готовится до первого тика: иначе на
+    большом поле первый тик автопилота затягивается.
+    """
+    if not AUTOPILOT:
+        return None
+    autopilot = Autopilot()
+    autopilot.prepare()
+    return autopilot
 
 
 def main():
     """Основная функция игры."""
+    import pygame as pg
+
+    from snake_record import FrameRecorder, NullRecorder
+    from snake_render import ProfileOverlay
+
     pg.init()
 
     # Инициализация объектов
-    snake, apple, stone, another_apple = initialize_game_objects()
-    speed = INIT_SPEED
-    score = 0
+    state = GameState()
+    renderer = create_renderer()
+
+    # Результаты партий и отчёты профилировщика пишутся на диск в фоновом
+    # потоке: задержки диска не задерживают кадры.
+    writer = BackgroundWriter()
+
+    # Профилирование фаз кадра
+    profiler = NullProfiler()
+    overlay = None
+    if PROFILE_PATH:
+        profiler = state.profiler = FrameProfiler(
+            1000 / RENDER_FPS, PROFILE_PATH, writer=writer
+        )
+        overlay = ProfileOverlay(profiler)
+    autopilot = create_autopilot()
+    recorder = FrameRecorder(RECORD_PATH) if RECORD_PATH else NullRecorder()
+
+    scores = ScoreStore()
+    started = time.monotonic()
+    replay = Replay.start(state)
 
     def score_statistic():
-        """Запись результатов игры в файл."""
-        with open('score_stats.txt', 'a', encoding='utf-8') as file:
-            file.write(f'Game Over! Ваш счёт за прошлую игру: {score}\n')
+        """Ставит результат и запись партии в очередь на запись."""
+        # Запись партии больше не меняется: следующая начинается заново.
+        writer.submit(
+            save_score, scores, replay, state.score, state.snake.length,
+            state.ticks, time.monotonic() - started, state.seed
+        )
 
     # Начальная отрисовка
-    draw_initial_screen(snake, apple, another_apple, stone)
-
-    while True:
-        clock.tick(speed)
-
-        # Обработка управления
-        handle_keys(snake)
-        snake.update_direction()
-
-        # Сохраняем позицию хвоста перед движением
-        old_tail_position = snake.positions[-1] if snake.positions else None
-        snake.move()
-
-        # Получаем занятые позиции
-        occupied_positions = set(snake.positions)
-        occupied_positions.add(apple.position)
-        occupied_positions.add(another_apple.position)
-        occupied_positions.add(stone.position)
-
-        head_position = snake.get_head_position()
-
-        # Обработка столкновений
-        if apple.position == head_position:
-            score, speed = handle_apple_collision(
-                snake, apple, occupied_positions, score, speed
-            )
-
-        elif another_apple.position == head_position:
-            game_continues = handle_another_apple_collision(
-                snake, another_apple, occupied_positions, old_tail_position
-            )
-            if not game_continues:
-                score_statistic()
-                score, speed = reset_game_state(
-                    snake, apple, another_apple, stone
-                )
-                continue
-
-        # Проверка условий завершения игры
-        if check_game_over(snake, stone):
-            score_statistic()
-            score, speed = reset_game_state(
-                snake, apple, another_apple, stone
-            )
-            continue
-
-        # Отрисовка кадра
-        snake.draw()
-        apple.draw()
-        another_apple.draw()
-        stone.draw()
-        pg.display.update()
+    renderer.draw_full(state)
+    scheduler = FixedTimestep()
+
+    # Накопленные результаты и кадры записываются и при выходе из игры:
+    # сначала поток записи дописывает очередь, затем закрывается база.
+    with scores, writer, recorder:
+        try:
+            while True:
+                scheduler.add(get_clock().tick(RENDER_FPS))
+                profiler.start_frame()
+
+                # Обработка управления
+                handle_keys(state.snake)
+                profiler.mark('handle_keys')
+
+                # Игровые тики с частотой, заданной скоростью игры
+                while scheduler.consume(state.speed):
+                    if autopilot is not None:
+                        autopilot.steer(state)
+                    action = state.snake.pop_turn()
+                    result = state.step(action)
+                    replay.record(action)
+                    if result.done:
+                        score_statistic()
+                        reset_game_state(state, renderer)
+                        started = time.monotonic()
+                        replay = Replay.start(state)
+                        profiler.mark('game_over')
+                        continue
+
+                    # Отрисовка изменившихся клеток
+                    renderer.draw_step(state)
+                    profiler.mark('draw')
+
+                if overlay is not None:
+                    # Панель рисуется поверх уже собранного окна.
+                    renderer.compose()
+                    overlay.draw(renderer)
+                    profiler.mark('draw_overlay')
+                renderer.flip()
+                profiler.mark('display_update')
+                recorder.capture(renderer.surface)
+                profiler.mark('record')
+                profiler.end_frame()
+        finally:
+            # Отчёт пишется и при выходе: иначе короткий запуск не оставит
+            # файла, а длинный потеряет последний интервал. Задача ставится
+            # в очередь до закрытия потока записи.
+            writer.submit(profiler.dump)
+
+
+def watch_replay(replay):
+    """Показывает запись партии в окне со скоростью игры."""
+    import pygame as pg
+
+    from snake_record import FrameRecorder, NullRecorder
+    from snake_render import Renderer
+
+    pg.init()
+    renderer = Renderer(get_screen())
+    # Запись партии в видео идёт без ожидания часов и без пропуска кадров:
+    # каждый тик - один кадр.
+    recorder = NullRecorder()
+    if RECORD_PATH:
+        recorder = FrameRecorder(RECORD_PATH, drop_frames=False)
+
+    def show_step(state, result):
+        """Отрисовка тика записи."""
+        for event in pg.event.get():
+            if event.type == pg.QUIT:
+                pg.quit()
+                raise SystemExit
+        if not RECORD_PATH:
+            get_clock().tick(state.speed)
+        if state.ticks == 1:
+            renderer.draw_full(state)
+        else:
+            renderer.draw_step(state)
+            renderer.flip()
+        recorder.capture(renderer.surface)
+
+    with recorder:
+        return play_replay(replay, show_step)
 
 
 if __name__ == '__main__':
-    main()
+    if len(sys.argv) > 1:
+        watch_replay(Replay.load(sys.argv[1]))
+    else:
+        main()